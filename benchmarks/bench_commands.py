@@ -0,0 +1,455 @@
+#!/usr/bin/env python3
+"""
+Command benchmark for the Discord Utils Bot
+
+Runs the real command functions through ``bot.invoke`` (argument
+conversion, permission checks, hooks) against the in-process fake Discord
+backend in benchmarks/fake_discord.py. No network access is needed.
+
+For every scenario it reports:
+
+  CPU        - CPU time spent in the bot and discord.py, excluding the
+               fake backend's own bookkeeping
+  wall       - wall clock time of the run, including real sleeps such as
+               the pause purge() takes between batches
+  API time   - simulated time the same run would spend waiting on Discord
+               (latency plus rate limit buckets)
+  requests   - REST calls made, and how many had to wait for a bucket
+  rate       - items processed per CPU second and per second of wall +
+               API time (what a user would see)
+
+The fake runs on a virtual clock seeded by --seed, so repeated runs with
+the same arguments produce the same request counts and API times.
+
+Usage: python benchmarks/bench_commands.py [--messages N] [--members N]
+           [--latency-ms MS] [--jitter-ms MS] [--no-rate-limits]
+           [--repeat N] [--only clearold,channelstats,...]
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from fake_discord import FakeDiscord, FakeStats  # noqa: E402
+
+CLEANUP_CHANNELS = 10
+
+
+async def invoke(fake, channel, content, confirm=False, attachments=None):
+    """Dispatch one command message as the guild owner and wait for it"""
+    import main
+
+    bot = main.bot
+    author = fake.owner(channel.guild)
+    ctx = await bot.get_context(fake.message(channel, author, content, attachments))
+    if ctx.command is None:
+        raise RuntimeError(f"Unknown command: {content}")
+
+    task = asyncio.create_task(bot.invoke(ctx))
+    if confirm:
+        # Answer the confirmation prompt once the command is waiting for it
+        while not bot._listeners.get("message") and not task.done():
+            await asyncio.sleep(0)
+        bot.dispatch("message", fake.message(channel, author, "confirm"))
+    await task
+    return ctx
+
+
+async def scenario_clearold(fake, args, clock):
+    guild = fake.add_guild(messages=args.messages, span_days=30)
+    channel = guild.text_channels[0]
+    clock.start()
+    await invoke(fake, channel, "!clearold 7")
+    return fake.stats.deleted
+
+
+async def scenario_clearall(fake, args, clock):
+    guild = fake.add_guild(messages=args.messages, span_days=30)
+    channel = guild.text_channels[0]
+    clock.start()
+    await invoke(fake, channel, "!clearall", confirm=True)
+    return fake.stats.deleted
+
+
+async def scenario_channelstats(fake, args, clock):
+    guild = fake.add_guild(messages=args.messages, span_days=30)
+    clock.start()
+    await invoke(fake, guild.text_channels[0], "!channelstats")
+    return args.messages
+
+
+async def scenario_backup(fake, args, clock):
+    limit = min(5000, args.messages)
+    guild = fake.add_guild(messages=args.messages, span_days=30)
+    channel = guild.text_channels[0]
+    clock.start()
+    await invoke(fake, channel, f"!backup {channel.mention} {limit}")
+    return limit
+
+
+def synthetic_backup(count: int, seed: int) -> bytes:
+    """A ``!backup`` file of chat: runs of 1-4 messages by one of 50 authors"""
+    rng = random.Random(seed)
+    lines = [json.dumps({"backup": 1, "channel": "general", "messages": count})]
+    timestamp = 1_700_000_000.0
+    author = 0
+    for index in range(count):
+        if rng.random() < 0.5:
+            author = rng.randrange(50)
+        timestamp += rng.expovariate(1 / 60)
+        message = {
+            "name": f"User {author}",
+            "avatar": f"https://cdn.invalid/avatars/{author}.png",
+            "content": f"Message {index} " + "x" * rng.randrange(10, 200),
+            "timestamp": datetime.fromtimestamp(timestamp, timezone.utc).isoformat(),
+            "attachments": [],
+        }
+        lines.append(json.dumps(message))
+    return ("\n".join(lines) + "\n").encode()
+
+
+async def scenario_restore(fake, args, clock):
+    guild = fake.add_guild()
+    channel = guild.text_channels[0]
+    backup = {"backup.jsonl": synthetic_backup(args.messages, args.seed)}
+    clock.start()
+    await invoke(fake, channel, "!restore", attachments=backup)
+    # The command returns once the restore is started; wait for its report
+    import main
+
+    await asyncio.gather(*main.bot.get_cog("Restore")._reports)
+    restored = len(fake.webhook_posts.get(channel.id, ()))
+    if not restored:
+        raise RuntimeError("restore posted nothing")
+    return args.messages
+
+
+async def scenario_auto_cleanup(fake, args, clock):
+    import main
+    from core.config_store import ConfigStore
+
+    guild = fake.add_guild(
+        channels=CLEANUP_CHANNELS + 1, messages=args.messages, span_days=30
+    )
+    store = ConfigStore(os.path.join(tempfile.mkdtemp(), "config"))
+    # Channel ids repeat between runs, and a channel cleaned up by an earlier
+    # run would be skipped as done for the day
+    main.cleanup_runs.clear()
+    for channel in guild.text_channels[:CLEANUP_CHANNELS]:
+        store.set_cleanup(guild.id, channel.id, channel.name, 7)
+
+    original, main.config = main.config, store
+    clock.start()
+    try:
+        await main.auto_cleanup.coro()
+    finally:
+        main.config = original
+        await store.close()
+    return fake.stats.deleted
+
+
+async def mirror_channels(fake, channels):
+    """Index channels in a fresh message mirror, as a finished backfill would"""
+    import discord
+    from core.message_mirror import MessageMirror
+
+    mirror = MessageMirror(os.path.join(tempfile.mkdtemp(), "messages.sqlite3"))
+    await mirror.open()
+    for channel in channels:
+        log = fake.logs[channel.id]
+        user_base = fake.guilds[channel.guild.id].user_base
+        mirror.add_rows(
+            [
+                (
+                    channel.id,
+                    message_id,
+                    channel.guild.id,
+                    user_base + author,
+                    discord.utils.snowflake_time(message_id).timestamp(),
+                )
+                for message_id, author in zip(log.ids, log.authors)
+            ]
+        )
+        await mirror.save_backfill(channel.id, None, complete=True)
+    return mirror
+
+
+async def with_mirror(mirror, command):
+    """Run a command with ``mirror`` installed as the bot's message mirror"""
+    import main
+
+    main.message_mirror = main.bot.message_mirror = mirror
+    # Channel ids repeat between runs, so drop columns cached by earlier ones
+    main.bot.get_cog("Analytics")._columns.clear()
+    try:
+        await command
+    finally:
+        main.message_mirror = main.bot.message_mirror = None
+        await mirror.close()
+
+
+async def scenario_clearold_mirror(fake, args, clock):
+    guild = fake.add_guild(messages=args.messages, span_days=30)
+    channel = guild.text_channels[0]
+    mirror = await mirror_channels(fake, [channel])
+    clock.start()
+    await with_mirror(mirror, invoke(fake, channel, "!clearold 7"))
+    return fake.stats.deleted
+
+
+async def scenario_channelstats_mirror(fake, args, clock):
+    guild = fake.add_guild(messages=args.messages, span_days=30)
+    channel = guild.text_channels[0]
+    mirror = await mirror_channels(fake, [channel])
+    clock.start()
+    await with_mirror(mirror, invoke(fake, channel, "!channelstats"))
+    return args.messages
+
+
+async def scenario_channelstats_warm(fake, args, clock):
+    guild = fake.add_guild(messages=args.messages, span_days=30)
+    channel = guild.text_channels[0]
+    await invoke(fake, channel, "!channelstats")
+    clock.start()
+    await invoke(fake, channel, "!channelstats")
+    return args.messages
+
+
+async def scenario_channelstats_restart(fake, args, clock):
+    """Counts restored from a snapshot, with 1% new messages sent while down"""
+    import main
+
+    guild = fake.add_guild(messages=args.messages, span_days=30)
+    channel = guild.text_channels[0]
+    await invoke(fake, channel, "!channelstats")
+    snapshot = main.channel_counts.to_dict()
+    main.channel_counts.forget(channel.id)
+    for author in range(args.messages // 100):
+        fake.logs[channel.id].append(author % 50)
+
+    clock.start()
+    main.channel_counts.restore(snapshot)
+    await invoke(fake, channel, "!channelstats")
+    return args.messages
+
+
+async def scenario_activity(fake, args, clock):
+    guild = fake.add_guild(messages=args.messages, span_days=90)
+    clock.start()
+    await invoke(fake, guild.text_channels[0], "!activity 90")
+    return args.messages
+
+
+async def scenario_activity_mirror(fake, args, clock):
+    guild = fake.add_guild(messages=args.messages, span_days=90)
+    channel = guild.text_channels[0]
+    mirror = await mirror_channels(fake, [channel])
+    clock.start()
+    await with_mirror(mirror, invoke(fake, channel, "!activity 90"))
+    return args.messages
+
+
+async def scenario_activity_mirror_warm(fake, args, clock):
+    guild = fake.add_guild(messages=args.messages, span_days=90)
+    channel = guild.text_channels[0]
+    mirror = await mirror_channels(fake, [channel])
+
+    async def twice():
+        await invoke(fake, channel, "!activity 90")
+        clock.start()
+        await invoke(fake, channel, "!activity 90")
+
+    await with_mirror(mirror, twice())
+    return args.messages
+
+
+async def scenario_membercount(fake, args, clock):
+    guild = fake.add_guild(members=args.members)
+    clock.start()
+    await invoke(fake, guild.text_channels[0], "!membercount")
+    return args.members
+
+
+async def scenario_membercount_lean(fake, args, clock):
+    guild = fake.add_guild(members=args.members, cache_members=False)
+    clock.start()
+    await invoke(fake, guild.text_channels[0], "!membercount")
+    return args.members
+
+
+class Clock:
+    """Measures a scenario from the end of its setup"""
+
+    def __init__(self, fake: FakeDiscord):
+        self.fake = fake
+
+    def start(self):
+        # Requests and API time of the setup (e.g. a first, cold call) don't count
+        self.fake.stats = FakeStats()
+        self.api = self.fake.now()
+        self.wall = time.perf_counter()
+        self.cpu = time.process_time()
+
+
+SCENARIOS = {
+    "clearold": (scenario_clearold, "messages"),
+    "clearall": (scenario_clearall, "messages"),
+    "channelstats": (scenario_channelstats, "messages"),
+    "channelstats_warm": (scenario_channelstats_warm, "messages"),
+    "channelstats_restart": (scenario_channelstats_restart, "messages"),
+    "clearold_mirror": (scenario_clearold_mirror, "messages"),
+    "channelstats_mirror": (scenario_channelstats_mirror, "messages"),
+    "activity": (scenario_activity, "messages"),
+    "activity_mirror": (scenario_activity_mirror, "messages"),
+    "activity_mirror_warm": (scenario_activity_mirror_warm, "messages"),
+    "backup": (scenario_backup, "messages"),
+    "restore": (scenario_restore, "messages"),
+    "auto_cleanup": (scenario_auto_cleanup, "messages"),
+    "membercount": (scenario_membercount, "members"),
+    "membercount_lean": (scenario_membercount_lean, "members"),
+}
+
+
+def make_backend(args) -> FakeDiscord:
+    return FakeDiscord(
+        latency=args.latency_ms / 1000,
+        jitter=args.jitter_ms / 1000,
+        rate_limits={} if args.no_rate_limits else None,
+        global_limit=None if args.no_rate_limits else (50, 1.0),
+        seed=args.seed,
+    )
+
+
+async def run_scenario(name, args):
+    """Run one scenario ``--repeat`` times and return the median run"""
+    import main
+
+    function, unit = SCENARIOS[name]
+    errors = []
+
+    async def on_command_error(ctx, error):
+        errors.append(error)
+
+    main.bot.add_listener(on_command_error)
+    runs = []
+    try:
+        for _ in range(args.repeat):
+            fake = make_backend(args).install(main.bot)
+            # Channel ids repeat between runs, so forget counts from earlier ones
+            main.channel_counts._channels.clear()
+            clock = Clock(fake)
+            items = await function(fake, args, clock)
+            cpu = max(1e-9, time.process_time() - clock.cpu - fake.stats.overhead)
+            wall = time.perf_counter() - clock.wall - fake.stats.overhead
+            api_time = fake.now() - clock.api
+            runs.append(
+                {
+                    "items": items,
+                    "cpu": cpu,
+                    "wall": wall,
+                    "api": api_time,
+                    "stats": fake.stats,
+                    "user_rate": items / (wall + api_time),
+                }
+            )
+    finally:
+        main.bot.remove_listener(on_command_error)
+
+    if errors:
+        raise RuntimeError(f"{name} failed: {errors[0]!r}")
+
+    runs.sort(key=lambda run: run["cpu"])
+    median = runs[len(runs) // 2]
+    median["unit"] = unit
+    median["cpu_spread"] = (
+        statistics.pstdev(run["cpu"] for run in runs) if len(runs) > 1 else 0.0
+    )
+    return median
+
+
+def format_seconds(seconds):
+    if seconds >= 3600:
+        return f"{seconds / 3600:.1f}h"
+    if seconds >= 60:
+        return f"{seconds / 60:.1f}m"
+    return f"{seconds:.2f}s"
+
+
+async def run(args):
+    import main
+
+    logging.getLogger().setLevel(logging.WARNING)
+    # Backups are written to the working directory
+    os.chdir(tempfile.mkdtemp(prefix="bench-commands-"))
+
+    print(
+        f"⚡ Command benchmark ({args.messages:,} messages, {args.members:,} members, "
+        f"{args.latency_ms:g} ms latency, rate limits "
+        f"{'off' if args.no_rate_limits else 'on'})"
+    )
+    print("=" * 107)
+    print(
+        f"{'scenario':<22}{'items':>9}{'CPU':>8}{'±':>7}{'wall':>8}{'API time':>10}"
+        f"{'requests':>10}{'waits':>7}{'items/s CPU':>12}{'items/s total':>14}"
+    )
+
+    # Entering the client binds it to this loop without logging in
+    async with main.bot:
+        for name in (
+            "cogs.advanced_utils",
+            "cogs.analytics",
+            "cogs.perf",
+            "cogs.restore",
+        ):
+            await main.bot.load_extension(name)
+
+        names = args.only.split(",") if args.only else list(SCENARIOS)
+        for name in names:
+            result = await run_scenario(name, args)
+            stats = result["stats"]
+            print(
+                f"{name:<22}{result['items']:>9,}{format_seconds(result['cpu']):>8}"
+                f"{format_seconds(result['cpu_spread']):>7}"
+                f"{format_seconds(result['wall']):>8}"
+                f"{format_seconds(result['api']):>10}{stats.total_requests:>10,}"
+                f"{stats.rate_limited:>7,}{result['items'] / result['cpu']:>12,.0f}"
+                f"{result['user_rate']:>14,.1f}"
+            )
+
+        # Drop pending delete_after timers before the client closes
+        for task in asyncio.all_tasks():
+            if task is not asyncio.current_task():
+                task.cancel()
+
+
+def main():
+    """Run the command benchmark"""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--messages", type=int, default=20_000)
+    parser.add_argument("--members", type=int, default=20_000)
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--no-rate-limits", action="store_true")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--only", default="", help=f"comma separated subset of {', '.join(SCENARIOS)}"
+    )
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
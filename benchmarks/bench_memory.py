@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Member cache memory benchmark for the Discord Utils Bot
+
+Populates one synthetic large guild in a fresh process per mode and
+compares the resident memory it costs:
+
+  full  - default member cache, every member chunked into guild.members
+  lean  - LEAN_CACHE mode, members streamed into aggregates and dropped
+
+Usage: python benchmarks/bench_memory.py [members]
+"""
+
+import gc
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+GUILD_ID = 1_000_000_000_000_000
+ROLE_COUNT = 40
+CHUNK_SIZE = 1000
+
+
+def current_rss() -> int:
+    """Return the resident set size of this process in bytes"""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        # ru_maxrss is the peak, in KiB on Linux and bytes on macOS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+def guild_payload(member_count: int) -> dict:
+    """Build a GUILD_CREATE payload for a large guild without member lists"""
+    roles = [
+        {
+            "id": str(GUILD_ID + index),
+            "name": "@everyone" if index == 0 else f"role-{index}",
+            "permissions": "0",
+            "position": index,
+            "color": 0,
+            "hoist": False,
+            "managed": False,
+            "mentionable": False,
+        }
+        for index in range(ROLE_COUNT + 1)
+    ]
+    return {
+        "id": str(GUILD_ID),
+        "name": "Synthetic Guild",
+        "owner_id": str(GUILD_ID + 10_000_000),
+        "member_count": member_count,
+        "large": True,
+        "roles": roles,
+        "channels": [],
+        "members": [],
+        "emojis": [],
+        "stickers": [],
+    }
+
+
+def member_payloads(start: int, count: int) -> list:
+    """Build a chunk of member payloads with a deterministic role mix"""
+    payloads = []
+    for index in range(start, start + count):
+        payloads.append(
+            {
+                "user": {
+                    "id": str(GUILD_ID + 10_000_000 + index),
+                    "username": f"member{index}",
+                    "global_name": f"Member {index}",
+                    "discriminator": "0",
+                    "avatar": None,
+                    "bot": index % 50 == 0,
+                },
+                "roles": [
+                    str(GUILD_ID + 1 + (index + offset) % ROLE_COUNT)
+                    for offset in range(index % 4)
+                ],
+                "joined_at": "2024-01-01T00:00:00+00:00",
+                "nick": None,
+                "deaf": False,
+                "mute": False,
+                "flags": 0,
+            }
+        )
+    return payloads
+
+
+def run_child(mode: str, member_count: int):
+    """Populate the synthetic guild in this process and print the results"""
+    sys.path.insert(0, str(ROOT))
+
+    import discord
+    from discord.ext import commands
+
+    from core.member_stats import GuildMemberStats
+
+    intents = discord.Intents.default()
+    intents.members = True
+    options = {}
+    if mode == "lean":
+        options["member_cache_flags"] = discord.MemberCacheFlags.none()
+        options["chunk_guilds_at_startup"] = False
+
+    bot = commands.Bot(command_prefix="!", intents=intents, **options)
+    state = bot._connection
+    guild = state._add_guild_from_data(guild_payload(member_count))
+    stats = GuildMemberStats()
+
+    gc.collect()
+    baseline = current_rss()
+    started = time.perf_counter()
+
+    for start in range(0, member_count, CHUNK_SIZE):
+        chunk = member_payloads(start, min(CHUNK_SIZE, member_count - start))
+        members = [
+            discord.Member(data=data, guild=guild, state=state) for data in chunk
+        ]
+        if mode == "full":
+            # What a completed chunk request does with every member
+            for member in members:
+                guild._add_member(member)
+        else:
+            # What MemberStats does while streaming guild.fetch_members
+            for member in members:
+                stats.add(member)
+        del members, chunk
+
+    elapsed = time.perf_counter() - started
+    gc.collect()
+
+    print(
+        json.dumps(
+            {
+                "mode": mode,
+                "members": member_count,
+                "cached": len(guild.members),
+                "rss_delta": current_rss() - baseline,
+                "seconds": elapsed,
+            }
+        )
+    )
+
+
+def run_mode(mode: str, member_count: int) -> dict:
+    """Run one mode in a fresh subprocess"""
+    output = subprocess.check_output(
+        [sys.executable, __file__, "--child", mode, str(member_count)],
+        cwd=str(ROOT),
+        stderr=subprocess.DEVNULL,
+        text=True,
+    )
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    """Run the memory benchmark for both cache modes"""
+    member_count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+
+    print(f"🧠 Member cache memory benchmark ({member_count:,} members)")
+    print("=" * 60)
+    print(f"{'mode':<8}{'cached':>10}{'RSS delta':>14}{'per member':>14}{'time':>10}")
+
+    for mode in ("full", "lean"):
+        result = run_mode(mode, member_count)
+        delta_mb = result["rss_delta"] / (1024 * 1024)
+        per_member = result["rss_delta"] / max(1, result["members"])
+        print(
+            f"{mode:<8}{result['cached']:>10,}{delta_mb:>11.1f} MB"
+            f"{per_member:>12.0f} B{result['seconds']:>9.2f}s"
+        )
+
+
+if __name__ == "__main__":
+    if "--child" in sys.argv:
+        index = sys.argv.index("--child")
+        run_child(sys.argv[index + 1], int(sys.argv[index + 2]))
+    else:
+        main()
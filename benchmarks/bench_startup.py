@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Startup benchmark for the Discord Utils Bot
+
+Starts the bot in fresh processes (without connecting to Discord) and
+reports how long imports, extension loading and the bootstrap take until
+commands are ready, and until a first command has been dispatched through
+the in-process fake Discord backend.
+
+Usage: python benchmarks/bench_startup.py [runs]
+"""
+
+import asyncio
+import json
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def run_child():
+    """Boot the bot once in this process and print its startup timings"""
+    started = time.perf_counter()
+    sys.path.insert(0, str(ROOT))
+    sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+    import main
+    from fake_discord import FakeDiscord
+
+    async def boot():
+        async with main.bot:
+            await main.bot.setup_hook()
+
+            fake = FakeDiscord(latency=0, rate_limits={}, global_limit=None)
+            fake.install(main.bot)
+            channel = fake.add_guild().text_channels[0]
+            message = fake.message(channel, fake.owner(channel.guild), "!help")
+            await main.bot.invoke(await main.bot.get_context(message))
+            # on_command is dispatched as a task
+            await asyncio.sleep(0)
+
+            main.loop_monitor.stop()
+            if main.auto_cleanup.is_running():
+                main.auto_cleanup.cancel()
+
+    asyncio.run(boot())
+
+    timings = main.startup.as_dict()
+    timings["process"] = time.perf_counter() - started
+    print(json.dumps(timings))
+
+
+def run_once():
+    """Run one cold start in a subprocess and return its timings"""
+    output = subprocess.check_output(
+        [sys.executable, __file__, "--child"],
+        cwd=str(ROOT),
+        stderr=subprocess.DEVNULL,
+        text=True,
+    )
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def summarize(samples):
+    """Collect every timing key across runs as lists of milliseconds"""
+    collected = {}
+    for sample in samples:
+        for group in ("phases", "milestones"):
+            for name, seconds in sample[group].items():
+                collected.setdefault(name, []).append(seconds * 1000)
+        collected.setdefault("process total", []).append(sample["process"] * 1000)
+    return collected
+
+
+def main():
+    """Run the startup benchmark"""
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+
+    print(f"🚀 Startup benchmark ({runs} cold starts)")
+    print("=" * 50)
+
+    samples = [run_once() for _ in range(runs)]
+
+    print(f"{'phase':<32}{'median':>9}{'min':>9}")
+    for name, values in summarize(samples).items():
+        print(f"{name:<32}{statistics.median(values):>7.1f}ms{min(values):>7.1f}ms")
+
+
+if __name__ == "__main__":
+    if "--child" in sys.argv:
+        run_child()
+    else:
+        main()
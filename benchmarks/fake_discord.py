@@ -0,0 +1,750 @@
+"""
+In-process stand-in for the Discord REST API used by the benchmarks
+
+The fake replaces ``bot.http.request``, so everything above it (history
+pagination, purge strategies, message and member parsing, command
+dispatch) is the real discord.py and bot code. Channels are stored as
+parallel arrays of message ids and author indexes and members are
+generated on demand, so guilds with millions of messages or members stay
+cheap to build.
+
+Webhooks created by the bot are served by the same backend: the fake
+installs itself as discord.py's webhook adapter, and attachment downloads
+come from files registered with the message that carries them.
+
+Latency and per-route rate limits are simulated. By default the fake runs
+on a virtual clock: requests only yield to the event loop and the time
+they would have taken is added up, which keeps long runs fast and the
+numbers reproducible. With ``realtime=True`` the fake really sleeps
+(scaled by ``time_scale``), which is what concurrent load tests need.
+"""
+
+import asyncio
+import bisect
+import json
+import random
+import time
+from array import array
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+import discord
+from discord.utils import DISCORD_EPOCH, snowflake_time
+from discord.webhook.async_ import AsyncWebhookAdapter, async_context
+
+FIRST_ID = 900_000_000_000_000_000
+MESSAGE_AUTHORS = 50
+
+# (requests, per seconds) for each route bucket, close to what Discord
+# reports in its rate limit headers. Buckets are kept per channel/guild.
+DEFAULT_RATE_LIMITS = {
+    "GET /channels/{channel_id}/messages": (5, 1.0),
+    "POST /channels/{channel_id}/messages": (5, 5.0),
+    "POST /channels/{channel_id}/messages/bulk-delete": (1, 1.0),
+    "DELETE /channels/{channel_id}/messages/{message_id}": (5, 1.0),
+    "PATCH /channels/{channel_id}": (2, 600.0),
+    "GET /guilds/{guild_id}/members": (10, 10.0),
+    "GET /guilds/{guild_id}": (5, 1.0),
+    "POST /webhooks/{webhook_id}/{webhook_token}": (5, 2.0),
+}
+DEFAULT_GLOBAL_LIMIT = (50, 1.0)
+
+
+class _FakeResponse:
+    """The bits of an aiohttp response that discord.HTTPException reads"""
+
+    def __init__(self, status: int, reason: str):
+        self.status = status
+        self.reason = reason
+
+
+def _not_found(code: int, message: str) -> discord.NotFound:
+    return discord.NotFound(
+        _FakeResponse(404, "Not Found"), {"code": code, "message": message}
+    )
+
+
+class _Bucket:
+    """Fixed window rate limit bucket that hands out future slots"""
+
+    __slots__ = ("limit", "per", "used", "reset_at")
+
+    def __init__(self, limit: int, per: float):
+        self.limit = limit
+        self.per = per
+        self.used = 0
+        self.reset_at = 0.0
+
+    def reserve(self, now: float) -> float:
+        """Take the next free slot and return how long to wait for it"""
+        if now >= self.reset_at:
+            windows = int((now - self.reset_at) // self.per) + 1
+            self.reset_at += windows * self.per
+            self.used = max(0, self.used - windows * self.limit)
+            if self.used == 0:
+                self.reset_at = now + self.per
+
+        window = self.used // self.limit
+        self.used += 1
+        if window == 0:
+            return 0.0
+        return self.reset_at + (window - 1) * self.per - now
+
+
+class ChannelLog:
+    """Messages of one channel, oldest first, with O(1) amortized deletes.
+
+    Deleted messages are skipped with two union-find style pointer arrays
+    (towards older and towards newer messages), so paging past large
+    deleted ranges does not rescan them.
+    """
+
+    def __init__(self, channel_id: int, author_count: int):
+        self.channel_id = channel_id
+        self.author_count = max(1, author_count)
+        self.ids = array("q")
+        self.authors = array("l")
+        self._older = array("q")
+        self._newer = array("q")
+        self.alive = 0
+
+    def __len__(self):
+        return len(self.ids)
+
+    def fill(self, count: int, span_days: float, rng: random.Random):
+        """Add ``count`` messages spread evenly over the last ``span_days``"""
+        now_ms = int(time.time() * 1000) - 1000
+        span_ms = int(span_days * 86_400_000)
+        start = len(self.ids)
+        last = self.ids[-1] if self.ids else 0
+        for index in range(count):
+            stamp = now_ms - span_ms + index * span_ms // max(1, count)
+            message_id = max(((stamp - DISCORD_EPOCH) << 22) | (index & 0x3FFFFF), last + 1)
+            self.ids.append(message_id)
+            last = message_id
+        self.authors.extend(rng.randrange(self.author_count) for _ in range(count))
+        self._older.extend(range(start, start + count))
+        self._newer.extend(range(start, start + count))
+        self.alive += count
+
+    def append(self, author: int) -> int:
+        """Add a message sent now and return its id"""
+        stamp = int(time.time() * 1000)
+        message_id = (stamp - DISCORD_EPOCH) << 22
+        if self.ids and message_id <= self.ids[-1]:
+            message_id = self.ids[-1] + 1
+        index = len(self.ids)
+        self.ids.append(message_id)
+        self.authors.append(author)
+        self._older.append(index)
+        self._newer.append(index)
+        self.alive += 1
+        return message_id
+
+    def _find(self, pointers: array, index: int, end: int) -> int:
+        root = index
+        while root != end and pointers[root] != root:
+            root = pointers[root]
+        while index != end and pointers[index] != index:
+            pointers[index], index = root, pointers[index]
+        return root
+
+    def older(self, index: int) -> int:
+        """Index of the newest live message at or before ``index``, or -1"""
+        return self._find(self._older, index, -1) if index >= 0 else -1
+
+    def newer(self, index: int) -> int:
+        """Index of the oldest live message at or after ``index``, or len"""
+        end = len(self.ids)
+        return self._find(self._newer, index, end) if index < end else end
+
+    def delete(self, message_id: int) -> bool:
+        """Delete a message by id; return False if it does not exist"""
+        index = bisect.bisect_left(self.ids, message_id)
+        if index >= len(self.ids) or self.ids[index] != message_id:
+            return False
+        if self._older[index] != index:
+            return False
+        self._older[index] = index - 1
+        self._newer[index] = index + 1
+        self.alive -= 1
+        return True
+
+    def page(
+        self, limit: int, before: Optional[int] = None, after: Optional[int] = None
+    ) -> List[int]:
+        """Return indexes of one history page, newest first like Discord"""
+        result = []
+        if after is not None and before is None:
+            index = self.newer(bisect.bisect_right(self.ids, after))
+            while index < len(self.ids) and len(result) < limit:
+                result.append(index)
+                index = self.newer(index + 1)
+            result.reverse()
+            return result
+
+        if before is None:
+            start = len(self.ids) - 1
+        else:
+            start = bisect.bisect_left(self.ids, before) - 1
+        index = self.older(start)
+        while index >= 0 and len(result) < limit:
+            if after is not None and self.ids[index] <= after:
+                break
+            result.append(index)
+            index = self.older(index - 1)
+        return result
+
+
+class FakeGuild:
+    """Payloads and message logs backing one synthetic guild"""
+
+    def __init__(self, guild_id: int, name: str, member_count: int, user_base: int):
+        self.id = guild_id
+        self.name = name
+        self.member_count = member_count
+        self.user_base = user_base
+        self.channels: Dict[int, dict] = {}
+        self.guild: Optional[discord.Guild] = None
+
+    def user_payload(self, index: int) -> dict:
+        return {
+            "id": str(self.user_base + index),
+            "username": f"member{index}",
+            "global_name": f"Member {index}",
+            "discriminator": "0",
+            "avatar": None,
+            "bot": index % 50 == 49,
+        }
+
+    def member_payload(self, index: int) -> dict:
+        return {
+            "user": self.user_payload(index),
+            "roles": [],
+            "joined_at": "2024-01-01T00:00:00+00:00",
+            "nick": None,
+            "deaf": False,
+            "mute": False,
+            "flags": 0,
+        }
+
+
+class _FakeWebhookAdapter(AsyncWebhookAdapter):
+    """Sends webhook requests to the fake instead of over aiohttp"""
+
+    def __init__(self, fake: "FakeDiscord"):
+        super().__init__()
+        self.fake = fake
+
+    async def request(
+        self,
+        route,
+        session=None,
+        *,
+        payload=None,
+        multipart=None,
+        files=None,
+        params=None,
+        **kwargs,
+    ):
+        return await self.fake.request(
+            route, json=payload, form=multipart, files=files, params=params
+        )
+
+
+class FakeStats:
+    """Counters for what the fake backend was asked to do"""
+
+    def __init__(self):
+        self.requests: Counter = Counter()
+        self.errors = 0
+        self.deleted = 0
+        self.rate_limited = 0
+        self.wait_seconds = 0.0
+        self.latency_seconds = 0.0
+        self.overhead = 0.0
+
+    @property
+    def total_requests(self) -> int:
+        return sum(self.requests.values())
+
+    def as_dict(self) -> dict:
+        return {
+            "requests": self.total_requests,
+            "errors": self.errors,
+            "deleted": self.deleted,
+            "rate_limited": self.rate_limited,
+            "wait_seconds": self.wait_seconds,
+            "latency_seconds": self.latency_seconds,
+            "overhead": self.overhead,
+        }
+
+
+class FakeDiscord:
+    """Simulated Discord REST backend for a single bot"""
+
+    def __init__(
+        self,
+        *,
+        latency: float = 0.05,
+        jitter: float = 0.0,
+        rate_limits: Optional[Dict[str, Tuple[int, float]]] = None,
+        global_limit: Optional[Tuple[int, float]] = DEFAULT_GLOBAL_LIMIT,
+        error_rate: float = 0.0,
+        realtime: bool = False,
+        time_scale: float = 1.0,
+        seed: int = 0,
+    ):
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_limits = DEFAULT_RATE_LIMITS if rate_limits is None else rate_limits
+        self.global_limit = global_limit
+        self.error_rate = error_rate
+        self.realtime = realtime
+        self.time_scale = time_scale
+        self.rng = random.Random(seed)
+        self.stats = FakeStats()
+
+        self.bot = None
+        self.guilds: Dict[int, FakeGuild] = {}
+        self.logs: Dict[int, ChannelLog] = {}
+        self.webhooks: Dict[int, dict] = {}
+        # Posts made through webhooks, with the name and text they were sent with
+        self.webhook_posts: Dict[int, List[Tuple[str, str]]] = {}
+        self.files: Dict[str, bytes] = {}
+        self._channel_guilds: Dict[int, FakeGuild] = {}
+        self._buckets: Dict[str, _Bucket] = {}
+        self._global = _Bucket(*global_limit) if global_limit else None
+        self._virtual = 0.0
+        self._started = time.perf_counter()
+        self._next_id = FIRST_ID
+        self._user_payload = None
+
+    # --- Setup
+
+    def _allocate(self, count: int = 1) -> int:
+        first = self._next_id
+        self._next_id += count
+        return first
+
+    def install(self, bot):
+        """Route the bot's REST calls to this backend and log it in"""
+        self.bot = bot
+        bot.http.request = self.request
+        bot.http.get_from_cdn = self.get_from_cdn
+        # Tasks started from here on (commands included) inherit the adapter
+        async_context.set(_FakeWebhookAdapter(self))
+
+        state = bot._connection
+        self._user_payload = {
+            "id": str(self._allocate()),
+            "username": "Utils Bot",
+            "global_name": None,
+            "discriminator": "0",
+            "avatar": None,
+            "bot": True,
+            "verified": True,
+            "mfa_enabled": False,
+            "flags": 0,
+        }
+        state.user = discord.ClientUser(state=state, data=self._user_payload)
+        return self
+
+    def add_guild(
+        self,
+        name: str = "Benchmark Guild",
+        *,
+        channels: int = 1,
+        members: int = 10,
+        messages: int = 0,
+        span_days: float = 30.0,
+        cache_members: bool = True,
+    ) -> discord.Guild:
+        """Create a guild in the bot's cache backed by this fake.
+
+        Member 0 owns the guild. With ``cache_members`` every member is
+        added to the cache so the guild counts as chunked; otherwise only
+        the owner and the bot are cached, like in lean cache mode.
+        """
+        state = self.bot._connection
+        members = max(1, members)
+        fake = FakeGuild(self._allocate(), name, members, self._allocate(members))
+        self.guilds[fake.id] = fake
+
+        channel_payloads = []
+        for position in range(channels):
+            channel_id = self._allocate()
+            payload = {
+                "id": str(channel_id),
+                "type": 0,
+                "guild_id": str(fake.id),
+                "name": f"channel-{position}",
+                "position": position,
+                "parent_id": None,
+                "topic": None,
+                "nsfw": False,
+                "rate_limit_per_user": 0,
+                "permission_overwrites": [],
+            }
+            fake.channels[channel_id] = payload
+            channel_payloads.append(payload)
+            self._channel_guilds[channel_id] = fake
+            self.logs[channel_id] = ChannelLog(channel_id, min(members, MESSAGE_AUTHORS))
+
+        guild = state._add_guild_from_data(
+            {**self._guild_payload(fake), "channels": channel_payloads}
+        )
+        fake.guild = guild
+
+        guild._add_member(
+            discord.Member(
+                data={**fake.member_payload(0), "user": self._user_payload},
+                guild=guild,
+                state=state,
+            )
+        )
+        cached = members if cache_members else 1
+        for index in range(cached):
+            guild._add_member(
+                discord.Member(data=fake.member_payload(index), guild=guild, state=state)
+            )
+
+        if messages:
+            per_channel, extra = divmod(messages, channels)
+            for position, channel_id in enumerate(fake.channels):
+                count = per_channel + (1 if position < extra else 0)
+                self.logs[channel_id].fill(count, span_days, self.rng)
+        return guild
+
+    def _guild_payload(self, fake: FakeGuild) -> dict:
+        return {
+            "id": str(fake.id),
+            "name": fake.name,
+            "owner_id": str(fake.user_base),
+            "member_count": fake.member_count + 1,
+            "approximate_member_count": fake.member_count + 1,
+            "approximate_presence_count": fake.member_count // 4,
+            "large": fake.member_count > 250,
+            "roles": [
+                {
+                    "id": str(fake.id),
+                    "name": "@everyone",
+                    "permissions": "0",
+                    "position": 0,
+                    "color": 0,
+                    "hoist": False,
+                    "managed": False,
+                    "mentionable": False,
+                }
+            ],
+            "channels": [],
+            "members": [],
+            "emojis": [],
+            "stickers": [],
+            "features": [],
+        }
+
+    def owner(self, guild: discord.Guild) -> discord.Member:
+        """Return the owner of a fake guild, who passes every permission check"""
+        return guild.get_member(self.guilds[guild.id].user_base)
+
+    def message(
+        self,
+        channel,
+        author: discord.Member,
+        content: str,
+        attachments: Optional[Dict[str, bytes]] = None,
+    ) -> discord.Message:
+        """Post a message to a channel as a user and return it, as if from the gateway.
+
+        ``attachments`` maps file names to their contents, which the bot can
+        then download from the attachment URLs.
+        """
+        log = self.logs[channel.id]
+        fake = self._channel_guilds[channel.id]
+        message_id = log.append(author.id - fake.user_base)
+        payload = self._message_payload(log, len(log) - 1)
+        payload["id"] = str(message_id)
+        payload["content"] = content
+        payload["author"] = fake.user_payload(author.id - fake.user_base)
+        for filename, data in (attachments or {}).items():
+            attachment_id = self._allocate()
+            url = f"https://cdn.invalid/attachments/{attachment_id}/{filename}"
+            self.files[url] = data
+            payload["attachments"].append(
+                {
+                    "id": str(attachment_id),
+                    "filename": filename,
+                    "size": len(data),
+                    "url": url,
+                    "proxy_url": url,
+                }
+            )
+        return self.bot._connection.create_message(channel=channel, data=payload)
+
+    # --- Clock
+
+    def now(self) -> float:
+        """Current time on the simulated clock, in seconds"""
+        if self.realtime:
+            return (time.perf_counter() - self._started) / self.time_scale
+        return self._virtual
+
+    async def _advance(self, seconds: float):
+        if self.realtime:
+            await asyncio.sleep(seconds * self.time_scale)
+        else:
+            self._virtual += seconds
+            await asyncio.sleep(0)
+
+    def _rate_limit_wait(self, route, key: str) -> float:
+        limit = self.rate_limits.get(key)
+        wait = 0.0
+        now = self.now()
+        if limit is not None:
+            bucket_key = f"{route.key}:{route.major_parameters}"
+            bucket = self._buckets.get(bucket_key)
+            if bucket is None:
+                bucket = self._buckets[bucket_key] = _Bucket(*limit)
+            wait = bucket.reserve(now)
+        if self._global is not None:
+            wait = max(wait, self._global.reserve(now))
+        return wait
+
+    # --- Requests
+
+    async def request(self, route, **kwargs):
+        """Handle one REST call the way Discord would, after simulated delays"""
+        key = f"{route.method} {route.path}"
+        self.stats.requests[key] += 1
+
+        wait = self._rate_limit_wait(route, key)
+        if wait > 0:
+            self.stats.rate_limited += 1
+            self.stats.wait_seconds += wait
+            await self._advance(wait)
+
+        latency = self.latency
+        if self.jitter:
+            latency += self.rng.uniform(-self.jitter, self.jitter)
+        latency = max(0.0, latency)
+        self.stats.latency_seconds += latency
+        await self._advance(latency)
+
+        if self.error_rate and self.rng.random() < self.error_rate:
+            self.stats.errors += 1
+            raise discord.HTTPException(
+                _FakeResponse(500, "Internal Server Error"),
+                {"code": 0, "message": "Simulated failure"},
+            )
+
+        handler = self._routes.get(key)
+        if handler is None:
+            self.stats.errors += 1
+            raise _not_found(0, f"{key} is not simulated")
+
+        started = time.perf_counter()
+        try:
+            return handler(self, route, **kwargs)
+        finally:
+            self.stats.overhead += time.perf_counter() - started
+
+    async def get_from_cdn(self, url: str) -> bytes:
+        """Download an attachment registered by ``message``"""
+        self.stats.requests["GET cdn"] += 1
+        await self._advance(self.latency)
+        data = self.files.get(url)
+        if data is None:
+            raise _not_found(0, "asset not found")
+        return data
+
+    def _log(self, route) -> ChannelLog:
+        log = self.logs.get(int(route.channel_id))
+        if log is None:
+            raise _not_found(10003, "Unknown Channel")
+        return log
+
+    def _author_payload(self, log: ChannelLog, author: int) -> dict:
+        if author < 0:
+            return self._user_payload
+        return self._channel_guilds[log.channel_id].user_payload(author)
+
+    def _message_payload(self, log: ChannelLog, index: int) -> dict:
+        message_id = log.ids[index]
+        return {
+            "id": str(message_id),
+            "channel_id": str(log.channel_id),
+            "author": self._author_payload(log, log.authors[index]),
+            "content": f"Synthetic message {index}",
+            "timestamp": snowflake_time(message_id).isoformat(),
+            "edited_timestamp": None,
+            "tts": False,
+            "mention_everyone": False,
+            "mentions": [],
+            "mention_roles": [],
+            "attachments": [],
+            "embeds": [],
+            "pinned": False,
+            "type": 0,
+            "flags": 0,
+        }
+
+    def _get_messages(self, route, params=None, **kwargs):
+        log = self._log(route)
+        params = params or {}
+        before = params.get("before")
+        after = params.get("after")
+        indexes = log.page(
+            min(100, int(params.get("limit", 50))),
+            before=int(before) if before is not None else None,
+            after=int(after) if after is not None else None,
+        )
+        return [self._message_payload(log, index) for index in indexes]
+
+    def _post_message(self, route, json=None, form=None, files=None, **kwargs):
+        log = self._log(route)
+        if json is None and form:
+            # Multipart uploads carry the message in the payload_json part
+            json = _payload_from_form(form)
+        message_id = log.append(-1)
+        payload = self._message_payload(log, len(log) - 1)
+        payload["id"] = str(message_id)
+        payload["content"] = (json or {}).get("content") or ""
+        payload["embeds"] = (json or {}).get("embeds") or []
+        payload["attachments"] = [
+            {
+                "id": str(self._allocate()),
+                "filename": file.filename,
+                "size": 0,
+                "url": f"https://cdn.invalid/{file.filename}",
+                "proxy_url": f"https://cdn.invalid/{file.filename}",
+            }
+            for file in files or ()
+        ]
+        return payload
+
+    def _bulk_delete(self, route, json=None, **kwargs):
+        log = self._log(route)
+        for message_id in json["messages"]:
+            self.stats.deleted += log.delete(int(message_id))
+
+    def _delete_message(self, route, **kwargs):
+        message_id = int(route.url.rsplit("/", 1)[1])
+        if not self._log(route).delete(message_id):
+            raise _not_found(10008, "Unknown Message")
+        self.stats.deleted += 1
+
+    def _edit_message(self, route, json=None, **kwargs):
+        log = self._log(route)
+        message_id = int(route.url.rsplit("/", 1)[1])
+        index = bisect.bisect_left(log.ids, message_id)
+        if index >= len(log.ids) or log.ids[index] != message_id:
+            raise _not_found(10008, "Unknown Message")
+        payload = self._message_payload(log, index)
+        payload["content"] = (json or {}).get("content") or ""
+        payload["embeds"] = (json or {}).get("embeds") or []
+        return payload
+
+    def _edit_channel(self, route, json=None, **kwargs):
+        channel_id = int(route.channel_id)
+        fake = self._channel_guilds.get(channel_id)
+        if fake is None:
+            raise _not_found(10003, "Unknown Channel")
+        fake.channels[channel_id].update(json or {})
+        return fake.channels[channel_id]
+
+    def _get_webhooks(self, route, **kwargs):
+        self._log(route)
+        channel_id = int(route.channel_id)
+        return [
+            webhook
+            for webhook in self.webhooks.values()
+            if webhook["channel_id"] == str(channel_id)
+        ]
+
+    def _create_webhook(self, route, json=None, **kwargs):
+        channel_id = int(route.channel_id)
+        self._log(route)
+        webhook_id = self._allocate()
+        webhook = {
+            "id": str(webhook_id),
+            "type": 1,
+            "name": (json or {}).get("name"),
+            "avatar": None,
+            "token": f"token-{webhook_id}",
+            "channel_id": str(channel_id),
+            "guild_id": str(self._channel_guilds[channel_id].id),
+            "application_id": None,
+            "user": self._user_payload,
+        }
+        self.webhooks[webhook_id] = webhook
+        return webhook
+
+    def _webhook(self, route) -> dict:
+        webhook = self.webhooks.get(int(route.webhook_id))
+        if webhook is None or route.webhook_token not in (None, webhook["token"]):
+            raise _not_found(10015, "Unknown Webhook")
+        return webhook
+
+    def _execute_webhook(self, route, json=None, form=None, params=None, **kwargs):
+        webhook = self._webhook(route)
+        if json is None and form:
+            json = _payload_from_form(form)
+        json = json or {}
+        channel_id = int(webhook["channel_id"])
+        log = self.logs[channel_id]
+        message_id = log.append(-1)
+        self.webhook_posts.setdefault(channel_id, []).append(
+            (json.get("username") or webhook["name"], json.get("content") or "")
+        )
+        if not (params or {}).get("wait"):
+            return None
+        payload = self._message_payload(log, len(log) - 1)
+        payload["id"] = str(message_id)
+        payload["content"] = json.get("content") or ""
+        payload["webhook_id"] = webhook["id"]
+        return payload
+
+    def _delete_webhook(self, route, **kwargs):
+        self._webhook(route)
+        del self.webhooks[int(route.webhook_id)]
+
+    def _get_members(self, route, params=None, **kwargs):
+        fake = self.guilds.get(int(route.guild_id))
+        if fake is None:
+            raise _not_found(10004, "Unknown Guild")
+        params = params or {}
+        start = 0
+        if params.get("after"):
+            start = max(0, int(params["after"]) - fake.user_base + 1)
+        end = min(fake.member_count, start + min(1000, int(params.get("limit", 1))))
+        return [fake.member_payload(index) for index in range(start, end)]
+
+    def _get_guild(self, route, **kwargs):
+        fake = self.guilds.get(int(route.guild_id))
+        if fake is None:
+            raise _not_found(10004, "Unknown Guild")
+        return {**self._guild_payload(fake), "channels": list(fake.channels.values())}
+
+    _routes = {
+        "GET /channels/{channel_id}/messages": _get_messages,
+        "POST /channels/{channel_id}/messages": _post_message,
+        "POST /channels/{channel_id}/messages/bulk-delete": _bulk_delete,
+        "DELETE /channels/{channel_id}/messages/{message_id}": _delete_message,
+        "PATCH /channels/{channel_id}/messages/{message_id}": _edit_message,
+        "PATCH /channels/{channel_id}": _edit_channel,
+        "GET /guilds/{guild_id}/members": _get_members,
+        "GET /guilds/{guild_id}": _get_guild,
+        "GET /channels/{channel_id}/webhooks": _get_webhooks,
+        "POST /channels/{channel_id}/webhooks": _create_webhook,
+        "POST /webhooks/{webhook_id}/{webhook_token}": _execute_webhook,
+        "DELETE /webhooks/{webhook_id}": _delete_webhook,
+        "DELETE /webhooks/{webhook_id}/{webhook_token}": _delete_webhook,
+    }
+
+
+def _payload_from_form(form) -> dict:
+    for part in form:
+        if part.get("name") == "payload_json":
+            return json.loads(part["value"])
+    return {}
@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+"""
+Multi-guild load test for the Discord Utils Bot
+
+Creates many synthetic guilds on the in-process fake Discord backend and
+fires command messages at the bot through the real gateway path
+(``on_message`` -> ``process_commands`` -> checks -> command), so every
+listener, hook and error handler runs as it would in production. The fake
+sleeps for real (scaled by --time-scale), so rate limit buckets, purge
+pauses and event loop contention all show up in the results.
+
+Arrivals are open loop: commands are scheduled at --rate per second
+(Poisson, seeded), and latency is measured from the scheduled time, so a
+saturated bot shows growing latency instead of silently sending less.
+--concurrency caps how many commands are in flight. With --rate 0 the
+test runs closed loop with --concurrency workers instead.
+
+Pass several rates to step the load up and find the saturation point:
+
+  python benchmarks/load_test.py --guilds 1000 --rate 25,50,100,200 --duration 20
+"""
+
+import argparse
+import asyncio
+import logging
+import random
+import sys
+import time
+from collections import Counter, defaultdict
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from fake_discord import FakeDiscord  # noqa: E402
+
+DEFAULT_MIX = "stats=2,channelstats=1,clear=1"
+COMMANDS = {
+    "stats": "!stats",
+    "channelstats": "!channelstats",
+    "clear": "!clear 5",
+}
+
+
+def parse_mix(text):
+    """Parse ``name=weight,...`` into parallel name and weight lists"""
+    names, weights = [], []
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        if name not in COMMANDS:
+            raise SystemExit(f"Unknown command {name!r}, choose from {', '.join(COMMANDS)}")
+        names.append(name)
+        weights.append(float(weight or 1))
+    return names, weights
+
+
+def percentile(samples, q):
+    if not samples:
+        return None
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(q / 100 * len(samples)))]
+
+
+def format_ms(seconds):
+    return "-" if seconds is None else f"{seconds * 1000:.0f}"
+
+
+class LoadTest:
+    """Drives synthetic command traffic and collects per-command outcomes"""
+
+    def __init__(self, bot, fake, guilds, args):
+        self.bot = bot
+        self.fake = fake
+        self.channels = [guild.text_channels[0] for guild in guilds]
+        self.args = args
+        self.rng = random.Random(args.seed)
+        self.names, self.weights = parse_mix(args.mix)
+        self.pending = {}
+        self.results = []
+
+        bot.add_listener(self.on_command_completion)
+        bot.add_listener(self.on_command_error)
+
+    async def on_command_completion(self, ctx):
+        self._finish(ctx, "ok")
+
+    async def on_command_error(self, ctx, error):
+        self._finish(ctx, type(getattr(error, "original", error)).__name__)
+
+    def _finish(self, ctx, outcome):
+        # Message ids are only unique per channel in the fake
+        key = (ctx.channel.id, ctx.message.id)
+        future = self.pending.pop(key, None)
+        if future is not None and not future.done():
+            future.set_result(outcome)
+
+    async def send_one(self, scheduled):
+        """Dispatch one command message and wait for its outcome"""
+        name = self.rng.choices(self.names, self.weights)[0]
+        channel = self.rng.choice(self.channels)
+        message = self.fake.message(
+            channel, self.fake.owner(channel.guild), COMMANDS[name]
+        )
+        key = (channel.id, message.id)
+        future = asyncio.get_running_loop().create_future()
+        self.pending[key] = future
+
+        self.bot.dispatch("message", message)
+        try:
+            outcome = await asyncio.wait_for(future, self.args.timeout)
+        except asyncio.TimeoutError:
+            self.pending.pop(key, None)
+            outcome = "timeout"
+        self.results.append((name, outcome, time.perf_counter() - scheduled))
+
+    async def open_loop(self, rate, duration):
+        limit = asyncio.Semaphore(self.args.concurrency)
+        tasks = []
+        start = time.perf_counter()
+        scheduled = start
+        while True:
+            scheduled += self.rng.expovariate(rate)
+            if scheduled - start >= duration:
+                break
+            await asyncio.sleep(max(0.0, scheduled - time.perf_counter()))
+            await limit.acquire()
+            task = asyncio.create_task(self.send_one(scheduled))
+            task.add_done_callback(lambda _: limit.release())
+            tasks.append(task)
+        await asyncio.gather(*tasks)
+
+    async def closed_loop(self, duration):
+        deadline = time.perf_counter() + duration
+
+        async def worker():
+            while time.perf_counter() < deadline:
+                await self.send_one(time.perf_counter())
+
+        await asyncio.gather(*(worker() for _ in range(self.args.concurrency)))
+
+    async def step(self, rate):
+        """Run one load step and return its summary"""
+        from core.loop_monitor import LOOP_LAG, LoopMonitor
+        from core.metrics import MetricsRegistry
+
+        self.results = []
+        requests_before = self.fake.stats.total_requests
+        waits_before = self.fake.stats.rate_limited
+
+        lag_metrics = MetricsRegistry()
+        monitor = LoopMonitor(lag_metrics, interval=0.05, warn_threshold=3600)
+        monitor.start()
+        started = time.perf_counter()
+        if rate > 0:
+            await self.open_loop(rate, self.args.duration)
+        else:
+            await self.closed_loop(self.args.duration)
+        elapsed = time.perf_counter() - started
+        monitor.stop()
+
+        lag = lag_metrics.histograms(LOOP_LAG).get(())
+        latencies = [latency for _, outcome, latency in self.results if outcome == "ok"]
+        outcomes = Counter(outcome for _, outcome, _ in self.results)
+        return {
+            "rate": rate,
+            "sent": len(self.results),
+            "ok": outcomes["ok"],
+            "outcomes": outcomes,
+            "throughput": outcomes["ok"] / elapsed,
+            "p50": percentile(latencies, 50),
+            "p95": percentile(latencies, 95),
+            "p99": percentile(latencies, 99),
+            "max": max(latencies) if latencies else None,
+            "lag_p99": lag.percentiles(99)[0] if lag and lag.count else None,
+            "requests": self.fake.stats.total_requests - requests_before,
+            "waits": self.fake.stats.rate_limited - waits_before,
+            "results": self.results,
+        }
+
+
+def print_step(result):
+    errors = result["sent"] - result["ok"]
+    error_rate = errors / result["sent"] * 100 if result["sent"] else 0.0
+    print(
+        f"{(result['rate'] or 'closed'):>7}{result['sent']:>7}"
+        f"{result['throughput']:>9.1f}{error_rate:>7.1f}%"
+        f"{format_ms(result['p50']):>8}{format_ms(result['p95']):>8}"
+        f"{format_ms(result['p99']):>8}{format_ms(result['max']):>8}"
+        f"{format_ms(result['lag_p99']):>9}{result['requests']:>9}{result['waits']:>8}"
+    )
+
+
+def print_breakdown(steps):
+    """Print latency and outcomes per command across all steps"""
+    latencies = defaultdict(list)
+    outcomes = defaultdict(Counter)
+    for step in steps:
+        for name, outcome, latency in step["results"]:
+            outcomes[name][outcome] += 1
+            if outcome == "ok":
+                latencies[name].append(latency)
+
+    print()
+    print(f"{'command':<14}{'sent':>7}{'ok':>7}{'p50':>8}{'p99':>8}  failures")
+    for name in sorted(outcomes):
+        counts = outcomes[name]
+        failures = ", ".join(
+            f"{outcome} x{count}" for outcome, count in counts.items() if outcome != "ok"
+        )
+        print(
+            f"{name:<14}{sum(counts.values()):>7}{counts['ok']:>7}"
+            f"{format_ms(percentile(latencies[name], 50)):>8}"
+            f"{format_ms(percentile(latencies[name], 99)):>8}  {failures or '-'}"
+        )
+
+
+async def run(args):
+    import main
+
+    # Failures are counted per command below instead of logged one by one
+    logging.getLogger().setLevel(logging.CRITICAL)
+    fake = FakeDiscord(
+        latency=args.latency_ms / 1000,
+        jitter=args.jitter_ms / 1000,
+        rate_limits={} if args.no_rate_limits else None,
+        global_limit=None if args.no_rate_limits else (50, 1.0),
+        error_rate=args.error_rate,
+        realtime=True,
+        time_scale=args.time_scale,
+        seed=args.seed,
+    )
+
+    # Entering the client binds it to this loop without logging in
+    async with main.bot:
+        fake.install(main.bot)
+        for name in main.EXTENSIONS:
+            await main.bot.load_extension(name)
+
+        build_started = time.perf_counter()
+        guilds = [
+            fake.add_guild(
+                f"Load Guild {index}", members=args.members, messages=args.messages
+            )
+            for index in range(args.guilds)
+        ]
+        print(
+            f"🏋️ Load test: {args.guilds:,} guilds, mix {args.mix}, "
+            f"{args.latency_ms:g} ms latency, rate limits "
+            f"{'off' if args.no_rate_limits else 'on'} "
+            f"(built in {time.perf_counter() - build_started:.1f}s)"
+        )
+        print("=" * 81)
+        print(
+            f"{'rate/s':>7}{'sent':>7}{'ok/s':>9}{'errors':>8}{'p50':>8}{'p95':>8}"
+            f"{'p99':>8}{'max':>8}{'loop p99':>9}{'REST':>9}{'waits':>8}"
+        )
+
+        test = LoadTest(main.bot, fake, guilds, args)
+        steps = []
+        for rate in args.rate:
+            result = await test.step(rate)
+            print_step(result)
+            steps.append(result)
+        print_breakdown(steps)
+        print("\nLatencies in ms, measured from each command's scheduled send time")
+
+        for task in asyncio.all_tasks():
+            if task is not asyncio.current_task():
+                task.cancel()
+
+
+def main():
+    """Run the load test"""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--guilds", type=int, default=1000)
+    parser.add_argument("--members", type=int, default=50)
+    parser.add_argument("--messages", type=int, default=300, help="per guild")
+    parser.add_argument(
+        "--rate",
+        type=lambda text: [float(rate) for rate in text.split(",")],
+        default=[50.0],
+        help="commands per second, comma separated for a stepped test; 0 = closed loop",
+    )
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per step")
+    parser.add_argument("--concurrency", type=int, default=500)
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--mix", default=DEFAULT_MIX)
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--jitter-ms", type=float, default=20.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--no-rate-limits", action="store_true")
+    parser.add_argument(
+        "--time-scale",
+        type=float,
+        default=1.0,
+        help="multiplier for simulated latency and rate limit waits",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,60 @@
 import discord
 from discord.ext import commands
 import asyncio
+import json
+import os
 from datetime import datetime, timezone
 
+from core.backup_replay import BACKUP_VERSION
+from core.permissions import requires_permissions
+
+# Channel edits in flight at once during bulk slowmode changes
+BULK_EDIT_CONCURRENCY = 5
+
+
+def write_text(path, content):
+    """Write a text file; run in an executor to keep the event loop free"""
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(content)
+
+
+def format_delay(seconds: int) -> str:
+    minutes, secs = divmod(seconds, 60)
+    hours, minutes = divmod(minutes, 60)
+
+    time_str = ""
+    if hours:
+        time_str += f"{hours}h "
+    if minutes:
+        time_str += f"{minutes}m "
+    if secs:
+        time_str += f"{secs}s"
+    return time_str.strip()
+
+
+def summarize_slowmode(headline: str, unchanged: int, failed) -> str:
+    lines = [headline]
+    if unchanged:
+        lines.append(f"{unchanged} channels already had that slowmode.")
+    if failed:
+        names = ", ".join(channel.mention for channel, _ in failed[:10])
+        more = f" and {len(failed) - 10} more" if len(failed) > 10 else ""
+        lines.append(f"❌ Could not change {len(failed)} channels: {names}{more}")
+    return "\n".join(lines)
+
 
 class AdvancedUtils(commands.Cog):
     """Advanced utility commands for Discord server management"""
 
     def __init__(self, bot):
         self.bot = bot
+        # Shared by every bulk slowmode change, so several at once still
+        # only keep a few channel edits in flight
+        self._edit_budget = asyncio.Semaphore(BULK_EDIT_CONCURRENCY)
 
-    @commands.command(name="backup")
-    @commands.has_permissions(administrator=True)
+    @requires_permissions(administrator=True)
+    @commands.hybrid_command(name="backup", extras={"defer": True})
+    @commands.guild_only()
     async def backup_channel(
         self, ctx, channel: discord.TextChannel = None, limit: int = 1000
     ):
@@ -19,6 +62,12 @@ class AdvancedUtils(commands.Cog):
         if channel is None:
             channel = ctx.channel
 
+        if not self.bot.intents.message_content:
+            await ctx.send(
+                "❌ Backups need the message content intent, which is disabled."
+            )
+            return
+
         if limit > 5000:
             await ctx.send(
                 "❌ Limit cannot exceed 5000 messages for performance reasons."
@@ -29,68 +78,95 @@ class AdvancedUtils(commands.Cog):
             f"🔄 Creating backup of {channel.mention}... This may take a while."
         )
 
-        messages = []
-        try:
-            async for message in channel.history(limit=limit):
-                messages.append(
-                    {
-                        "author": str(message.author),
-                        "content": message.content,
-                        "timestamp": message.created_at.isoformat(),
-                        "attachments": [att.url for att in message.attachments],
-                        "embeds": len(message.embeds),
-                    }
+        with self.bot.audit.job("backup", ctx, channel=channel, requested=limit) as job:
+            messages = []
+            try:
+                async for message in channel.history(limit=limit):
+                    messages.append(
+                        {
+                            "id": message.id,
+                            "author_id": message.author.id,
+                            "author": str(message.author),
+                            # Name and avatar as shown, for !restore
+                            "name": message.author.display_name,
+                            "avatar": message.author.display_avatar.url,
+                            "content": message.content,
+                            "timestamp": message.created_at.isoformat(),
+                            "attachments": [att.url for att in message.attachments],
+                            "embeds": len(message.embeds),
+                        }
+                    )
+            except discord.Forbidden:
+                job.status = "Forbidden"
+                await ctx.send(
+                    "❌ I don't have permission to read message history in that channel."
                 )
-        except discord.Forbidden:
-            await ctx.send(
-                "❌ I don't have permission to read message history in that channel."
+                return
+
+            # JSON Lines, oldest message first, so !restore can stream it back
+            header = {
+                "backup": BACKUP_VERSION,
+                "channel": channel.name,
+                "channel_id": channel.id,
+                "guild_id": channel.guild.id,
+                "generated": datetime.now(timezone.utc).isoformat(),
+                "messages": len(messages),
+            }
+            lines = [json.dumps(header, ensure_ascii=False)]
+            lines.extend(
+                json.dumps(msg, ensure_ascii=False) for msg in reversed(messages)
             )
-            return
-
-        backup_content = f"Channel Backup: #{channel.name}\n"
-        backup_content += f"Generated: {datetime.now(timezone.utc).isoformat()}\n"
-        backup_content += f"Total Messages: {len(messages)}\n"
-        backup_content += "=" * 50 + "\n\n"
+            backup_content = "\n".join(lines) + "\n"
 
-        for msg in reversed(messages):
-            backup_content += (
-                f"[{msg['timestamp']}] {msg['author']}: {msg['content']}\n"
+            filename = (
+                f"backup_{channel.name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jsonl"
             )
-            if msg["attachments"]:
-                backup_content += f"  Attachments: {', '.join(msg['attachments'])}\n"
-            backup_content += "\n"
-
-        filename = (
-            f"backup_{channel.name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt"
-        )
-
-        try:
-            with open(filename, "w", encoding="utf-8") as f:
-                f.write(backup_content)
+            job.update(messages=len(messages), bytes=len(backup_content))
 
-            await ctx.send(
-                f"✅ Backup created successfully! {len(messages)} messages backed up.",
-                file=discord.File(filename),
-            )
+            try:
+                loop = asyncio.get_running_loop()
+                await loop.run_in_executor(None, write_text, filename, backup_content)
 
-            import os
+                await ctx.send(
+                    f"✅ Backup created successfully! {len(messages)} messages backed up.",
+                    file=discord.File(filename),
+                )
 
-            os.remove(filename)
+                await loop.run_in_executor(None, os.remove, filename)
 
-        except Exception as e:
-            await ctx.send(f"❌ Error creating backup: {e}")
+            except Exception as e:
+                job.status = type(e).__name__
+                await ctx.send(f"❌ Error creating backup: {e}")
 
-    @commands.command(name="membercount")
+    @commands.command(name="membercount", extras={"category": "Statistics"})
     async def member_count(self, ctx):
         """Get detailed member count breakdown"""
         guild = ctx.guild
 
-        online = len([m for m in guild.members if m.status == discord.Status.online])
-        idle = len([m for m in guild.members if m.status == discord.Status.idle])
-        dnd = len([m for m in guild.members if m.status == discord.Status.dnd])
-        offline = len([m for m in guild.members if m.status == discord.Status.offline])
+        if guild.chunked:
+            online = len(
+                [m for m in guild.members if m.status == discord.Status.online]
+            )
+            idle = len([m for m in guild.members if m.status == discord.Status.idle])
+            dnd = len([m for m in guild.members if m.status == discord.Status.dnd])
+            offline = len(
+                [m for m in guild.members if m.status == discord.Status.offline]
+            )
+            status_text = (
+                f"Online: {online}\nIdle: {idle}\nDND: {dnd}\nOffline: {offline}"
+            )
+            bots = len([m for m in guild.members if m.bot])
+        else:
+            # Lean cache mode: use the precomputed aggregates
+            member_stats = self.bot.member_stats
+            bots = (await member_stats.ensure(guild)).bots
+            active = await member_stats.online_count(self.bot, guild)
+            status_text = (
+                f"Active: {active}\nOffline: {guild.member_count - active}"
+                if active is not None
+                else "Unavailable"
+            )
 
-        bots = len([m for m in guild.members if m.bot])
         humans = guild.member_count - bots
 
         embed = discord.Embed(
@@ -109,13 +185,13 @@ class AdvancedUtils(commands.Cog):
 
         embed.add_field(
             name="🟢 Status Breakdown",
-            value=f"Online: {online}\nIdle: {idle}\nDND: {dnd}\nOffline: {offline}",
+            value=status_text,
             inline=True,
         )
 
         await ctx.send(embed=embed)
 
-    @commands.command(name="roleinfo")
+    @commands.command(name="roleinfo", extras={"category": "Statistics"})
     async def role_info(self, ctx, *, role_name: str):
         """Get information about a specific role"""
         role = discord.utils.get(ctx.guild.roles, name=role_name)
@@ -124,6 +200,15 @@ class AdvancedUtils(commands.Cog):
             await ctx.send(f"❌ Role '{role_name}' not found.")
             return
 
+        if ctx.guild.chunked:
+            member_count = len(role.members)
+            member_names = [member.display_name for member in role.members]
+        else:
+            # Lean cache mode: role.members only contains cached members
+            stats = await self.bot.member_stats.ensure(ctx.guild, roles=True)
+            member_count = stats.role_counts.get(role.id, 0)
+            member_names = stats.role_samples.get(role.id, [])
+
         embed = discord.Embed(
             title=f"🎭 Role Information: {role.name}",
             color=(
@@ -133,7 +218,7 @@ class AdvancedUtils(commands.Cog):
             ),
         )
 
-        embed.add_field(name="👥 Members", value=str(len(role.members)), inline=True)
+        embed.add_field(name="👥 Members", value=str(member_count), inline=True)
 
         embed.add_field(
             name="📅 Created", value=role.created_at.strftime("%B %d, %Y"), inline=True
@@ -161,8 +246,8 @@ class AdvancedUtils(commands.Cog):
             inline=True,
         )
 
-        if len(role.members) <= 10:
-            member_list = "\n".join([member.display_name for member in role.members])
+        if member_count <= 10:
+            member_list = "\n".join(member_names)
             embed.add_field(
                 name="👤 Members",
                 value=member_list if member_list else "None",
@@ -171,39 +256,138 @@ class AdvancedUtils(commands.Cog):
 
         await ctx.send(embed=embed)
 
-    @commands.command(name="slowmode")
-    @commands.has_permissions(manage_channels=True)
-    async def set_slowmode(self, ctx, seconds: int = 0):
-        """Set slowmode for the current channel"""
+    @requires_permissions(manage_channels=True)
+    @commands.group(name="slowmode", invoke_without_command=True)
+    async def set_slowmode(self, ctx, seconds: int = 0, *, scope: str = None):
+        """Set slowmode here, in a category (--category X) or everywhere (--all)"""
         if seconds < 0 or seconds > 21600:  # Max 6 hours
             await ctx.send("❌ Slowmode must be between 0 and 21600 seconds (6 hours).")
             return
 
+        if scope is not None:
+            channels = self.slowmode_scope(ctx.guild, scope)
+            if channels is None:
+                await ctx.send(
+                    "❌ Use `--all` or `--category <name>` with an existing category."
+                )
+                return
+            await self.bulk_slowmode(ctx, channels, seconds)
+            return
+
         try:
             await ctx.channel.edit(slowmode_delay=seconds)
 
             if seconds == 0:
                 await ctx.send("✅ Slowmode disabled.")
             else:
-                minutes, secs = divmod(seconds, 60)
-                hours, minutes = divmod(minutes, 60)
-
-                time_str = ""
-                if hours:
-                    time_str += f"{hours}h "
-                if minutes:
-                    time_str += f"{minutes}m "
-                if secs:
-                    time_str += f"{secs}s"
-
-                await ctx.send(f"✅ Slowmode set to {time_str.strip()}.")
+                await ctx.send(f"✅ Slowmode set to {format_delay(seconds)}.")
 
         except discord.Forbidden:
             await ctx.send("❌ I don't have permission to manage this channel.")
         except Exception as e:
             await ctx.send(f"❌ Error setting slowmode: {e}")
 
-    @commands.command(name="userinfo")
+    @requires_permissions(manage_channels=True)
+    @set_slowmode.command(name="restore")
+    async def restore_slowmode(self, ctx):
+        """Restore the slowmode channels had before the last bulk change"""
+        snapshot = self.bot.config.pop_slowmode_snapshot(ctx.guild.id)
+        delays = {}
+        for channel_id, delay in snapshot.items():
+            channel = ctx.guild.get_channel(channel_id)
+            if isinstance(channel, discord.TextChannel):
+                delays[channel] = delay
+        if not delays:
+            await ctx.send("❌ There is no bulk slowmode change to restore.")
+            return
+
+        with self.bot.audit.job("slowmode_restore", ctx, channels=len(delays)) as job:
+            changed, failed = await self.edit_slowmodes(delays)
+            job.update(changed=changed, failed=len(failed))
+        if failed:
+            # Keep the channels that could not be restored for another try
+            self.bot.config.snapshot_slowmode(
+                ctx.guild.id, {channel.id: delays[channel] for channel, _ in failed}
+            )
+        await ctx.send(
+            summarize_slowmode(
+                f"✅ Restored the previous slowmode in {len(delays)} channels.",
+                len(delays) - changed - len(failed),
+                failed,
+            )
+        )
+
+    @staticmethod
+    def slowmode_scope(guild: discord.Guild, scope: str):
+        """Text channels selected by ``--all`` or ``--category <name or id>``"""
+        option, _, value = scope.strip().partition(" ")
+        if option == "--all" and not value:
+            return list(guild.text_channels)
+        if option != "--category" or not value:
+            return None
+        value = value.strip().lower()
+        category = discord.utils.find(
+            lambda c: c.name.lower() == value or str(c.id) == value, guild.categories
+        )
+        return None if category is None else list(category.text_channels)
+
+    async def bulk_slowmode(self, ctx, channels, seconds: int):
+        if not channels:
+            await ctx.send("❌ There are no text channels to change.")
+            return
+
+        await ctx.send(f"🔄 Setting slowmode in {len(channels)} channels...")
+        # Remember the previous values first so the change can be undone
+        self.bot.config.snapshot_slowmode(
+            ctx.guild.id, {channel.id: channel.slowmode_delay for channel in channels}
+        )
+        with self.bot.audit.job(
+            "slowmode", ctx, channels=len(channels), delay=seconds
+        ) as job:
+            changed, failed = await self.edit_slowmodes(
+                {channel: seconds for channel in channels}
+            )
+            job.update(changed=changed, failed=len(failed))
+
+        setting = f"set to {format_delay(seconds)}" if seconds else "disabled"
+        await ctx.send(
+            summarize_slowmode(
+                f"✅ Slowmode {setting} in {len(channels)} channels. "
+                f"Undo with `!slowmode restore`.",
+                len(channels) - changed - len(failed),
+                failed,
+            )
+        )
+
+    async def edit_slowmodes(self, delays):
+        """Edit many channels concurrently within the shared edit budget.
+
+        Returns the number of channels changed and the ``(channel, error)``
+        pairs that failed. Channels that already have the delay are skipped.
+        """
+
+        async def edit(channel, delay):
+            async with self._edit_budget:
+                try:
+                    await channel.edit(slowmode_delay=delay)
+                except discord.HTTPException as e:
+                    return e
+            return None
+
+        pending = {
+            channel: delay
+            for channel, delay in delays.items()
+            if channel.slowmode_delay != delay
+        }
+        results = await asyncio.gather(
+            *(edit(channel, delay) for channel, delay in pending.items())
+        )
+        failed = [
+            (channel, error) for channel, error in zip(pending, results) if error
+        ]
+        return len(pending) - len(failed), failed
+
+    @commands.command(name="userinfo", extras={"category": "Statistics"})
     async def user_info(self, ctx, user: discord.Member = None):
         """Get detailed information about a user"""
         if user is None:
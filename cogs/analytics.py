@@ -0,0 +1,155 @@
+import asyncio
+import io
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+import discord
+from discord.ext import commands
+
+from core.activity import (
+    bucket_activity,
+    render_heatmap_png,
+    render_heatmap_text,
+    render_trend_text,
+    timestamp_column,
+)
+from core.message_mirror import snowflake_before
+
+MAX_DAYS = 365
+# Indexed channels whose timestamp columns stay loaded between calls
+COLUMN_CACHE_SIZE = 8
+
+
+class _Column:
+    __slots__ = ("timestamps", "start_id", "newest_id")
+
+    def __init__(self, timestamps, start_id: int, newest_id: int):
+        self.timestamps = timestamps
+        self.start_id = start_id
+        self.newest_id = newest_id
+
+
+class Analytics(commands.Cog):
+    """Activity analytics over message timestamps"""
+
+    def __init__(self, bot):
+        self.bot = bot
+        self._columns: OrderedDict[int, _Column] = OrderedDict()
+
+    @commands.Cog.listener()
+    async def on_raw_message_delete(self, payload):
+        self._columns.pop(payload.channel_id, None)
+
+    @commands.Cog.listener()
+    async def on_raw_bulk_message_delete(self, payload):
+        self._columns.pop(payload.channel_id, None)
+
+    def indexed(self, channel) -> bool:
+        mirror = self.bot.message_mirror
+        return mirror is not None and mirror.is_complete(channel.id)
+
+    async def load_timestamps(self, channel: discord.TextChannel, since: datetime):
+        """Creation times of a channel's messages since ``since``, oldest first"""
+        if self.indexed(channel):
+            return await self.load_indexed(channel, snowflake_before(since))
+
+        column = timestamp_column()
+        async for message in channel.history(limit=None, after=since):
+            column.append(message.created_at.timestamp())
+        return column
+
+    async def load_indexed(self, channel: discord.TextChannel, start_id: int):
+        """Load a column from the mirror once, then only append newer messages"""
+        mirror = self.bot.message_mirror
+        column = self._columns.get(channel.id)
+        if column is None or column.start_id > start_id:
+            timestamps, newest_id = await mirror.timestamps(channel.id, start_id)
+            column = _Column(timestamps, start_id, newest_id)
+        else:
+            newer, column.newest_id = await mirror.timestamps(
+                channel.id, column.newest_id
+            )
+            column.timestamps.extend(newer)
+
+        self._columns[channel.id] = column
+        self._columns.move_to_end(channel.id)
+        while len(self._columns) > COLUMN_CACHE_SIZE:
+            self._columns.popitem(last=False)
+        return column.timestamps
+
+    @commands.command(name="activity")
+    async def activity(
+        self,
+        ctx,
+        channel: Optional[discord.TextChannel] = None,
+        days: int = 30,
+        style: str = "image",
+    ):
+        """Show a weekday by hour heatmap and daily trend of channel activity"""
+        if channel is None:
+            channel = ctx.channel
+
+        if not 1 <= days <= MAX_DAYS:
+            await ctx.send(f"❌ Please choose between 1 and {MAX_DAYS} days.")
+            return
+
+        if style not in ("image", "text"):
+            await ctx.send("❌ Style must be `image` or `text`.")
+            return
+
+        until = datetime.now(timezone.utc)
+        since = until - timedelta(days=days)
+        source = "index" if self.indexed(channel) else "history"
+        if source == "history":
+            await ctx.send(
+                f"🔄 Reading {days} days of {channel.mention}... This may take a while."
+            )
+
+        try:
+            timestamps = await self.load_timestamps(channel, since)
+        except discord.Forbidden:
+            await ctx.send(
+                "❌ I don't have permission to read message history in that channel."
+            )
+            return
+
+        histogram = bucket_activity(timestamps, since.timestamp(), until.timestamp())
+        if not histogram.total:
+            await ctx.send(f"❌ No messages in {channel.mention} in the last {days} days.")
+            return
+
+        embed = discord.Embed(
+            title=f"📈 Activity in #{channel.name} (last {days} days)",
+            description="```\n" + render_heatmap_text(histogram) + "\n```",
+            color=discord.Color.blue(),
+            timestamp=datetime.now(),
+        )
+        embed.add_field(
+            name="Daily Trend",
+            value="```\n" + render_trend_text(histogram) + "\n```",
+            inline=False,
+        )
+        embed.add_field(
+            name="Summary",
+            value=f"Messages: {histogram.total:,}\n"
+            f"Busiest hour: {histogram.busiest_hour:02d}:00\n"
+            f"Busiest weekday: {histogram.busiest_weekday}\n"
+            f"Busiest day: {histogram.busiest_day:%B %d, %Y}",
+            inline=True,
+        )
+        embed.set_footer(text=f"Hours in UTC | Read from the message {source}")
+
+        if style == "text":
+            await ctx.send(embed=embed)
+            return
+
+        png = await asyncio.to_thread(render_heatmap_png, histogram)
+        embed.set_image(url="attachment://activity.png")
+        await ctx.send(
+            embed=embed, file=discord.File(io.BytesIO(png), filename="activity.png")
+        )
+
+
+async def setup(bot):
+    await bot.add_cog(Analytics(bot))
@@ -0,0 +1,248 @@
+import asyncio
+import logging
+import time
+from typing import Dict, Optional
+
+import discord
+from discord.ext import commands, tasks
+
+from core.audit import context_fields
+from core.http_telemetry import current_guild, operation
+from core.permissions import requires_permissions
+from core.rate_window import SLOWMODE_STEPS, ChannelRates
+
+logger = logging.getLogger(__name__)
+
+AUTO_SLOWMODE_EDITS = "auto_slowmode_edits_total"
+
+EVALUATE_SECONDS = 10
+# Channel edits are rate limited per channel, so a channel is edited at most
+# once per interval and only a few channels are edited per evaluation
+MIN_EDIT_INTERVAL = 60.0
+EDITS_PER_ROUND = 5
+
+
+class AutoSlowmode(commands.Cog):
+    """Raises and lowers channel slowmode automatically with the message rate"""
+
+    def __init__(self, bot):
+        self.bot = bot
+        self.config = bot.config
+        self.rates = ChannelRates()
+        # Slowmode a channel had before it was raised, restored afterwards
+        self._baselines: Dict[int, int] = {}
+        # Latest wanted delay per channel, waiting for its edit slot
+        self._pending: Dict[int, int] = {}
+        self._last_edit: Dict[int, float] = {}
+        # Delay we last set; the cached channel only updates on the gateway event
+        self._applied: Dict[int, int] = {}
+        bot.metrics.describe(
+            AUTO_SLOWMODE_EDITS, "counter", "Automatic slowmode edits, by direction"
+        )
+
+    async def cog_load(self):
+        for channel_id, settings in self.config.auto_slowmode_channels().items():
+            self.rates.watch(channel_id, settings["threshold"], settings["max_delay"])
+            state = settings.get("state")
+            if state:
+                # Slowmode raised before a restart still gets lowered later
+                governor = self.rates.governor(channel_id)
+                governor.level = state["level"]
+                governor.changed_at = self.rates.clock()
+                self._baselines[channel_id] = state["baseline"]
+                self._applied[channel_id] = state["applied"]
+        self.evaluate.start()
+
+    async def cog_unload(self):
+        self.evaluate.cancel()
+
+    @commands.Cog.listener()
+    async def on_message(self, message):
+        self.rates.record(message.channel.id)
+
+    @commands.Cog.listener()
+    async def on_guild_channel_delete(self, channel):
+        if channel.id in self.rates:
+            self.unwatch(channel.id)
+            self.config.remove_auto_slowmode(channel.guild.id, channel.id)
+
+    def unwatch(self, channel_id: int) -> Optional[int]:
+        """Stop watching a channel, returning the delay it should go back to"""
+        self.rates.unwatch(channel_id)
+        self._pending.pop(channel_id, None)
+        self._last_edit.pop(channel_id, None)
+        self._applied.pop(channel_id, None)
+        return self._baselines.pop(channel_id, None)
+
+    # --- Evaluation and edits
+
+    @tasks.loop(seconds=EVALUATE_SECONDS)
+    async def evaluate(self):
+        for channel_id, step in self.rates.evaluate():
+            channel = self.bot.get_channel(channel_id)
+            if not isinstance(channel, discord.TextChannel):
+                continue
+            if step and channel_id not in self._baselines:
+                self._baselines[channel_id] = channel.slowmode_delay
+            baseline = self._baselines.get(channel_id, channel.slowmode_delay)
+            if not step:
+                self._baselines.pop(channel_id, None)
+            self._pending[channel_id] = max(step, baseline)
+
+        await self.apply_pending()
+
+    @evaluate.before_loop
+    async def before_evaluate(self):
+        await self.bot.wait_until_ready()
+
+    async def apply_pending(self):
+        """Edit the channels whose edit slot is free, a few at a time"""
+        now = time.monotonic()
+        ready = [
+            channel_id
+            for channel_id in self._pending
+            if now - self._last_edit.get(channel_id, -MIN_EDIT_INTERVAL)
+            >= MIN_EDIT_INTERVAL
+        ][:EDITS_PER_ROUND]
+        if not ready:
+            return
+        edits = [(channel_id, self._pending.pop(channel_id)) for channel_id in ready]
+        with operation("auto_slowmode"):
+            await asyncio.gather(*(self._edit(*edit) for edit in edits))
+
+    async def _edit(self, channel_id: int, delay: int):
+        channel = self.bot.get_channel(channel_id)
+        if not isinstance(channel, discord.TextChannel):
+            return
+        previous = self._applied.get(channel_id, channel.slowmode_delay)
+        if previous == delay:
+            return
+
+        current_guild.set(channel.guild.id)
+        self._last_edit[channel_id] = time.monotonic()
+        try:
+            await channel.edit(
+                slowmode_delay=delay, reason="Automatic slowmode: message rate changed"
+            )
+        except discord.HTTPException as e:
+            logger.warning(f"Could not set slowmode in #{channel.name}: {e}")
+            # Retry in the next edit slot unless a newer target replaced it
+            self._pending.setdefault(channel_id, delay)
+            return
+        self._applied[channel_id] = delay
+        self._save_state(channel)
+
+        direction = "raise" if delay > previous else "lower"
+        self.bot.metrics.inc(AUTO_SLOWMODE_EDITS, {"direction": direction})
+        self.bot.audit.record(
+            "auto_slowmode",
+            actor="auto_slowmode",
+            **context_fields(channel=channel),
+            previous=previous,
+            delay=delay,
+            rate=round(self.rates.rate(channel_id), 1),
+        )
+
+    def _save_state(self, channel: discord.TextChannel):
+        governor = self.rates.governor(channel.id)
+        state = None
+        if governor is not None and governor.level and channel.id in self._baselines:
+            state = {
+                "baseline": self._baselines[channel.id],
+                "level": governor.level,
+                "applied": self._applied[channel.id],
+            }
+        self.config.set_auto_slowmode_state(channel.guild.id, channel.id, state)
+
+    # --- Commands
+
+    @requires_permissions(manage_channels=True)
+    @commands.group(name="autoslowmode", invoke_without_command=True)
+    async def auto_slowmode(
+        self,
+        ctx,
+        channel: Optional[discord.TextChannel] = None,
+        threshold: int = 30,
+        max_delay: int = 30,
+    ):
+        """Raise slowmode automatically when a channel gets busy"""
+        if channel is None:
+            channel = ctx.channel
+
+        if not 1 <= threshold <= 10000:
+            await ctx.send(
+                "❌ Threshold must be between 1 and 10000 messages per minute."
+            )
+            return
+        if not SLOWMODE_STEPS[1] <= max_delay <= SLOWMODE_STEPS[-1]:
+            await ctx.send(
+                f"❌ Maximum slowmode must be between {SLOWMODE_STEPS[1]} and "
+                f"{SLOWMODE_STEPS[-1]} seconds."
+            )
+            return
+
+        self.config.set_auto_slowmode(ctx.guild.id, channel.id, threshold, max_delay)
+        self.rates.watch(channel.id, threshold, max_delay)
+        self.bot.audit.record(
+            "auto_slowmode_enabled",
+            **context_fields(ctx, channel),
+            threshold=threshold,
+            max_delay=max_delay,
+        )
+        await ctx.send(
+            f"✅ Auto slowmode enabled for {channel.mention}. Slowmode goes up once "
+            f"it passes {threshold} messages per minute, to at most {max_delay}s."
+        )
+
+    @requires_permissions(manage_channels=True)
+    @auto_slowmode.command(name="off")
+    async def auto_slowmode_off(self, ctx, channel: discord.TextChannel = None):
+        """Stop adjusting slowmode in a channel and restore its previous delay"""
+        if channel is None:
+            channel = ctx.channel
+
+        if not self.config.remove_auto_slowmode(ctx.guild.id, channel.id):
+            await ctx.send(f"❌ Auto slowmode was not enabled for {channel.mention}.")
+            return
+
+        baseline = self.unwatch(channel.id)
+        if baseline is not None:
+            try:
+                await channel.edit(slowmode_delay=baseline)
+            except discord.HTTPException as e:
+                logger.warning(f"Could not restore slowmode in #{channel.name}: {e}")
+        self.bot.audit.record("auto_slowmode_disabled", **context_fields(ctx, channel))
+        await ctx.send(f"✅ Auto slowmode disabled for {channel.mention}.")
+
+    @requires_permissions(manage_channels=True)
+    @auto_slowmode.command(name="list")
+    async def auto_slowmode_list(self, ctx):
+        """List channels with auto slowmode and their current message rate"""
+        entries = [
+            (channel_id, settings)
+            for channel_id, settings in self.config.auto_slowmode_channels().items()
+            if settings["guild_id"] == ctx.guild.id
+        ]
+        if not entries:
+            await ctx.send("❌ No channels have auto slowmode enabled.")
+            return
+
+        embed = discord.Embed(
+            title="🐢 Auto Slowmode Channels", color=discord.Color.orange()
+        )
+        for channel_id, settings in entries:
+            channel = self.bot.get_channel(channel_id)
+            if channel is None:
+                continue
+            embed.add_field(
+                name=f"#{channel.name}",
+                value=f"Rate: {self.rates.rate(channel_id):.0f}/min "
+                f"(threshold {settings['threshold']}/min)\n"
+                f"Slowmode: {channel.slowmode_delay}s (max {settings['max_delay']}s)",
+                inline=False,
+            )
+        await ctx.send(embed=embed)
+
+
+async def setup(bot):
+    await bot.add_cog(AutoSlowmode(bot))
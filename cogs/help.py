@@ -1,116 +1,197 @@
+from typing import Dict, List, Optional
+
 import discord
 from discord.ext import commands
 
+# Categories of cog commands that don't set ``extras={"category": ...}``
+COG_CATEGORIES = {
+    "AdvancedUtils": "Utilities",
+    "Analytics": "Statistics",
+    "AutoSlowmode": "Utilities",
+    "Leaderboard": "Statistics",
+    "Mirror": "Utilities",
+    "Perf": "Performance",
+    "Restore": "Utilities",
+}
+CATEGORY_TITLES = {
+    "Message Management": "🧹 Message Management",
+    "Statistics": "📊 Statistics",
+    "Auto Cleanup": "🔄 Auto Cleanup",
+    "Utilities": "🛠️ Utilities",
+    "Performance": "⏱️ Performance",
+}
+DEFAULT_CATEGORY = "General"
+
+# Overview pages are split so each stays well inside Discord's embed limits
+PAGE_CHARS = 2500
+FIELD_CHARS = 1024
+
+TIPS = (
+    "• Use `!help <command>` for detailed help on a specific command\n"
+    "• Arguments in `<>` are required, arguments in `[]` are optional\n"
+    "• Most commands require specific permissions"
+)
+
+
+def command_category(command: commands.Command) -> str:
+    root = command.root_parent or command
+    category = root.extras.get("category")
+    if category:
+        return category
+    if root.cog_name:
+        return COG_CATEGORIES.get(root.cog_name, root.cog_name)
+    return DEFAULT_CATEGORY
+
+
+def usage(command: commands.Command) -> str:
+    return f"!{command.qualified_name} {command.usage or command.signature}".rstrip()
+
+
+class HelpCatalog:
+    """Every command, indexed by name and alias, with its embeds pre-rendered"""
+
+    def __init__(self, bot: commands.Bot):
+        self.embeds: Dict[str, discord.Embed] = {}
+        self.categories: Dict[str, List[commands.Command]] = {}
+
+        for command in sorted(bot.walk_commands(), key=lambda c: c.qualified_name):
+            embed = self._render_command(command)
+            parent = f"{command.full_parent_name} " if command.parent else ""
+            for name in (command.name, *command.aliases):
+                self.embeds[f"{parent}{name}".lower()] = embed
+
+            if not command.hidden and command.parent is None and command.name != "help":
+                self.categories.setdefault(command_category(command), []).append(command)
+
+        self.pages = self._render_pages()
+
+    def lookup(self, query: str) -> Optional[discord.Embed]:
+        return self.embeds.get(" ".join(query.lower().lstrip("!").split()))
+
+    def _render_command(self, command: commands.Command) -> discord.Embed:
+        embed = discord.Embed(
+            title=f"📖 Help: {command.qualified_name}",
+            description=command.help or "No description available.",
+            color=discord.Color.blue(),
+        )
+        embed.add_field(name="Usage", value=f"`{usage(command)}`", inline=False)
+        if command.aliases:
+            embed.add_field(
+                name="Aliases",
+                value=", ".join(f"`{alias}`" for alias in command.aliases),
+                inline=False,
+            )
+
+        if isinstance(command, (commands.HybridCommand, commands.HybridGroup)):
+            embed.add_field(
+                name="Slash Command", value=f"`/{command.qualified_name}`", inline=False
+            )
+
+        subcommands = getattr(command, "commands", None)
+        if subcommands:
+            embed.add_field(
+                name="Subcommands",
+                value="\n".join(
+                    f"`{usage(sub)}` - {sub.short_doc}"
+                    for sub in sorted(subcommands, key=lambda c: c.name)
+                ),
+                inline=False,
+            )
+
+        # Set by core.permissions together with the check itself
+        permissions = command.extras.get("permissions")
+        if permissions:
+            embed.add_field(
+                name="Required Permissions", value=permissions, inline=False
+            )
+        embed.set_footer(text=f"Category: {command_category(command)}")
+        return embed
+
+    def _category_order(self) -> List[str]:
+        known = [name for name in CATEGORY_TITLES if name in self.categories]
+        return known + sorted(name for name in self.categories if name not in known)
+
+    def _render_pages(self) -> List[discord.Embed]:
+        # Split long categories into fields, then fields into pages
+        fields = []
+        for category in self._category_order():
+            title = CATEGORY_TITLES.get(category, category)
+            value = ""
+            for command in self.categories[category]:
+                line = f"`!{command.name}` - {command.short_doc or 'No description'}\n"
+                if len(value) + len(line) > FIELD_CHARS:
+                    fields.append((title, value))
+                    title = f"{CATEGORY_TITLES.get(category, category)} (cont.)"
+                    value = ""
+                value += line
+            fields.append((title, value))
+
+        groups = [[]]
+        size = 0
+        for field in fields:
+            if groups[-1] and size + len(field[1]) > PAGE_CHARS:
+                groups.append([])
+                size = 0
+            groups[-1].append(field)
+            size += len(field[1])
+
+        pages = []
+        for number, group in enumerate(groups, start=1):
+            embed = discord.Embed(
+                title="🤖 Discord Utils Bot - Help",
+                description="A comprehensive utility bot for Discord server management.",
+                color=discord.Color.blue(),
+            )
+            for name, value in group:
+                embed.add_field(name=name, value=value, inline=False)
+            embed.add_field(name="💡 Tips", value=TIPS, inline=False)
+            footer = "Discord Utils Bot | Use responsibly!"
+            if len(groups) > 1:
+                footer = f"Page {number}/{len(groups)} | !help <page> for more | {footer}"
+            embed.set_footer(text=footer)
+            pages.append(embed)
+        return pages
+
 
 class Help(commands.Cog):
     """Custom help command for the Discord Utils Bot"""
 
     def __init__(self, bot):
         self.bot = bot
+        self._catalog: Optional[HelpCatalog] = None
         bot.remove_command("help")
 
+    @commands.Cog.listener()
+    async def on_extension_load(self, name):
+        # Dispatched by main.load_extension; rebuilt on the next !help
+        self._catalog = None
+
+    @property
+    def catalog(self) -> HelpCatalog:
+        if self._catalog is None:
+            self._catalog = HelpCatalog(self.bot)
+        return self._catalog
+
     @commands.command(name="help")
     async def custom_help(self, ctx, *, command_name: str = None):
         """Show help information for commands"""
+        catalog = self.catalog
 
-        if command_name:
-
-            cmd = self.bot.get_command(command_name.lower())
-            if not cmd:
+        if command_name and not command_name.isdigit():
+            embed = catalog.lookup(command_name)
+            if embed is None:
                 await ctx.send(f"❌ Command `{command_name}` not found.")
                 return
-
-            embed = discord.Embed(
-                title=f"📖 Help: {cmd.name}",
-                description=cmd.help or "No description available.",
-                color=discord.Color.blue(),
-            )
-
-            if cmd.usage:
-                embed.add_field(
-                    name="Usage", value=f"`!{cmd.name} {cmd.usage}`", inline=False
-                )
-            else:
-                embed.add_field(name="Usage", value=f"`!{cmd.name}`", inline=False)
-
-            if hasattr(cmd, "checks") and cmd.checks:
-                perms = []
-                for check in cmd.checks:
-                    if hasattr(check, "__name__"):
-                        if "administrator" in check.__name__:
-                            perms.append("Administrator")
-                        elif "manage_messages" in check.__name__:
-                            perms.append("Manage Messages")
-                        elif "manage_channels" in check.__name__:
-                            perms.append("Manage Channels")
-
-                if perms:
-                    embed.add_field(
-                        name="Required Permissions",
-                        value=", ".join(perms),
-                        inline=False,
-                    )
-
             await ctx.send(embed=embed)
             return
 
-        embed = discord.Embed(
-            title="🤖 Discord Utils Bot - Help",
-            description="A comprehensive utility bot for Discord server management.",
-            color=discord.Color.blue(),
-        )
-
-        cleanup_commands = [
-            ("clear [amount]", "Clear specified number of messages (default: 10)"),
-            ("clearall", "Clear ALL messages in channel (requires confirmation)"),
-            ("clearuser <user> [amount]", "Clear messages from a specific user"),
-            ("clearold [days]", "Clear messages older than specified days"),
-        ]
-
-        cleanup_text = "\n".join(
-            [f"`!{cmd}` - {desc}" for cmd, desc in cleanup_commands]
-        )
-        embed.add_field(name="🧹 Message Management", value=cleanup_text, inline=False)
-
-        stats_commands = [
-            ("stats", "Show comprehensive server statistics"),
-            ("channelstats [channel]", "Show statistics for a specific channel"),
-            ("membercount", "Get detailed member count breakdown"),
-            ("userinfo [user]", "Get detailed information about a user"),
-            ("roleinfo <role_name>", "Get information about a specific role"),
-        ]
-
-        stats_text = "\n".join([f"`!{cmd}` - {desc}" for cmd, desc in stats_commands])
-        embed.add_field(name="📊 Statistics", value=stats_text, inline=False)
-
-        auto_commands = [
-            ("autocleanup <channel> [days]", "Enable auto cleanup for a channel"),
-            ("stopauto [channel]", "Stop auto cleanup for a channel"),
-            ("listauto", "List all channels with auto cleanup enabled"),
-        ]
-
-        auto_text = "\n".join([f"`!{cmd}` - {desc}" for cmd, desc in auto_commands])
-        embed.add_field(name="🔄 Auto Cleanup", value=auto_text, inline=False)
-
-        util_commands = [
-            ("backup <channel> [limit]", "Create a backup of channel messages"),
-            ("slowmode [seconds]", "Set slowmode for the current channel"),
-        ]
-
-        util_text = "\n".join([f"`!{cmd}` - {desc}" for cmd, desc in util_commands])
-        embed.add_field(name="🛠️ Utilities", value=util_text, inline=False)
-
-        embed.add_field(
-            name="💡 Tips",
-            value="• Use `!help <command>` for detailed help on a specific command\n"
-            "• Commands in `<>` are required, commands in `[]` are optional\n"
-            "• Most commands require specific permissions",
-            inline=False,
-        )
-
-        embed.set_footer(text="Discord Utils Bot | Use responsibly!")
-
-        await ctx.send(embed=embed)
+        page = int(command_name) if command_name else 1
+        if not 1 <= page <= len(catalog.pages):
+            await ctx.send(
+                f"❌ Help page {page} does not exist (pages 1-{len(catalog.pages)})."
+            )
+            return
+        await ctx.send(embed=catalog.pages[page - 1])
 
 
 async def setup(bot):
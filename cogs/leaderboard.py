@@ -0,0 +1,94 @@
+import asyncio
+import os
+
+import discord
+from discord.ext import commands, tasks
+
+from core.env import env_int
+from core.sharding import guild_filter_from_env
+from core.topk import LeaderboardStore
+
+WINDOWS = {"today": 1, "day": 1, "week": 7, "month": 30, "all": None}
+KINDS = {
+    "users": ("👤 Most Active Users", "messages", lambda key: f"<@{key}>"),
+    "channels": ("💬 Most Active Channels", "messages", lambda key: f"<#{key}>"),
+    "reactions": ("😀 Most Used Reactions", "uses", str),
+}
+
+
+class Leaderboard(commands.Cog):
+    """Streaming top posters, channels and reactions per server"""
+
+    def __init__(self, bot):
+        self.bot = bot
+        self.store = LeaderboardStore(
+            os.path.join("data", "leaderboards"),
+            capacity=env_int("TOP_K_CAPACITY", 64),
+        )
+
+    async def cog_load(self):
+        await asyncio.to_thread(self.store.load, guild_filter_from_env())
+        self.save_leaderboards.start()
+
+    async def cog_unload(self):
+        self.save_leaderboards.cancel()
+        await self.store.close()
+
+    @tasks.loop(minutes=5)
+    async def save_leaderboards(self):
+        await self.store.flush()
+
+    @commands.Cog.listener()
+    async def on_message(self, message):
+        if message.guild is None or message.author.bot:
+            return
+        self.store.record(message.guild.id, "users", message.author.id)
+        self.store.record(message.guild.id, "channels", message.channel.id)
+
+    @commands.Cog.listener()
+    async def on_raw_reaction_add(self, payload):
+        if payload.guild_id is None:
+            return
+        if payload.member is not None and payload.member.bot:
+            return
+        self.store.record(payload.guild_id, "reactions", str(payload.emoji))
+
+    @commands.Cog.listener()
+    async def on_guild_remove(self, guild):
+        self.store.forget_guild(guild.id)
+
+    @commands.command(name="top")
+    @commands.guild_only()
+    async def top(self, ctx, kind: str = "users", window: str = "week"):
+        """Show the most active users or channels, or the most used reactions"""
+        kind = kind.lower()
+        window = window.lower()
+        if kind not in KINDS:
+            await ctx.send("❌ Choose `users`, `channels` or `reactions`.")
+            return
+        if window not in WINDOWS:
+            await ctx.send("❌ Window must be `today`, `week`, `month` or `all`.")
+            return
+
+        title, unit, label = KINDS[kind]
+        entries = await self.store.top(ctx.guild.id, kind, WINDOWS[window])
+        if not entries:
+            await ctx.send(f"❌ No {kind} activity recorded for `{window}` yet.")
+            return
+
+        lines = []
+        for rank, (key, count, error) in enumerate(entries, start=1):
+            approximate = "~" if error else ""
+            lines.append(f"**{rank}.** {label(key)} - {approximate}{count:,} {unit}")
+
+        embed = discord.Embed(
+            title=f"{title} ({window})",
+            description="\n".join(lines),
+            color=discord.Color.gold(),
+        )
+        embed.set_footer(text="Counted from live activity; ~ marks approximate counts")
+        await ctx.send(embed=embed)
+
+
+async def setup(bot):
+    await bot.add_cog(Leaderboard(bot))
@@ -0,0 +1,193 @@
+import asyncio
+import logging
+from typing import Dict, Optional
+
+import discord
+from discord.ext import commands
+
+from core.http_telemetry import operation
+from core.message_mirror import message_row
+from core.permissions import requires_permissions
+
+logger = logging.getLogger(__name__)
+
+PAGE_ROWS = 500
+# Latest mirrored messages re-read on sync to drop those deleted while offline
+VERIFY_ROWS = 1000
+
+
+class Mirror(commands.Cog):
+    """Keeps the message mirror in step with the gateway and backfills history"""
+
+    def __init__(self, bot):
+        self.bot = bot
+        self.mirror = bot.message_mirror
+        self._jobs: Dict[int, asyncio.Task] = {}
+        self._sync_limit = asyncio.Semaphore(2)
+
+    async def cog_load(self):
+        await self.mirror.open()
+
+    async def cog_unload(self):
+        for task in self._jobs.values():
+            task.cancel()
+        await self.mirror.close()
+
+    # --- Gateway events
+
+    @commands.Cog.listener()
+    async def on_message(self, message):
+        if message.guild is not None:
+            self.mirror.add(message)
+
+    @commands.Cog.listener()
+    async def on_raw_message_delete(self, payload):
+        self.mirror.remove(payload.channel_id, [payload.message_id])
+
+    @commands.Cog.listener()
+    async def on_raw_bulk_message_delete(self, payload):
+        self.mirror.remove(payload.channel_id, payload.message_ids)
+
+    @commands.Cog.listener()
+    async def on_guild_channel_delete(self, channel):
+        self.mirror.forget_channel(channel.id)
+
+    @commands.Cog.listener()
+    async def on_ready(self):
+        # Messages sent while we were disconnected never reached on_message
+        for channel_id in await self.mirror.tracked_channels():
+            channel = self.bot.get_channel(channel_id)
+            if isinstance(channel, discord.TextChannel):
+                self.start_sync(channel)
+
+    # --- Sync jobs
+
+    def start_sync(self, channel: discord.TextChannel) -> asyncio.Task:
+        """Catch up and backfill a channel in the background, once at a time"""
+        task = self._jobs.get(channel.id)
+        if task is None or task.done():
+            # Untrusted right away, not once the job gets a sync slot
+            self.mirror.begin_sync(channel.id)
+            task = asyncio.create_task(self._sync(channel))
+            self._jobs[channel.id] = task
+        return task
+
+    async def _sync(self, channel: discord.TextChannel) -> int:
+        async with self._sync_limit:
+            try:
+                with operation("mirror_sync"), self.bot.audit.job(
+                    "mirror_sync", channel=channel, actor="mirror"
+                ) as job:
+                    fetched = await self._catch_up(channel)
+                    before_id, complete = await self.mirror.backfill_state(channel.id)
+                    if not complete:
+                        fetched += await self._backfill(channel, before_id)
+                    job.update(fetched=fetched)
+                # A channel whose sync failed stays untrusted until the next one
+                self.mirror.end_sync(channel.id)
+                return fetched
+            except discord.Forbidden:
+                logger.warning(f"Cannot read history of #{channel.name} to mirror it")
+                return 0
+            except discord.HTTPException as e:
+                logger.warning(f"Mirror sync of #{channel.name} failed: {e}")
+                return 0
+            finally:
+                self._jobs.pop(channel.id, None)
+
+    async def _catch_up(self, channel: discord.TextChannel) -> int:
+        # Reading from the oldest of the latest mirrored messages also shows
+        # which of them were deleted while the bot was offline
+        recent = await self.mirror.recent_ids(channel.id, VERIFY_ROWS)
+        if not recent:
+            return 0
+        newest = recent[0]
+        seen = set()
+        rows = []
+        fetched = 0
+        async for message in channel.history(
+            limit=None, after=discord.Object(id=recent[-1] - 1), oldest_first=True
+        ):
+            seen.add(message.id)
+            if message.id <= newest:
+                continue
+            rows.append(message_row(message))
+            if len(rows) >= PAGE_ROWS:
+                self.mirror.add_rows(rows)
+                fetched += len(rows)
+                rows = []
+        self.mirror.add_rows(rows)
+        self.mirror.remove(
+            channel.id, [message_id for message_id in recent if message_id not in seen]
+        )
+        return fetched + len(rows)
+
+    async def _backfill(self, channel: discord.TextChannel, before_id: Optional[int]):
+        before = discord.Object(id=before_id) if before_id else None
+        rows = []
+        fetched = 0
+        async for message in channel.history(limit=None, before=before):
+            rows.append(message_row(message))
+            if len(rows) >= PAGE_ROWS:
+                self.mirror.add_rows(rows)
+                fetched += len(rows)
+                # Rows are newest first, so the last one is where to resume
+                await self.mirror.save_backfill(channel.id, rows[-1][1])
+                rows = []
+        self.mirror.add_rows(rows)
+        await self.mirror.save_backfill(channel.id, None, complete=True)
+        return fetched + len(rows)
+
+    # --- Commands
+
+    @requires_permissions(administrator=True)
+    @commands.group(name="mirror", invoke_without_command=True)
+    async def mirror_status(self, ctx):
+        """Show what the message mirror holds"""
+        summary = await self.mirror.summary()
+        embed = discord.Embed(title="🗂️ Message Mirror", color=discord.Color.blue())
+        embed.add_field(
+            name="Index",
+            value=f"Messages: {summary['messages']:,}\n"
+            f"Size: {summary['bytes'] / 1024 / 1024:.1f} MB",
+            inline=True,
+        )
+        embed.add_field(
+            name="Channels",
+            value=f"Complete: {summary['complete']}\nPartial: {summary['partial']}\n"
+            f"Syncing: {summary['syncing']}",
+            inline=True,
+        )
+        if self.mirror.is_complete(ctx.channel.id):
+            state = "✅ Complete, purges and stats use the index"
+        elif ctx.channel.id in self._jobs:
+            state = "🔄 Syncing"
+        elif ctx.channel.id in self.mirror.complete_channels():
+            state = "⚠️ Out of date after a failed sync, run `!mirror backfill`"
+        else:
+            state = "❌ Not indexed, run `!mirror backfill`"
+        embed.add_field(name="This Channel", value=state, inline=False)
+        await ctx.send(embed=embed)
+
+    @requires_permissions(administrator=True)
+    @mirror_status.command(name="backfill")
+    async def mirror_backfill(self, ctx, channel: discord.TextChannel = None):
+        """Index a channel's full history so purges and stats can use it"""
+        if channel is None:
+            channel = ctx.channel
+        if channel.id in self._jobs:
+            await ctx.send(f"🔄 {channel.mention} is already being indexed.")
+            return
+
+        await ctx.send(f"🔄 Indexing {channel.mention}... I'll report back when done.")
+        fetched = await self.start_sync(channel)
+        if self.mirror.is_complete(channel.id):
+            await ctx.send(f"✅ Indexed {fetched:,} messages in {channel.mention}.")
+        else:
+            await ctx.send(
+                f"❌ Could not index {channel.mention}, check my read history permission."
+            )
+
+
+async def setup(bot):
+    await bot.add_cog(Mirror(bot))
@@ -0,0 +1,238 @@
+import os
+import time
+
+import discord
+from discord.ext import commands
+
+from core.env import env_int
+from core.loop_monitor import LOOP_LAG
+from core.metrics import MetricsServer
+from core.permissions import requires_permissions
+
+COMMAND_TOTAL = "bot_commands_total"
+COMMAND_ERRORS = "bot_command_errors_total"
+COMMAND_DURATION = "bot_command_duration_seconds"
+
+
+def format_ms(seconds):
+    """Format a duration in seconds as a short millisecond string"""
+    if seconds is None:
+        return "-"
+    if seconds >= 10:
+        return f"{seconds:.0f}s"
+    return f"{seconds * 1000:.0f}ms"
+
+
+class Perf(commands.Cog):
+    """Per-command latency, throughput and error metrics"""
+
+    def __init__(self, bot):
+        self.bot = bot
+        self.metrics = bot.metrics
+        self.server = None
+
+        self.metrics.describe(
+            COMMAND_TOTAL, "counter", "Commands finished, by command and status"
+        )
+        self.metrics.describe(
+            COMMAND_ERRORS, "counter", "Command errors, by command and error type"
+        )
+        self.metrics.describe(
+            COMMAND_DURATION, "histogram", "Command latency in seconds"
+        )
+
+    async def cog_load(self):
+        port = env_int("METRICS_PORT")
+        if port:
+            self.server = MetricsServer(
+                self.metrics, os.getenv("METRICS_HOST", "127.0.0.1"), port
+            )
+            await self.server.start()
+
+    async def cog_unload(self):
+        if self.server is not None:
+            await self.server.stop()
+
+    def _finish(self, ctx, status: str):
+        name = ctx.command.qualified_name
+        self.metrics.inc(COMMAND_TOTAL, {"command": name, "status": status})
+
+        started = getattr(ctx, "perf_started", None)
+        if started is not None:
+            self.metrics.observe(
+                COMMAND_DURATION, time.perf_counter() - started, {"command": name}
+            )
+
+    @commands.Cog.listener()
+    async def on_command(self, ctx):
+        ctx.perf_started = time.perf_counter()
+
+    @commands.Cog.listener()
+    async def on_command_completion(self, ctx):
+        self._finish(ctx, "ok")
+
+    @commands.Cog.listener()
+    async def on_command_error(self, ctx, error):
+        if isinstance(error, commands.CommandInvokeError):
+            error = error.original
+
+        name = ctx.command.qualified_name if ctx.command else "unknown"
+        self.metrics.inc(
+            COMMAND_ERRORS, {"command": name, "error": type(error).__name__}
+        )
+        if ctx.command is not None:
+            self._finish(ctx, "error")
+
+    @requires_permissions(administrator=True)
+    @commands.group(name="perf", invoke_without_command=True)
+    async def perf(self, ctx):
+        """Show latency percentiles and error counts per command"""
+        calls = {}
+        for labels, value in self.metrics.counters(COMMAND_TOTAL).items():
+            name = dict(labels)["command"]
+            calls[name] = calls.get(name, 0) + value
+
+        errors = {}
+        for labels, value in self.metrics.counters(COMMAND_ERRORS).items():
+            name = dict(labels)["command"]
+            errors[name] = errors.get(name, 0) + value
+
+        rows = []
+        for labels, histogram in self.metrics.histograms(COMMAND_DURATION).items():
+            name = dict(labels)["command"]
+            p50, p95, p99 = histogram.percentiles(50, 95, 99)
+            rows.append((name, p50, p95, p99))
+
+        if not rows:
+            await ctx.send("❌ No commands have been recorded yet.")
+            return
+
+        rows.sort(key=lambda row: row[2] or 0, reverse=True)
+        lines = [f"{'command':<14}{'calls':>6}{'err':>5}{'p50':>8}{'p95':>8}{'p99':>8}"]
+        for name, p50, p95, p99 in rows[:20]:
+            lines.append(
+                f"{name[:14]:<14}{int(calls.get(name, 0)):>6}"
+                f"{int(errors.get(name, 0)):>5}{format_ms(p50):>8}"
+                f"{format_ms(p95):>8}{format_ms(p99):>8}"
+            )
+
+        embed = discord.Embed(
+            title="⏱️ Command Performance",
+            description="```\n" + "\n".join(lines) + "\n```",
+            color=discord.Color.blue(),
+        )
+        embed.set_footer(text="Percentiles cover each command's last 1024 runs")
+        await ctx.send(embed=embed)
+
+    @requires_permissions(administrator=True)
+    @perf.command(name="http")
+    async def perf_http(self, ctx):
+        """Show REST time, rate limit waits and 429s per command and route"""
+        telemetry = self.bot.http_telemetry
+        operations = telemetry.by_operation()
+        if not operations:
+            await ctx.send("❌ No REST calls have been recorded yet.")
+            return
+
+        lines = [f"{'operation':<14}{'REST':>8}{'waiting':>9}{'429s':>6}"]
+        for entry in operations[:15]:
+            lines.append(
+                f"{entry['operation'][:14]:<14}{format_ms(entry['rest']):>8}"
+                f"{format_ms(entry['wait']):>9}{entry['limited']:>6}"
+            )
+
+        route_lines = [f"{'route':<36}{'calls':>6}{'p50':>7}{'p95':>7}"]
+        for entry in telemetry.by_route()[:10]:
+            route_lines.append(
+                f"{entry['route'][:36]:<36}{entry['calls']:>6}"
+                f"{format_ms(entry['p50']):>7}{format_ms(entry['p95']):>7}"
+            )
+
+        embed = discord.Embed(
+            title="🌐 Discord API Usage",
+            description="```\n" + "\n".join(lines) + "\n```",
+            color=discord.Color.blue(),
+        )
+        embed.add_field(
+            name="Slowest Routes",
+            value="```\n" + "\n".join(route_lines) + "\n```",
+            inline=False,
+        )
+        embed.set_footer(
+            text="Waiting = time spent on rate limit buckets and 429 retries"
+        )
+        await ctx.send(embed=embed)
+
+    @requires_permissions(administrator=True)
+    @perf.command(name="loop")
+    async def perf_loop(self, ctx):
+        """Show event loop lag percentiles and recent stalls"""
+        monitor = self.bot.loop_monitor
+        lag = self.metrics.histograms(LOOP_LAG).get(())
+        if lag is None or not lag.count:
+            await ctx.send("❌ The event loop monitor has not recorded anything yet.")
+            return
+
+        p50, p99, worst = lag.percentiles(50, 99, 100)
+        embed = discord.Embed(title="🔁 Event Loop Health", color=discord.Color.blue())
+        embed.add_field(
+            name="Lag",
+            value=f"p50: {format_ms(p50)}\np99: {format_ms(p99)}\n"
+            f"Max (recent): {format_ms(worst)}",
+            inline=True,
+        )
+
+        stalls = list(monitor.stalls)[-5:]
+        if stalls:
+            value = "\n".join(
+                f"<t:{int(stall['at'])}:R> `{stall['location']}` "
+                f"{format_ms(stall['duration'])}"
+                for stall in reversed(stalls)
+            )
+        else:
+            value = "None"
+        embed.add_field(name="Recent Stalls", value=value, inline=False)
+        embed.set_footer(
+            text=f"Stalls are loop blocks over {monitor.stall_threshold * 1000:.0f} ms"
+        )
+        await ctx.send(embed=embed)
+
+    @requires_permissions(administrator=True)
+    @perf.command(name="queue")
+    async def perf_queue(self, ctx):
+        """Show admission limits, running commands and queue depth"""
+        admission = self.bot.admission
+        lines = [f"{'command':<14}{'running':>9}{'per guild':>10}{'queued':>9}"]
+        for entry in admission.snapshot():
+            lines.append(
+                f"{entry['command'][:14]:<14}"
+                f"{entry['running']:>5}/{entry['concurrency']:<3}"
+                f"{entry['per_guild']:>10}"
+                f"{entry['queued']:>5}/{entry['max_queue']:<3}"
+            )
+
+        embed = discord.Embed(
+            title="🚦 Admission Control",
+            description="```\n" + "\n".join(lines) + "\n```",
+            color=discord.Color.blue(),
+        )
+
+        waiting = admission.queued_for_guild(ctx.guild.id)
+        if waiting:
+            value = "\n".join(
+                f"#{entry['position']} `!{entry['command']}` <@{entry['user_id']}> "
+                f"({format_ms(entry['waiting'])})"
+                for entry in waiting[:10]
+            )
+        else:
+            value = "Nothing queued"
+        embed.add_field(name="This Server's Queue", value=value, inline=False)
+        embed.set_footer(
+            text=f"{admission.running_total}/{admission.total} expensive commands "
+            f"running, {admission.queue_depth} queued"
+        )
+        await ctx.send(embed=embed)
+
+
+async def setup(bot):
+    await bot.add_cog(Perf(bot))
@@ -0,0 +1,354 @@
+import asyncio
+import logging
+import os
+from typing import Dict, Optional, Set
+
+import discord
+from discord.ext import commands
+
+from core.audit import context_fields
+from core.backup_replay import BackupReplay, RestoreCheckpoint, load_checkpoints
+from core.http_telemetry import current_guild, operation
+from core.permissions import requires_permissions
+
+logger = logging.getLogger(__name__)
+
+RESTORED_MESSAGES = "restore_messages_total"
+
+RESTORE_DIR = os.path.join("data", "restores")
+WEBHOOK_NAME = "Backup Restore"
+MAX_BACKUP_BYTES = 50 * 1024 * 1024
+# Seconds between edits of a restore's progress message
+PROGRESS_INTERVAL = 30.0
+
+
+class Restore(commands.Cog):
+    """Replays backups into channels through a webhook"""
+
+    def __init__(self, bot):
+        self.bot = bot
+        # Unfinished restores by channel, running or not
+        self._checkpoints: Dict[int, RestoreCheckpoint] = {}
+        self._jobs: Dict[int, asyncio.Task] = {}
+        # Progress reporters of restores started by a command
+        self._reports: Set[asyncio.Task] = set()
+        bot.metrics.describe(
+            RESTORED_MESSAGES, "counter", "Messages posted by backup restores"
+        )
+
+    async def cog_load(self):
+        self._checkpoints = await asyncio.to_thread(load_checkpoints, RESTORE_DIR)
+
+    async def cog_unload(self):
+        # Restores stopped by a shutdown are not paused and resume on the next start
+        tasks = [*self._jobs.values(), *self._reports]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    @commands.Cog.listener()
+    async def on_ready(self):
+        for checkpoint in list(self._checkpoints.values()):
+            channel = self.bot.get_channel(checkpoint.channel_id)
+            if not checkpoint.paused and isinstance(channel, discord.TextChannel):
+                self.start_restore(channel, checkpoint)
+
+    @commands.Cog.listener()
+    async def on_guild_channel_delete(self, channel):
+        if channel.id in self._checkpoints:
+            await self._discard(channel.id)
+
+    # --- Restore jobs
+
+    def start_restore(
+        self, channel: discord.TextChannel, checkpoint: RestoreCheckpoint
+    ) -> asyncio.Task:
+        """Run a restore in the background, once per channel at a time"""
+        task = self._jobs.get(channel.id)
+        if task is None or task.done():
+            checkpoint.paused = False
+            task = asyncio.create_task(self._restore(channel, checkpoint))
+            self._jobs[channel.id] = task
+        return task
+
+    async def _restore(
+        self, channel: discord.TextChannel, checkpoint: RestoreCheckpoint
+    ) -> Optional[str]:
+        """Replay the rest of a backup; returns why it stopped, if it did"""
+        current_guild.set(channel.guild.id)
+        try:
+            with operation("restore"), self.bot.audit.job(
+                "restore",
+                channel=channel,
+                actor_id=checkpoint.actor_id,
+                source=checkpoint.source,
+                resumed_from=checkpoint.restored,
+            ) as job:
+                try:
+                    webhook = await self._webhook(channel, create=True)
+                    replay = BackupReplay(checkpoint, webhook, self._posted)
+                    await replay.run()
+                finally:
+                    job.update(
+                        restored=checkpoint.restored,
+                        posts=checkpoint.posts,
+                        skipped=checkpoint.skipped,
+                    )
+                try:
+                    await webhook.delete(reason="Backup restore finished")
+                except discord.HTTPException:
+                    pass
+        except discord.Forbidden:
+            return "I need the Manage Webhooks permission there"
+        except (discord.HTTPException, OSError) as e:
+            logger.warning(f"Restore into #{channel.name} stopped: {e}")
+            return str(e)
+        finally:
+            self._jobs.pop(channel.id, None)
+
+        self._checkpoints.pop(channel.id, None)
+        await asyncio.to_thread(checkpoint.remove)
+        return None
+
+    def _posted(self, post):
+        self.bot.metrics.inc(RESTORED_MESSAGES, value=post.messages)
+
+    async def _webhook(
+        self, channel: discord.TextChannel, create: bool = False
+    ) -> Optional[discord.Webhook]:
+        """The restore webhook left by an interrupted run, or a new one"""
+        for webhook in await channel.webhooks():
+            if (
+                webhook.name == WEBHOOK_NAME
+                and webhook.token
+                and webhook.user == self.bot.user
+            ):
+                return webhook
+        if not create:
+            return None
+        return await channel.create_webhook(
+            name=WEBHOOK_NAME, reason="Restoring a backup"
+        )
+
+    async def _stop(self, channel_id: int):
+        task = self._jobs.get(channel_id)
+        if task is not None:
+            task.cancel()
+            await asyncio.wait([task])
+
+    async def _discard(self, channel_id: int):
+        await self._stop(channel_id)
+        # A restore that just finished has removed its checkpoint itself
+        checkpoint = self._checkpoints.pop(channel_id, None)
+        if checkpoint is not None:
+            await asyncio.to_thread(checkpoint.remove)
+
+    def _start_report(
+        self,
+        ctx,
+        channel: discord.TextChannel,
+        checkpoint: RestoreCheckpoint,
+        message: discord.Message,
+    ):
+        """Start a restore and report on it without holding up the command"""
+        task = self.start_restore(channel, checkpoint)
+        report = asyncio.create_task(
+            self._report(ctx, channel, checkpoint, task, message)
+        )
+        self._reports.add(report)
+        report.add_done_callback(self._reports.discard)
+
+    async def _report(
+        self,
+        ctx,
+        channel: discord.TextChannel,
+        checkpoint: RestoreCheckpoint,
+        task: asyncio.Task,
+        message: discord.Message,
+    ):
+        while not (await asyncio.wait([task], timeout=PROGRESS_INTERVAL))[0]:
+            try:
+                await message.edit(
+                    content=f"🔄 Restoring `{checkpoint.source}` into "
+                    f"{channel.mention}: {checkpoint.progress:.0%}, "
+                    f"{checkpoint.restored:,} messages so far."
+                )
+            except discord.HTTPException:
+                pass
+        if task.cancelled():
+            # Stopped by !restore stop or cancel, which report it themselves
+            return
+        error = task.result()
+        if error is None:
+            await ctx.send(
+                f"✅ Restored {checkpoint.restored:,} messages into {channel.mention} "
+                f"in {checkpoint.posts:,} posts."
+            )
+        else:
+            await ctx.send(
+                f"❌ Restore into {channel.mention} stopped after "
+                f"{checkpoint.restored:,} messages: {error}. "
+                f"Use `!restore resume {channel.mention}` to continue."
+            )
+
+    # --- Commands
+
+    @requires_permissions(administrator=True)
+    @commands.group(name="restore", invoke_without_command=True)
+    @commands.guild_only()
+    async def restore(self, ctx, channel: discord.TextChannel = None):
+        """Replay a backup file attached to the command into a channel"""
+        if channel is None:
+            channel = ctx.channel
+
+        if not ctx.message.attachments:
+            await ctx.send("❌ Attach a backup file made by `!backup` to the command.")
+            return
+        attachment = ctx.message.attachments[0]
+        if attachment.size > MAX_BACKUP_BYTES:
+            await ctx.send(
+                f"❌ Backups larger than {MAX_BACKUP_BYTES // 1024 // 1024} MB "
+                f"can't be restored."
+            )
+            return
+        if channel.id in self._checkpoints:
+            await ctx.send(
+                f"❌ A restore into {channel.mention} is already in progress. Use "
+                f"`!restore resume` to continue it or `!restore cancel` to drop it."
+            )
+            return
+
+        checkpoint = RestoreCheckpoint(
+            RESTORE_DIR, ctx.guild.id, channel.id, attachment.filename, ctx.author.id
+        )
+        try:
+            data = await attachment.read()
+        except discord.HTTPException:
+            await ctx.send("❌ Could not download the backup file.")
+            return
+        if await asyncio.to_thread(checkpoint.store_backup, data) is None:
+            await ctx.send(
+                f"❌ `{attachment.filename}` is not a backup made by `!backup`."
+            )
+            return
+        await asyncio.to_thread(checkpoint.save)
+        self._checkpoints[channel.id] = checkpoint
+
+        self.bot.audit.record(
+            "restore_started",
+            **context_fields(ctx, channel),
+            source=attachment.filename,
+            bytes=checkpoint.size,
+        )
+        message = await ctx.send(
+            f"🔄 Restoring `{attachment.filename}` into {channel.mention}... "
+            f"I'll report back when done, `!restore status` shows the progress."
+        )
+        self._start_report(ctx, channel, checkpoint, message)
+
+    @requires_permissions(administrator=True)
+    @restore.command(name="resume")
+    async def restore_resume(self, ctx, channel: discord.TextChannel = None):
+        """Continue a stopped restore where it left off"""
+        if channel is None:
+            channel = ctx.channel
+
+        checkpoint = self._checkpoints.get(channel.id)
+        if checkpoint is None:
+            await ctx.send(f"❌ There is no restore to resume in {channel.mention}.")
+            return
+        if channel.id in self._jobs:
+            await ctx.send(f"🔄 The restore into {channel.mention} is already running.")
+            return
+
+        message = await ctx.send(
+            f"🔄 Resuming the restore into {channel.mention} after "
+            f"{checkpoint.restored:,} messages..."
+        )
+        self._start_report(ctx, channel, checkpoint, message)
+
+    @requires_permissions(administrator=True)
+    @restore.command(name="stop")
+    async def restore_stop(self, ctx, channel: discord.TextChannel = None):
+        """Pause a running restore; it can be resumed later"""
+        if channel is None:
+            channel = ctx.channel
+
+        if channel.id not in self._jobs:
+            await ctx.send(f"❌ No restore is running in {channel.mention}.")
+            return
+
+        checkpoint = self._checkpoints[channel.id]
+        checkpoint.paused = True
+        await self._stop(channel.id)
+        await asyncio.to_thread(checkpoint.save)
+        await ctx.send(
+            f"⏸️ Restore into {channel.mention} stopped after "
+            f"{checkpoint.restored:,} messages. Use `!restore resume` to continue."
+        )
+
+    @requires_permissions(administrator=True)
+    @restore.command(name="cancel")
+    async def restore_cancel(self, ctx, channel: discord.TextChannel = None):
+        """Stop a restore and forget its progress"""
+        if channel is None:
+            channel = ctx.channel
+
+        checkpoint = self._checkpoints.get(channel.id)
+        if checkpoint is None:
+            await ctx.send(f"❌ There is no restore in {channel.mention}.")
+            return
+
+        await self._discard(channel.id)
+        try:
+            webhook = await self._webhook(channel)
+            if webhook is not None:
+                await webhook.delete(reason="Backup restore cancelled")
+        except discord.HTTPException:
+            pass
+        self.bot.audit.record(
+            "restore_cancelled",
+            **context_fields(ctx, channel),
+            restored=checkpoint.restored,
+        )
+        await ctx.send(
+            f"🗑️ Restore into {channel.mention} cancelled after "
+            f"{checkpoint.restored:,} messages."
+        )
+
+    @requires_permissions(administrator=True)
+    @restore.command(name="status")
+    async def restore_status(self, ctx):
+        """Show the progress of this server's restores"""
+        checkpoints = [
+            checkpoint
+            for checkpoint in self._checkpoints.values()
+            if checkpoint.guild_id == ctx.guild.id
+        ]
+        if not checkpoints:
+            await ctx.send("❌ No restores are in progress.")
+            return
+
+        embed = discord.Embed(title="📥 Backup Restores", color=discord.Color.blue())
+        for checkpoint in checkpoints:
+            channel = self.bot.get_channel(checkpoint.channel_id)
+            if channel is None:
+                continue
+            if checkpoint.channel_id in self._jobs:
+                state = "🔄 Running"
+            elif checkpoint.paused:
+                state = "⏸️ Stopped"
+            else:
+                state = "❌ Failed, use `!restore resume`"
+            embed.add_field(
+                name=f"#{channel.name}",
+                value=f"{state}: {checkpoint.progress:.0%} of `{checkpoint.source}`\n"
+                f"Messages: {checkpoint.restored:,} in {checkpoint.posts:,} posts"
+                f" ({checkpoint.skipped:,} skipped)",
+                inline=False,
+            )
+        await ctx.send(embed=embed)
+
+
+async def setup(bot):
+    await bot.add_cog(Restore(bot))
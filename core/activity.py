@@ -0,0 +1,159 @@
+import struct
+import zlib
+from array import array
+from bisect import bisect_left
+from datetime import date, timedelta
+from typing import List, Optional
+
+try:
+    import numpy as np
+except ImportError:  # optional, vectorizes the boundary search
+    np = None
+
+DAY = 86_400
+HOUR = 3_600
+WEEKDAYS = ("Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun")
+SHADES = " ░▒▓█"
+SPARKS = "▁▂▃▄▅▆▇█"
+
+# 1970-01-01 was a Thursday
+_EPOCH_WEEKDAY = 3
+
+
+def timestamp_column(values=()) -> array:
+    """Compact column of unix timestamps (8 bytes per message)"""
+    return array("d", values)
+
+
+class ActivityHistogram:
+    """Message counts by weekday and hour, and per day, for one time range"""
+
+    def __init__(self, heatmap: List[List[int]], daily: List[int], first_day: date):
+        self.heatmap = heatmap
+        self.daily = daily
+        self.first_day = first_day
+        self.total = sum(daily)
+
+    @property
+    def busiest_hour(self) -> int:
+        hours = [sum(row[hour] for row in self.heatmap) for hour in range(24)]
+        return max(range(24), key=hours.__getitem__)
+
+    @property
+    def busiest_weekday(self) -> str:
+        totals = [sum(row) for row in self.heatmap]
+        return WEEKDAYS[max(range(7), key=totals.__getitem__)]
+
+    @property
+    def busiest_day(self) -> Optional[date]:
+        if not self.total:
+            return None
+        index = max(range(len(self.daily)), key=self.daily.__getitem__)
+        return self.first_day + timedelta(days=index)
+
+
+def bucket_activity(timestamps: array, since: float, until: float) -> ActivityHistogram:
+    """Count UTC timestamps in ``[since, until)`` by weekday/hour and by day.
+
+    ``timestamps`` must be sorted oldest first, as the mirror and
+    oldest-first history return them. Hourly counts come from binary
+    searches of the hour boundaries (``numpy.searchsorted`` when numpy is
+    installed), so the cost depends on the length of the range rather than
+    the number of messages.
+    """
+    first_hour = int(since // HOUR)
+    last_hour = int((until - 1) // HOUR)
+    boundaries = [since]
+    boundaries.extend(hour * HOUR for hour in range(first_hour + 1, last_hour + 1))
+    boundaries.append(until)
+
+    if np is not None and len(timestamps):
+        values = np.frombuffer(timestamps, dtype=np.float64)
+        hourly = np.diff(np.searchsorted(values, boundaries, side="left")).tolist()
+    else:
+        edges = [bisect_left(timestamps, boundary) for boundary in boundaries]
+        hourly = [end - start for start, end in zip(edges, edges[1:])]
+
+    first_day = first_hour // 24
+    week = [0] * 168
+    daily = [0] * (last_hour // 24 - first_day + 1)
+    for hour, count in enumerate(hourly, start=first_hour):
+        if count:
+            day = hour // 24
+            week[(day + _EPOCH_WEEKDAY) % 7 * 24 + hour % 24] += count
+            daily[day - first_day] += count
+
+    heatmap = [week[weekday * 24 : weekday * 24 + 24] for weekday in range(7)]
+    return ActivityHistogram(heatmap, daily, date(1970, 1, 1) + timedelta(days=first_day))
+
+
+def _shade(value: int, peak: int, levels: str) -> str:
+    if not value or not peak:
+        return levels[0]
+    return levels[min(len(levels) - 1, 1 + (value * (len(levels) - 1) - 1) // peak)]
+
+
+def render_heatmap_text(histogram: ActivityHistogram) -> str:
+    """Weekday by hour grid drawn with shade characters"""
+    peak = max(max(row) for row in histogram.heatmap)
+    lines = ["    " + "".join(f"{hour:<6}" for hour in range(0, 24, 6))]
+    for weekday, row in zip(WEEKDAYS, histogram.heatmap):
+        lines.append(f"{weekday} " + "".join(_shade(value, peak, SHADES) for value in row))
+    return "\n".join(lines)
+
+
+def render_trend_text(histogram: ActivityHistogram, width: int = 60) -> str:
+    """Per-day counts as a sparkline, merging days when there are too many"""
+    daily = histogram.daily
+    step = max(1, -(-len(daily) // width))
+    buckets = [sum(daily[i : i + step]) for i in range(0, len(daily), step)]
+    peak = max(buckets) if buckets else 0
+    line = "".join(
+        _shade(value, peak, SPARKS) if value else SPARKS[0] for value in buckets
+    )
+    unit = "day" if step == 1 else f"{step} days"
+    return f"{line}\n(one bar per {unit}, oldest first)"
+
+
+def _png_chunk(kind: bytes, data: bytes) -> bytes:
+    return (
+        struct.pack(">I", len(data))
+        + kind
+        + data
+        + struct.pack(">I", zlib.crc32(kind + data) & 0xFFFFFFFF)
+    )
+
+
+def render_heatmap_png(
+    histogram: ActivityHistogram,
+    cell: int = 20,
+    gap: int = 2,
+    low=(47, 49, 54),
+    high=(88, 101, 242),
+    background=(32, 34, 37),
+) -> bytes:
+    """Weekday (rows) by hour (columns) heatmap as a PNG, without dependencies"""
+    peak = max(max(row) for row in histogram.heatmap) or 1
+    width = 24 * (cell + gap) + gap
+    height = 7 * (cell + gap) + gap
+    background = bytes(background)
+
+    rows = []
+    for weekday in range(7):
+        line = bytearray(background * gap)
+        for value in histogram.heatmap[weekday]:
+            t = value / peak
+            color = bytes(round(a + (b - a) * t) for a, b in zip(low, high))
+            line += color * cell + background * gap
+        pixel_row = b"\x00" + bytes(line)
+        rows.extend([b"\x00" + background * width] * (gap if weekday == 0 else 0))
+        rows.extend([pixel_row] * cell)
+        rows.extend([b"\x00" + background * width] * gap)
+
+    header = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + _png_chunk(b"IHDR", header)
+        + _png_chunk(b"IDAT", zlib.compress(b"".join(rows), 6))
+        + _png_chunk(b"IEND", b"")
+    )
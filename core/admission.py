@@ -0,0 +1,247 @@
+import asyncio
+import logging
+import os
+import time
+from collections import Counter, deque
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from discord.ext import commands
+
+from core.metrics import MetricsRegistry
+
+logger = logging.getLogger(__name__)
+
+ADMISSION_RUNNING = "admission_running"
+ADMISSION_QUEUED = "admission_queued"
+ADMISSION_REJECTED = "admission_rejected_total"
+ADMISSION_WAIT = "admission_wait_seconds"
+
+
+class AdmissionLimit:
+    """How many runs of one command may be in flight and waiting"""
+
+    def __init__(
+        self,
+        concurrency: int,
+        per_guild: int = 1,
+        max_queue: int = 20,
+    ):
+        self.concurrency = concurrency
+        self.per_guild = per_guild
+        self.max_queue = max_queue
+
+    def __repr__(self):
+        return f"{self.concurrency}/{self.per_guild}/{self.max_queue}"
+
+
+# Commands that page full channel histories or delete without bounds
+DEFAULT_LIMITS = {
+    "channelstats": AdmissionLimit(concurrency=4, per_guild=1, max_queue=20),
+    "activity": AdmissionLimit(concurrency=4, per_guild=1, max_queue=20),
+    "backup": AdmissionLimit(concurrency=2, per_guild=1, max_queue=10),
+    "clearall": AdmissionLimit(concurrency=2, per_guild=1, max_queue=10),
+}
+
+
+def limits_from_env(defaults: Dict[str, AdmissionLimit] = DEFAULT_LIMITS):
+    """Apply ``ADMISSION_<COMMAND>=concurrency/per_guild/max_queue`` overrides"""
+    limits = dict(defaults)
+    prefix = "ADMISSION_"
+    for key, value in os.environ.items():
+        if not key.startswith(prefix) or key == "ADMISSION_TOTAL":
+            continue
+        try:
+            numbers = [int(part) for part in value.split("/")]
+            limits[key[len(prefix):].lower()] = AdmissionLimit(*numbers)
+        except (TypeError, ValueError):
+            logger.warning(f"Ignoring invalid admission limit {key}={value!r}")
+    return limits
+
+
+class AdmissionRejected(commands.CommandError):
+    """Raised when an expensive command cannot even be queued"""
+
+
+class _Waiter:
+    __slots__ = ("command", "guild_id", "user_id", "future", "enqueued")
+
+    def __init__(self, command: str, guild_id: int, user_id: int):
+        self.command = command
+        self.guild_id = guild_id
+        self.user_id = user_id
+        self.future = asyncio.get_running_loop().create_future()
+        self.enqueued = time.monotonic()
+
+
+class AdmissionController:
+    """Bounds how many expensive commands run at once.
+
+    Each limited command has a concurrency limit and a per-guild limit,
+    and all limited commands share ``total`` slots. Callers that cannot
+    start right away wait in one FIFO queue; a waiter whose guild is at its
+    quota is skipped rather than blocking the guilds behind it. Commands
+    without a limit never touch the controller.
+    """
+
+    def __init__(
+        self,
+        limits: Dict[str, AdmissionLimit],
+        metrics: MetricsRegistry,
+        total: int = 6,
+        per_guild_queue: int = 3,
+    ):
+        self.limits = limits
+        self.metrics = metrics
+        self.total = total
+        self.per_guild_queue = per_guild_queue
+
+        self._queue: deque = deque()
+        self._running: Counter = Counter()
+        self._running_by_guild: Counter = Counter()
+
+        metrics.describe(ADMISSION_RUNNING, "gauge", "Limited commands running")
+        metrics.describe(ADMISSION_QUEUED, "gauge", "Limited commands waiting to run")
+        metrics.describe(
+            ADMISSION_REJECTED, "counter", "Commands turned away, by command and reason"
+        )
+        metrics.describe(
+            ADMISSION_WAIT, "histogram", "Time limited commands spent queued"
+        )
+
+    def is_limited(self, command: str) -> bool:
+        return command in self.limits
+
+    def _can_start(self, command: str, guild_id: int) -> bool:
+        limit = self.limits[command]
+        return (
+            sum(self._running.values()) < self.total
+            and self._running[command] < limit.concurrency
+            and self._running_by_guild[(command, guild_id)] < limit.per_guild
+        )
+
+    def _start(self, command: str, guild_id: int):
+        self._running[command] += 1
+        self._running_by_guild[(command, guild_id)] += 1
+
+    def _dispatch(self):
+        for waiter in list(self._queue):
+            if sum(self._running.values()) >= self.total:
+                break
+            if waiter.future.done() or not self._can_start(
+                waiter.command, waiter.guild_id
+            ):
+                continue
+            self._queue.remove(waiter)
+            self._start(waiter.command, waiter.guild_id)
+            waiter.future.set_result(None)
+        self._update_gauges()
+
+    def _update_gauges(self):
+        queued = Counter(waiter.command for waiter in self._queue)
+        for command in self.limits:
+            labels = {"command": command}
+            self.metrics.set_gauge(ADMISSION_RUNNING, self._running[command], labels)
+            self.metrics.set_gauge(ADMISSION_QUEUED, queued[command], labels)
+
+    def _reject(self, command: str, reason: str, message: str):
+        self.metrics.inc(ADMISSION_REJECTED, {"command": command, "reason": reason})
+        raise AdmissionRejected(message)
+
+    def position(self, waiter: _Waiter) -> int:
+        """1-based position of a waiter in the queue"""
+        return self._queue.index(waiter) + 1
+
+    async def acquire(
+        self,
+        command: str,
+        guild_id: int,
+        user_id: int,
+        notify: Optional[Callable[[int], Awaitable[None]]] = None,
+    ):
+        """Wait for a slot for ``command``; ``notify`` is told the queue position"""
+        limit = self.limits[command]
+        if not self._queue and self._can_start(command, guild_id):
+            self._start(command, guild_id)
+            self._update_gauges()
+            self.metrics.observe(ADMISSION_WAIT, 0.0, {"command": command})
+            return
+
+        if sum(1 for w in self._queue if w.command == command) >= limit.max_queue:
+            self._reject(
+                command,
+                "queue_full",
+                f"`!{command}` is busy and its queue is full, try again in a few minutes.",
+            )
+        if sum(1 for w in self._queue if w.guild_id == guild_id) >= self.per_guild_queue:
+            self._reject(
+                command,
+                "guild_quota",
+                "This server already has too many expensive commands waiting.",
+            )
+
+        waiter = _Waiter(command, guild_id, user_id)
+        self._queue.append(waiter)
+        self._dispatch()
+
+        try:
+            if not waiter.future.done() and notify is not None:
+                await notify(self.position(waiter))
+            await waiter.future
+        except BaseException:
+            if waiter.future.done() and not waiter.future.cancelled():
+                # Admitted while being cancelled, give the slot back
+                self.release(command, guild_id)
+            elif waiter in self._queue:
+                self._queue.remove(waiter)
+                self._dispatch()
+            raise
+
+        self.metrics.observe(
+            ADMISSION_WAIT, time.monotonic() - waiter.enqueued, {"command": command}
+        )
+
+    def release(self, command: str, guild_id: int):
+        """Free the slot taken by a finished command"""
+        self._running[command] = max(0, self._running[command] - 1)
+        key = (command, guild_id)
+        self._running_by_guild[key] = max(0, self._running_by_guild[key] - 1)
+        if not self._running_by_guild[key]:
+            del self._running_by_guild[key]
+        self._dispatch()
+
+    def snapshot(self) -> List[dict]:
+        """Running and queued counts per limited command"""
+        queued = Counter(waiter.command for waiter in self._queue)
+        return [
+            {
+                "command": command,
+                "running": self._running[command],
+                "concurrency": limit.concurrency,
+                "per_guild": limit.per_guild,
+                "queued": queued[command],
+                "max_queue": limit.max_queue,
+            }
+            for command, limit in self.limits.items()
+        ]
+
+    def queued_for_guild(self, guild_id: int) -> List[dict]:
+        """Queue entries of one guild, with their overall positions"""
+        now = time.monotonic()
+        return [
+            {
+                "command": waiter.command,
+                "user_id": waiter.user_id,
+                "position": position,
+                "waiting": now - waiter.enqueued,
+            }
+            for position, waiter in enumerate(self._queue, start=1)
+            if waiter.guild_id == guild_id
+        ]
+
+    @property
+    def running_total(self) -> int:
+        return sum(self._running.values())
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._queue)
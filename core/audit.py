@@ -0,0 +1,290 @@
+import argparse
+import gzip
+import heapq
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import shutil
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Iterator, List, Optional
+
+from core.metrics import MetricsRegistry
+
+logger = logging.getLogger(__name__)
+
+AUDIT_EVENTS = "audit_events_total"
+AUDIT_DROPPED = "audit_events_dropped_total"
+
+AUDIT_FILE = "audit.jsonl"
+
+
+def new_job_id() -> str:
+    """Return a short random id that ties related audit events together"""
+    return uuid.uuid4().hex[:12]
+
+
+def _gzip_namer(name: str) -> str:
+    return name + ".gz"
+
+
+def _gzip_rotator(source: str, dest: str):
+    with open(source, "rb") as f_in, gzip.open(dest, "wb") as f_out:
+        shutil.copyfileobj(f_in, f_out)
+    os.remove(source)
+
+
+class _JsonLineFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        return json.dumps(record.msg, separators=(",", ":"), default=str)
+
+
+class _BoundedQueueHandler(logging.handlers.QueueHandler):
+    """Queue handler that drops events instead of blocking when full"""
+
+    def __init__(self, event_queue: queue.Queue, on_drop):
+        super().__init__(event_queue)
+        self.on_drop = on_drop
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Serialization happens on the writer thread, not the event loop
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.on_drop()
+
+
+class AuditJob:
+    """Fields of one audited operation, filled in while it runs"""
+
+    def __init__(self, action: str, fields: dict):
+        self.id = new_job_id()
+        self.action = action
+        self.fields = fields
+        self.status = "ok"
+        self.started = time.perf_counter()
+
+    def update(self, **fields):
+        self.fields.update(fields)
+
+
+class AuditLog:
+    """Structured audit trail written by a background thread.
+
+    ``record`` only builds a dict and puts it on a bounded queue, so it is
+    safe to call from the event loop at any rate. A ``QueueListener``
+    thread serializes the events to JSON lines; full files are rotated
+    and gzip-compressed. When the queue is full, events are dropped and
+    counted rather than growing memory or blocking.
+    """
+
+    def __init__(
+        self,
+        directory: str = os.path.join("logs", "audit"),
+        metrics: Optional[MetricsRegistry] = None,
+        max_bytes: int = 10 * 1024 * 1024,
+        backup_count: int = 20,
+        queue_size: int = 10_000,
+    ):
+        self.directory = Path(directory)
+        self.metrics = metrics
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.dropped = 0
+
+        self._queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._logger = logging.getLogger(f"audit.{id(self)}")
+        self._logger.propagate = False
+        self._logger.setLevel(logging.INFO)
+        self._logger.addHandler(_BoundedQueueHandler(self._queue, self._dropped))
+        self._listener: Optional[logging.handlers.QueueListener] = None
+        self._subscribers: List[Callable[[dict], None]] = []
+
+        if metrics is not None:
+            metrics.describe(AUDIT_EVENTS, "counter", "Audit events recorded, by event")
+            metrics.describe(
+                AUDIT_DROPPED, "counter", "Audit events dropped because the queue was full"
+            )
+
+    def start(self):
+        """Start the background writer"""
+        if self._listener is not None:
+            return
+        self.directory.mkdir(parents=True, exist_ok=True)
+        handler = logging.handlers.RotatingFileHandler(
+            self.directory / AUDIT_FILE,
+            maxBytes=self.max_bytes,
+            backupCount=self.backup_count,
+            encoding="utf-8",
+        )
+        handler.namer = _gzip_namer
+        handler.rotator = _gzip_rotator
+        handler.setFormatter(_JsonLineFormatter())
+        self._listener = logging.handlers.QueueListener(self._queue, handler)
+        self._listener.start()
+
+    def close(self):
+        """Write out queued events and stop the writer"""
+        if self._listener is None:
+            return
+        self._listener.stop()
+        for handler in self._listener.handlers:
+            handler.close()
+        self._listener = None
+
+    def _dropped(self):
+        self.dropped += 1
+        if self.metrics is not None:
+            self.metrics.inc(AUDIT_DROPPED)
+
+    def subscribe(self, callback: Callable[[dict], None]):
+        """Also pass every event to ``callback`` on the event loop; keep it cheap"""
+        self._subscribers.append(callback)
+
+    def record(self, event: str, **fields):
+        """Queue one audit event; never blocks"""
+        entry = {"ts": datetime.now(timezone.utc).isoformat(), "event": event}
+        entry.update(fields)
+        if self.metrics is not None:
+            self.metrics.inc(AUDIT_EVENTS, {"event": event})
+        for callback in self._subscribers:
+            callback(entry)
+        self._logger.info(entry)
+
+    @contextmanager
+    def job(self, action: str, ctx=None, channel=None, **fields) -> Iterator[AuditJob]:
+        """Audit an operation: one event with its outcome and duration at the end"""
+        fields.update(context_fields(ctx, channel))
+        job = AuditJob(action, fields)
+        try:
+            yield job
+        except BaseException as e:
+            job.status = type(e).__name__
+            raise
+        finally:
+            self.record(
+                action,
+                **job.fields,
+                job=job.id,
+                status=job.status,
+                duration=round(time.perf_counter() - job.started, 3),
+            )
+
+
+def context_fields(ctx=None, channel=None) -> dict:
+    """Actor, guild and channel fields for an audit event"""
+    fields = {}
+    if ctx is not None:
+        fields["actor_id"] = ctx.author.id
+        fields["actor"] = str(ctx.author)
+        if ctx.guild is not None:
+            fields["guild_id"] = ctx.guild.id
+        channel = channel or ctx.channel
+    if channel is not None:
+        fields["channel_id"] = channel.id
+        fields["channel"] = getattr(channel, "name", None)
+        guild = getattr(channel, "guild", None)
+        if guild is not None:
+            fields["guild_id"] = guild.id
+    return fields
+
+
+def _audit_files(directory: Path):
+    """Audit files from oldest to newest"""
+    rotated = []
+    for path in directory.glob(f"{AUDIT_FILE}.*.gz"):
+        try:
+            rotated.append((int(path.name[len(AUDIT_FILE) + 1 : -3]), path))
+        except ValueError:
+            continue
+    files = [path for _, path in sorted(rotated, reverse=True)]
+    current = directory / AUDIT_FILE
+    if current.exists():
+        files.append(current)
+    return files
+
+
+def query_audit(
+    directory: str = os.path.join("logs", "audit"),
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    **filters,
+) -> Iterator[dict]:
+    """Stream audit events, oldest first, matching a time range and fields.
+
+    Events of every cluster's subdirectory are merged into one stream.
+
+    ``filters`` match event fields exactly, e.g. ``event="clearold"``,
+    ``actor_id=123`` or ``job="3f2a..."``.
+    """
+    since_text = since.isoformat() if since else None
+    until_text = until.isoformat() if until else None
+
+    def read(files: List[Path]) -> Iterator[dict]:
+        for path in files:
+            opener = gzip.open if path.suffix == ".gz" else open
+            with opener(path, "rt", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue
+                    if since_text and entry.get("ts", "") < since_text:
+                        continue
+                    if until_text and entry.get("ts", "") >= until_text:
+                        continue
+                    if all(
+                        str(entry.get(key)) == str(value)
+                        for key, value in filters.items()
+                    ):
+                        yield entry
+
+    # Each cluster writes its own subdirectory; interleave them by time
+    root = Path(directory)
+    directories = [root] + sorted(path for path in root.glob("*") if path.is_dir())
+    yield from heapq.merge(
+        *(read(_audit_files(path)) for path in directories),
+        key=lambda entry: entry.get("ts", ""),
+    )
+
+
+def main():
+    """Query the audit log from the command line"""
+    parser = argparse.ArgumentParser(description="Search the bot's audit log")
+    parser.add_argument("--dir", default=os.path.join("logs", "audit"))
+    parser.add_argument("--since", type=datetime.fromisoformat)
+    parser.add_argument("--until", type=datetime.fromisoformat)
+    parser.add_argument(
+        "--where",
+        action="append",
+        default=[],
+        metavar="FIELD=VALUE",
+        help="e.g. event=clearold, actor_id=123, guild_id=456, job=3f2a9c...",
+    )
+    parser.add_argument("--limit", type=int, default=0)
+    args = parser.parse_args()
+
+    def aware(value):
+        if value is not None and value.tzinfo is None:
+            return value.replace(tzinfo=timezone.utc)
+        return value
+
+    filters = dict(item.split("=", 1) for item in args.where)
+    shown = 0
+    for entry in query_audit(args.dir, aware(args.since), aware(args.until), **filters):
+        print(json.dumps(entry, ensure_ascii=False))
+        shown += 1
+        if args.limit and shown >= args.limit:
+            break
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,454 @@
+import asyncio
+import json
+import logging
+import re
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+import discord
+
+from core.config_store import atomic_write_json
+
+logger = logging.getLogger(__name__)
+
+BACKUP_VERSION = 1
+# Longest text Discord accepts in one message
+MESSAGE_CHARS = 2000
+# Discord shows an author's messages under one header within 7 minutes, so
+# joining them into one post looks the same in the restored channel
+BATCH_GAP = 7 * 60
+READ_MESSAGES = 500
+# Posts prepared ahead of the sender
+QUEUE_POSTS = 200
+CHECKPOINT_SECONDS = 5.0
+SEND_ATTEMPTS = 4
+RETRY_DELAY = 5.0
+
+# "[2024-05-01T12:00:00+00:00] author: content" lines of text backups
+_TEXT_MESSAGE = re.compile(r"^\[(\d{4}-\d\d-\d\dT[^\]]+)\] (.+?): ?(.*)$")
+_TEXT_ATTACHMENTS = "  Attachments: "
+_RESERVED_NAME = re.compile(r"discord|clyde", re.IGNORECASE)
+
+
+class BackupMessage:
+    __slots__ = ("name", "avatar", "content", "timestamp", "end")
+
+    def __init__(
+        self,
+        name: str,
+        avatar: Optional[str],
+        content: str,
+        timestamp: Optional[float],
+        end: int,
+    ):
+        self.name = name
+        self.avatar = avatar
+        self.content = content
+        self.timestamp = timestamp
+        # File offset just past this message, where a resumed restore starts
+        self.end = end
+
+
+def _timestamp(value) -> Optional[float]:
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except (TypeError, ValueError):
+        return None
+
+
+def _content(text: str, attachments) -> str:
+    # Files can't be uploaded again cheaply, their links are posted instead
+    return "\n".join(part for part in (text, *attachments) if part)
+
+
+def webhook_name(name: str) -> str:
+    """Author name for a post; Discord refuses names containing these words"""
+    name = _RESERVED_NAME.sub(lambda m: f"{m[0][:-1]}\u200b{m[0][-1]}", name)
+    return name.strip()[:80] or "Unknown"
+
+
+# --- Reading backups
+
+
+def backup_format(path) -> Optional[str]:
+    """``"jsonl"`` for backups from ``!backup``, ``"text"`` for older ones"""
+    with open(path, "rb") as f:
+        first = f.readline(4096).strip()
+    if first.startswith(b"Channel Backup: #"):
+        return "text"
+    try:
+        header = json.loads(first)
+    except ValueError:
+        return None
+    if isinstance(header, dict) and header.get("backup") == BACKUP_VERSION:
+        return "jsonl"
+    return None
+
+
+def read_backup(
+    path, fmt: str, offset: int = 0, limit: int = READ_MESSAGES
+) -> Tuple[List[BackupMessage], bool]:
+    """Read up to ``limit`` messages from byte ``offset``; run in a thread.
+
+    Returns the messages, oldest first, and whether the end of the file was
+    reached. Only one chunk is held in memory however large the backup is.
+    """
+    reader = _read_jsonl if fmt == "jsonl" else _read_text
+    with open(path, "rb") as f:
+        f.seek(offset)
+        return reader(f, limit)
+
+
+def _read_jsonl(f, limit: int) -> Tuple[List[BackupMessage], bool]:
+    messages = []
+    while len(messages) < limit:
+        line = f.readline()
+        if not line:
+            return messages, True
+        try:
+            entry = json.loads(line)
+        except ValueError:
+            continue
+        if not isinstance(entry, dict) or "content" not in entry:
+            continue
+        messages.append(
+            BackupMessage(
+                entry.get("name") or entry.get("author") or "Unknown",
+                entry.get("avatar"),
+                _content(entry["content"], entry.get("attachments", ())),
+                _timestamp(entry.get("timestamp")),
+                f.tell(),
+            )
+        )
+    return messages, False
+
+
+def _read_text(f, limit: int) -> Tuple[List[BackupMessage], bool]:
+    messages = []
+    current = None
+    while True:
+        start = f.tell()
+        line = f.readline()
+        if not line:
+            break
+        text = line.decode("utf-8", errors="replace").rstrip("\r\n")
+        match = _TEXT_MESSAGE.match(text)
+        if match:
+            if current is not None:
+                messages.append(_text_message(*current, start))
+                if len(messages) >= limit:
+                    return messages, False
+            current = (match[2], [match[3]], [], _timestamp(match[1]))
+        elif current is not None:
+            if text.startswith(_TEXT_ATTACHMENTS):
+                current[2].extend(text[len(_TEXT_ATTACHMENTS) :].split(", "))
+            else:
+                current[1].append(text)
+    if current is not None:
+        messages.append(_text_message(*current, f.tell()))
+    return messages, True
+
+
+def _text_message(name, lines, attachments, timestamp, end) -> BackupMessage:
+    # Messages are separated by a blank line
+    text = "\n".join(lines).rstrip("\n")
+    return BackupMessage(name, None, _content(text, attachments), timestamp, end)
+
+
+# --- Batching
+
+
+class ReplayPost:
+    """One webhook message: consecutive messages of one author joined together"""
+
+    __slots__ = (
+        "name",
+        "avatar",
+        "parts",
+        "length",
+        "last_time",
+        "end",
+        "messages",
+        "skipped",
+    )
+
+    def __init__(self, message: BackupMessage, text: str, last: bool = True):
+        self.name = webhook_name(message.name)
+        self.avatar = message.avatar
+        self.parts = [text]
+        self.length = len(text)
+        self.last_time = message.timestamp
+        # Pieces of a long message only count once its last piece is sent
+        self.end = message.end if last else None
+        self.messages = 1 if last else 0
+        # Messages without text that end up behind this post
+        self.skipped = 0
+
+    @property
+    def content(self) -> str:
+        return "\n".join(self.parts)
+
+    def accepts(self, message: BackupMessage, text: str) -> bool:
+        if webhook_name(message.name) != self.name or message.avatar != self.avatar:
+            return False
+        if self.length + 1 + len(text) > MESSAGE_CHARS:
+            return False
+        if self.last_time is None or message.timestamp is None:
+            return True
+        return 0 <= message.timestamp - self.last_time <= BATCH_GAP
+
+    def add(self, message: BackupMessage, text: str):
+        self.parts.append(text)
+        self.length += 1 + len(text)
+        self.last_time = message.timestamp
+        self.end = message.end
+        self.messages += 1
+
+
+class PostBatcher:
+    """Turns backup messages into as few posts as they look the same in"""
+
+    def __init__(self):
+        self._open: Optional[ReplayPost] = None
+        # Skipped messages not yet behind a post
+        self.skipped = 0
+
+    def add(self, message: BackupMessage) -> List[ReplayPost]:
+        """Add a message and return the posts it completed"""
+        text = message.content
+        if not text:
+            # Embeds and system messages have nothing to post
+            if self._open is None:
+                self.skipped += 1
+            else:
+                self._open.skipped += 1
+                self._open.end = message.end
+            return []
+
+        open_post = self._open
+        if (
+            open_post is not None
+            and len(text) <= MESSAGE_CHARS
+            and open_post.accepts(message, text)
+        ):
+            open_post.add(message, text)
+            return []
+
+        ready = [open_post] if open_post is not None else []
+        pieces = [
+            text[start : start + MESSAGE_CHARS]
+            for start in range(0, len(text), MESSAGE_CHARS)
+        ]
+        ready.extend(ReplayPost(message, piece, last=False) for piece in pieces[:-1])
+        self._open = ReplayPost(message, pieces[-1])
+        self._open.skipped, self.skipped = self.skipped, 0
+        return ready
+
+    def flush(self) -> List[ReplayPost]:
+        ready = [self._open] if self._open is not None else []
+        self._open = None
+        return ready
+
+
+# --- Checkpoints
+
+
+class RestoreCheckpoint:
+    """Progress of one restore, saved next to the restore's copy of the backup"""
+
+    FIELDS = (
+        "guild_id",
+        "channel_id",
+        "source",
+        "format",
+        "size",
+        "offset",
+        "restored",
+        "posts",
+        "skipped",
+        "paused",
+        "actor_id",
+        "started_at",
+    )
+
+    def __init__(
+        self, directory, guild_id: int, channel_id: int, source: str, actor_id: int
+    ):
+        self.directory = Path(directory)
+        self.guild_id = guild_id
+        self.channel_id = channel_id
+        self.source = source
+        self.actor_id = actor_id
+        self.format = None
+        self.size = 0
+        self.offset = 0
+        self.restored = 0
+        self.posts = 0
+        self.skipped = 0
+        self.paused = False
+        self.started_at = time.time()
+
+    @property
+    def path(self) -> Path:
+        return self.directory / f"{self.channel_id}.json"
+
+    @property
+    def backup_path(self) -> Path:
+        return self.directory / f"{self.channel_id}.backup"
+
+    @property
+    def progress(self) -> float:
+        return self.offset / self.size if self.size else 1.0
+
+    def store_backup(self, data: bytes) -> Optional[str]:
+        """Keep a copy of the backup for the restore; run in a thread"""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.backup_path.write_bytes(data)
+        self.size = len(data)
+        self.format = backup_format(self.backup_path)
+        if self.format is None:
+            self.backup_path.unlink()
+        return self.format
+
+    def to_dict(self) -> dict:
+        return {field: getattr(self, field) for field in self.FIELDS}
+
+    def save(self):
+        atomic_write_json(self.path, self.to_dict())
+
+    def remove(self):
+        for path in (self.path, self.backup_path):
+            path.unlink(missing_ok=True)
+
+    @classmethod
+    def load(cls, path) -> "RestoreCheckpoint":
+        path = Path(path)
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        checkpoint = cls(
+            path.parent,
+            data["guild_id"],
+            data["channel_id"],
+            data["source"],
+            data["actor_id"],
+        )
+        for field in cls.FIELDS:
+            setattr(checkpoint, field, data[field])
+        return checkpoint
+
+
+def load_checkpoints(directory) -> Dict[int, RestoreCheckpoint]:
+    """Read the checkpoints of unfinished restores; run in a thread"""
+    checkpoints = {}
+    for path in Path(directory).glob("*.json"):
+        try:
+            checkpoint = RestoreCheckpoint.load(path)
+        except (OSError, ValueError, KeyError) as e:
+            logger.error(f"Skipping unreadable restore checkpoint {path}: {e}")
+            continue
+        if checkpoint.backup_path.exists():
+            checkpoints[checkpoint.channel_id] = checkpoint
+    return checkpoints
+
+
+# --- Replay
+
+
+class BackupReplay:
+    """Posts a backup through a webhook, continuing from its checkpoint.
+
+    A reader task parses the file a chunk at a time on a thread and joins
+    messages into posts ahead of the sender, which posts them one by one in
+    file order. Posts to one webhook share one rate limit bucket, and the
+    webhook adapter waits out the bucket announced in each response, so
+    sending in parallel would only queue up and reorder messages. Server
+    errors and 429s are retried with a growing delay. The checkpoint is
+    saved every few seconds and when the replay ends or is stopped.
+    """
+
+    def __init__(
+        self,
+        checkpoint: RestoreCheckpoint,
+        webhook: discord.Webhook,
+        on_post: Optional[Callable[[ReplayPost], None]] = None,
+    ):
+        self.checkpoint = checkpoint
+        self.webhook = webhook
+        self.on_post = on_post
+        self._error: Optional[BaseException] = None
+
+    async def run(self):
+        checkpoint = self.checkpoint
+        queue: asyncio.Queue = asyncio.Queue(QUEUE_POSTS)
+        reader = asyncio.create_task(self._read(queue))
+        saved = time.monotonic()
+        try:
+            while True:
+                post = await queue.get()
+                if post is None:
+                    break
+                if await self._send(post):
+                    checkpoint.posts += 1
+                    checkpoint.restored += post.messages
+                    if self.on_post is not None:
+                        self.on_post(post)
+                else:
+                    checkpoint.skipped += post.messages
+                checkpoint.skipped += post.skipped
+                if post.end is not None:
+                    checkpoint.offset = post.end
+                if time.monotonic() - saved >= CHECKPOINT_SECONDS:
+                    await asyncio.to_thread(checkpoint.save)
+                    saved = time.monotonic()
+
+            if self._error is not None:
+                raise self._error
+            checkpoint.offset = checkpoint.size
+        finally:
+            reader.cancel()
+            await asyncio.to_thread(checkpoint.save)
+
+    async def _read(self, queue: asyncio.Queue):
+        checkpoint = self.checkpoint
+        batcher = PostBatcher()
+        offset = checkpoint.offset
+        try:
+            done = False
+            while not done:
+                messages, done = await asyncio.to_thread(
+                    read_backup, checkpoint.backup_path, checkpoint.format, offset
+                )
+                if messages:
+                    offset = messages[-1].end
+                for message in messages:
+                    for post in batcher.add(message):
+                        await queue.put(post)
+            for post in batcher.flush():
+                await queue.put(post)
+            checkpoint.skipped += batcher.skipped
+        except Exception as e:
+            self._error = e
+        await queue.put(None)
+
+    async def _send(self, post: ReplayPost) -> bool:
+        """Post once, retrying server errors; False if Discord refused the post"""
+        for attempt in range(SEND_ATTEMPTS):
+            try:
+                await self.webhook.send(
+                    post.content,
+                    username=post.name,
+                    avatar_url=post.avatar,
+                    allowed_mentions=discord.AllowedMentions.none(),
+                    wait=False,
+                )
+                return True
+            except discord.HTTPException as e:
+                if e.status == 400:
+                    logger.warning(f"Skipping a post Discord refused: {e}")
+                    return False
+                if e.status != 429 and e.status < 500 or attempt == SEND_ATTEMPTS - 1:
+                    raise
+                await asyncio.sleep(RETRY_DELAY * 2**attempt)
+        return False
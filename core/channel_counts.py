@@ -0,0 +1,185 @@
+import bisect
+from array import array
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, Optional, Tuple
+
+from discord.utils import time_snowflake
+
+# Message ids of the last week are kept to answer the 24 hour and 7 day counts
+RECENT_DAYS = 7
+
+
+def _cutoff_id(now: datetime, days: float) -> int:
+    return time_snowflake(now - timedelta(days=days), high=False)
+
+
+def _deltas(ids: array) -> list:
+    # Ids are ascending and close together, their differences are short
+    return [ids[0]] + [b - a for a, b in zip(ids, ids[1:])] if ids else []
+
+
+def _undelta(deltas: list):
+    total = 0
+    for delta in deltas:
+        total += delta
+        yield total
+
+
+class _Channel:
+    __slots__ = ("total", "recent", "newest_id", "synced_id", "caught_up")
+
+    def __init__(self, total: int, recent: array, newest_id: int, caught_up: bool):
+        self.total = total
+        # Ids of messages from the last RECENT_DAYS days, ascending
+        self.recent = recent
+        self.newest_id = newest_id
+        # Newest message id known when the channel was scanned or snapshotted
+        self.synced_id = newest_id
+        self.caught_up = caught_up
+
+
+class ChannelCounts:
+    """Message counts of scanned channels, kept current from gateway events.
+
+    The first ``!channelstats`` of a channel pages through its history; the
+    total and the ids of the last week are kept and then updated from new
+    and deleted messages, so later calls need no history at all. Channels
+    restored from a snapshot, or tracked across a reconnect that started a
+    new gateway session, missed what was sent meanwhile and are
+    ``caught_up`` by reading only the history after ``synced_id``.
+    """
+
+    def __init__(self):
+        self._channels: Dict[int, _Channel] = {}
+
+    def __contains__(self, channel_id: int) -> bool:
+        return channel_id in self._channels
+
+    def __len__(self):
+        return len(self._channels)
+
+    def seed(
+        self,
+        channel_id: int,
+        total: int,
+        recent_ids: Iterable[int],
+        newest_id: int,
+        caught_up: bool = True,
+    ):
+        """Install counts from a full history scan.
+
+        Messages sent while a scan pages through history are neither in it
+        nor tracked yet; without ``caught_up`` the next query first reads
+        the history after ``newest_id``.
+        """
+        recent = array("Q", sorted(recent_ids))
+        self._channels[channel_id] = _Channel(total, recent, newest_id, caught_up)
+
+    def needs_catch_up(self, channel_id: int) -> Optional[int]:
+        """Id to read history after, if the channel missed messages"""
+        entry = self._channels.get(channel_id)
+        if entry is None or entry.caught_up:
+            return None
+        return entry.synced_id
+
+    def caught_up(self, channel_id: int, message_ids: Iterable[int]):
+        """Merge messages read after a restore, skipping ones already seen live"""
+        entry = self._channels.get(channel_id)
+        if entry is None:
+            return
+        for message_id in message_ids:
+            self._insert(entry, message_id)
+        entry.caught_up = True
+
+    def reconnected(self):
+        """Events may have been missed; catch every channel up on next use"""
+        for entry in self._channels.values():
+            if entry.caught_up:
+                entry.synced_id = entry.newest_id
+                entry.caught_up = False
+
+    # --- Gateway events
+
+    def message_created(self, channel_id: int, message_id: int):
+        entry = self._channels.get(channel_id)
+        if entry is None:
+            return
+        if message_id > entry.newest_id:
+            entry.newest_id = message_id
+        if not entry.recent or message_id > entry.recent[-1]:
+            entry.recent.append(message_id)
+            entry.total += 1
+        else:
+            self._insert(entry, message_id)
+
+    def messages_deleted(self, channel_id: int, message_ids: Iterable[int]):
+        entry = self._channels.get(channel_id)
+        if entry is None:
+            return
+        recent = entry.recent
+        for message_id in message_ids:
+            index = bisect.bisect_left(recent, message_id)
+            if index < len(recent) and recent[index] == message_id:
+                del recent[index]
+            elif not entry.caught_up and message_id > entry.synced_id:
+                # Never counted, and the catch-up will not find it either
+                continue
+            entry.total = max(0, entry.total - 1)
+
+    def forget(self, channel_id: int):
+        self._channels.pop(channel_id, None)
+
+    @staticmethod
+    def _insert(entry: _Channel, message_id: int):
+        entry.newest_id = max(entry.newest_id, message_id)
+        recent = entry.recent
+        index = bisect.bisect_left(recent, message_id)
+        if index < len(recent) and recent[index] == message_id:
+            return
+        recent.insert(index, message_id)
+        entry.total += 1
+
+    # --- Queries
+
+    def counts(
+        self, channel_id: int, now: Optional[datetime] = None
+    ) -> Optional[Tuple[int, int, int]]:
+        """``(total, last 7 days, last 24 hours)`` or None if never scanned"""
+        entry = self._channels.get(channel_id)
+        if entry is None or not entry.caught_up:
+            return None
+        now = now or datetime.now(timezone.utc)
+        recent = entry.recent
+        expired = bisect.bisect_left(recent, _cutoff_id(now, RECENT_DAYS))
+        if expired:
+            del recent[:expired]
+        day = len(recent) - bisect.bisect_left(recent, _cutoff_id(now, 1))
+        return entry.total, len(recent), day
+
+    # --- Snapshots
+
+    def to_dict(self) -> dict:
+        return {
+            str(channel_id): {
+                "total": entry.total,
+                "recent": _deltas(entry.recent),
+                # Channels still to be caught up resume from the same point
+                "newest_id": entry.newest_id if entry.caught_up else entry.synced_id,
+            }
+            for channel_id, entry in self._channels.items()
+        }
+
+    def restore(self, data: dict, now: Optional[datetime] = None) -> int:
+        """Install snapshotted channels that were not scanned since startup"""
+        cutoff = _cutoff_id(now or datetime.now(timezone.utc), RECENT_DAYS)
+        restored = 0
+        for channel_id, entry in data.items():
+            channel_id = int(channel_id)
+            if channel_id in self._channels:
+                continue
+            recent = array("Q", (i for i in _undelta(entry["recent"]) if i >= cutoff))
+            self._channels[channel_id] = _Channel(
+                entry["total"], recent, entry["newest_id"], False
+            )
+            restored += 1
+        return restored
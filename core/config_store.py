@@ -0,0 +1,374 @@
+import asyncio
+import json
+import logging
+import os
+import tempfile
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SETTINGS = {"cleanup_age_days": 7}
+
+GLOBAL_PARTITION = None
+
+
+def atomic_write_json(path, data, indent: Optional[int] = 2):
+    """Write JSON to a temporary file and atomically replace the target"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{path.name}.", dir=str(path.parent))
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            if isinstance(data, str):
+                f.write(data)
+            else:
+                json.dump(data, f, indent=indent)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+class ConfigStore:
+    """Per-guild partitioned configuration with debounced write-behind flushes.
+
+    Global settings live in ``global.json`` and every guild gets its own
+    ``guilds/<guild_id>.json`` partition, so a change only rewrites the
+    partition it touched. Writes are coalesced for ``flush_delay`` seconds and
+    performed on a single background thread using atomic replace.
+    """
+
+    def __init__(
+        self,
+        root: str = os.path.join("data", "config"),
+        legacy_file: Optional[str] = None,
+        flush_delay: float = 2.0,
+    ):
+        self.root = Path(root)
+        self.guild_dir = self.root / "guilds"
+        self.legacy_file = Path(legacy_file) if legacy_file else None
+        self.flush_delay = flush_delay
+
+        self.settings: dict = dict(DEFAULT_SETTINGS)
+        self._guilds: Dict[int, dict] = {}
+        self._cleanup_index: Dict[int, int] = {}
+        self._dirty: Set[Optional[int]] = set()
+
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="config-writer"
+        )
+        self._closed = False
+
+    # --- Loading
+
+    def load(self, guild_filter: Optional[Callable[[int], bool]] = None):
+        """Load partitions from disk, migrating the legacy file if needed.
+
+        ``guild_filter`` restricts loading to the guilds owned by this process
+        when the bot runs as several shard clusters sharing one data directory.
+        """
+        if not self.root.exists() and self.legacy_file and self.legacy_file.exists():
+            self._migrate_legacy()
+            return
+
+        global_file = self.root / "global.json"
+        if global_file.exists():
+            with open(global_file, "r", encoding="utf-8") as f:
+                self.settings.update(json.load(f))
+
+        if self.guild_dir.exists():
+            for path in self.guild_dir.glob("*.json"):
+                try:
+                    guild_id = int(path.stem)
+                    if guild_filter is not None and not guild_filter(guild_id):
+                        continue
+                    with open(path, "r", encoding="utf-8") as f:
+                        self._guilds[guild_id] = json.load(f)
+                except (ValueError, json.JSONDecodeError) as e:
+                    logger.error(f"Skipping unreadable config partition {path}: {e}")
+
+        self._rebuild_index()
+
+    def _migrate_legacy(self):
+        """Split a single ``bot_config.json`` into per-guild partitions"""
+        with open(self.legacy_file, "r", encoding="utf-8") as f:
+            legacy = json.load(f)
+
+        for key in DEFAULT_SETTINGS:
+            if key in legacy:
+                self.settings[key] = legacy[key]
+
+        for channel_id, settings in legacy.get("auto_cleanup", {}).items():
+            guild_id = int(settings["guild_id"])
+            partition = self.guild(guild_id)
+            partition["auto_cleanup"][str(channel_id)] = {
+                "channel_name": settings.get("channel_name"),
+                "days": settings.get("days", self.settings["cleanup_age_days"]),
+            }
+            self._dirty.add(guild_id)
+
+        self._rebuild_index()
+        self._dirty.add(GLOBAL_PARTITION)
+        self.flush_sync()
+        logger.info(
+            f"Migrated {len(self._cleanup_index)} auto cleanup entries from "
+            f"{self.legacy_file} to {self.root}"
+        )
+
+    def _rebuild_index(self):
+        self._cleanup_index = {
+            int(channel_id): guild_id
+            for guild_id, partition in self._guilds.items()
+            for channel_id in partition.get("auto_cleanup", {})
+        }
+
+    # --- Global settings
+
+    def get(self, key: str, default=None):
+        """Get a global setting"""
+        return self.settings.get(key, default)
+
+    def set(self, key: str, value):
+        """Set a global setting and schedule a flush"""
+        if self.settings.get(key) == value:
+            return
+        self.settings[key] = value
+        self._mark_dirty(GLOBAL_PARTITION)
+
+    # --- Guild partitions
+
+    def guild(self, guild_id: int) -> dict:
+        """Return the mutable partition for a guild, creating it if needed"""
+        partition = self._guilds.get(guild_id)
+        if partition is None:
+            partition = self._guilds[guild_id] = {"auto_cleanup": {}}
+        return partition
+
+    def touch(self, guild_id: int):
+        """Mark a guild partition as modified after mutating it in place"""
+        self._mark_dirty(guild_id)
+
+    def guild_ids(self) -> List[int]:
+        """Return the ids of all guilds that have a partition"""
+        return list(self._guilds)
+
+    # --- Auto cleanup
+
+    def set_cleanup(self, guild_id: int, channel_id: int, channel_name: str, days: int):
+        """Enable or update auto cleanup for a channel"""
+        self.guild(guild_id)["auto_cleanup"][str(channel_id)] = {
+            "channel_name": channel_name,
+            "days": days,
+        }
+        self._cleanup_index[channel_id] = guild_id
+        self._mark_dirty(guild_id)
+
+    def remove_cleanup(self, channel_id: int) -> bool:
+        """Disable auto cleanup for a channel, returning whether it was enabled"""
+        guild_id = self._cleanup_index.pop(channel_id, None)
+        if guild_id is None:
+            return False
+        del self._guilds[guild_id]["auto_cleanup"][str(channel_id)]
+        self._mark_dirty(guild_id)
+        return True
+
+    def clear_cleanup(self, guild_id: int) -> int:
+        """Disable auto cleanup for every channel in a guild"""
+        entries = self._guilds.get(guild_id, {}).get("auto_cleanup", {})
+        removed = len(entries)
+        for channel_id in entries:
+            self._cleanup_index.pop(int(channel_id), None)
+        entries.clear()
+        if removed:
+            self._mark_dirty(guild_id)
+        return removed
+
+    def cleanup_for(self, channel_id: int) -> Optional[dict]:
+        """Look up the auto cleanup settings for a channel"""
+        guild_id = self._cleanup_index.get(channel_id)
+        if guild_id is None:
+            return None
+        settings = self._guilds[guild_id]["auto_cleanup"][str(channel_id)]
+        return dict(settings, guild_id=guild_id)
+
+    def guild_cleanup(self, guild_id: int) -> Dict[int, dict]:
+        """Return the auto cleanup settings of a single guild"""
+        entries = self._guilds.get(guild_id, {}).get("auto_cleanup", {})
+        return {
+            int(channel_id): dict(settings) for channel_id, settings in entries.items()
+        }
+
+    def cleanup_channels(self) -> List[Tuple[int, dict]]:
+        """Return a snapshot of every (channel_id, settings) pair"""
+        return [
+            (channel_id, self.cleanup_for(channel_id))
+            for channel_id in list(self._cleanup_index)
+        ]
+
+    def cleanup_count(self) -> int:
+        """Return the number of channels with auto cleanup enabled"""
+        return len(self._cleanup_index)
+
+    def cleanup_counts(self) -> Dict[int, int]:
+        """Return the number of auto cleanup channels per guild"""
+        return dict(Counter(self._cleanup_index.values()))
+
+    # --- Auto slowmode
+
+    def set_auto_slowmode(
+        self, guild_id: int, channel_id: int, threshold: int, max_delay: int
+    ):
+        """Enable or update automatic slowmode for a channel"""
+        entries = self.guild(guild_id).setdefault("auto_slowmode", {})
+        entry = entries.setdefault(str(channel_id), {})
+        entry.update(threshold=threshold, max_delay=max_delay)
+        self._mark_dirty(guild_id)
+
+    def set_auto_slowmode_state(
+        self, guild_id: int, channel_id: int, state: Optional[dict]
+    ):
+        """Remember a raised slowmode so it can be lowered after a restart"""
+        entries = self._guilds.get(guild_id, {}).get("auto_slowmode", {})
+        entry = entries.get(str(channel_id))
+        if entry is None or entry.get("state") == state:
+            return
+        if state is None:
+            del entry["state"]
+        else:
+            entry["state"] = state
+        self._mark_dirty(guild_id)
+
+    def remove_auto_slowmode(self, guild_id: int, channel_id: int) -> bool:
+        """Disable automatic slowmode for a channel, returning whether it was on"""
+        entries = self._guilds.get(guild_id, {}).get("auto_slowmode", {})
+        if entries.pop(str(channel_id), None) is None:
+            return False
+        self._mark_dirty(guild_id)
+        return True
+
+    def auto_slowmode_channels(self) -> Dict[int, dict]:
+        """Return the automatic slowmode settings of every channel"""
+        return {
+            int(channel_id): dict(settings, guild_id=guild_id)
+            for guild_id, partition in self._guilds.items()
+            for channel_id, settings in partition.get("auto_slowmode", {}).items()
+        }
+
+    # --- Slowmode snapshots
+
+    def snapshot_slowmode(self, guild_id: int, delays: Dict[int, int]):
+        """Remember channels' slowmode before a bulk change.
+
+        Channels already in the snapshot keep their older value, so repeated
+        bulk changes can still be undone back to the original settings.
+        """
+        snapshot = self.guild(guild_id).setdefault("slowmode_snapshot", {})
+        added = False
+        for channel_id, delay in delays.items():
+            if str(channel_id) not in snapshot:
+                snapshot[str(channel_id)] = delay
+                added = True
+        if added:
+            self._mark_dirty(guild_id)
+
+    def pop_slowmode_snapshot(self, guild_id: int) -> Dict[int, int]:
+        """Remove and return a guild's slowmode snapshot"""
+        snapshot = self._guilds.get(guild_id, {}).pop("slowmode_snapshot", {})
+        if snapshot:
+            self._mark_dirty(guild_id)
+        return {int(channel_id): delay for channel_id, delay in snapshot.items()}
+
+    # --- Persistence
+
+    def _mark_dirty(self, partition: Optional[int]):
+        self._dirty.add(partition)
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.flush_sync()
+            return
+
+        if self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.flush_delay, self._start_flush)
+
+    def _start_flush(self):
+        self._flush_handle = None
+        asyncio.ensure_future(self.flush())
+
+    def _path_for(self, partition: Optional[int]) -> Path:
+        if partition is GLOBAL_PARTITION:
+            return self.root / "global.json"
+        return self.guild_dir / f"{partition}.json"
+
+    def _collect_payloads(self) -> List[Tuple[Path, Optional[str]]]:
+        payloads = []
+        for partition in self._dirty:
+            if partition is GLOBAL_PARTITION:
+                data = self.settings
+            else:
+                data = self._guilds.get(partition)
+                if data is not None and not any(data.values()):
+                    del self._guilds[partition]
+                    data = None
+            text = None if data is None else json.dumps(data, indent=2)
+            payloads.append((self._path_for(partition), text))
+        self._dirty.clear()
+        return payloads
+
+    @staticmethod
+    def _write_payloads(payloads: List[Tuple[Path, Optional[str]]]):
+        for path, text in payloads:
+            if text is None:
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+            else:
+                atomic_write_json(path, text)
+
+    async def flush(self):
+        """Write all dirty partitions on the background writer thread"""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+        dirty = set(self._dirty)
+        payloads = self._collect_payloads()
+        if not payloads:
+            return
+
+        loop = asyncio.get_running_loop()
+        try:
+            await loop.run_in_executor(self._executor, self._write_payloads, payloads)
+        except Exception as e:
+            logger.error(f"Failed to flush config partitions: {e}")
+            for partition in dirty:
+                self._mark_dirty(partition)
+
+    def flush_sync(self):
+        """Write all dirty partitions immediately on the calling thread"""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+        payloads = self._collect_payloads()
+        if self._closed:
+            self._write_payloads(payloads)
+        else:
+            # Queue behind any in-flight background write to keep ordering
+            self._executor.submit(self._write_payloads, payloads).result()
+
+    async def close(self):
+        """Flush pending changes and stop the writer thread"""
+        await self.flush()
+        self._closed = True
+        self._executor.shutdown(wait=True)
@@ -0,0 +1,26 @@
+import os
+from typing import Optional
+
+
+def env_flag(name: str, default: bool = False) -> bool:
+    """Read a boolean setting such as ``LEAN_CACHE=true`` from the environment"""
+    value = os.getenv(name)
+    if value is None or not value.strip():
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def env_int(name: str, default: Optional[int] = None) -> Optional[int]:
+    """Read an integer setting from the environment"""
+    value = os.getenv(name)
+    if value is None or not value.strip():
+        return default
+    return int(value)
+
+
+def env_float(name: str, default: Optional[float] = None) -> Optional[float]:
+    """Read a float setting from the environment"""
+    value = os.getenv(name)
+    if value is None or not value.strip():
+        return default
+    return float(value)
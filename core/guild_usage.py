@@ -0,0 +1,123 @@
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+DAY = 86_400
+
+
+class _GuildDays:
+    """Daily counters of one guild: deletions, API calls and API seconds"""
+
+    __slots__ = ("deleted", "calls", "seconds")
+
+    def __init__(self):
+        self.deleted: Dict[int, int] = {}
+        self.calls: Dict[int, int] = {}
+        self.seconds: Dict[int, float] = {}
+
+    def prune(self, oldest_day: int):
+        for series in (self.deleted, self.calls, self.seconds):
+            for day in [d for d in series if d < oldest_day]:
+                del series[day]
+
+
+class GuildUsage:
+    """Messages deleted and Discord API cost per guild, bucketed by UTC day.
+
+    Everything is updated as it happens (deletions from finished audit
+    jobs, API cost from every REST call), so reports only add up a few
+    day buckets per guild.
+    """
+
+    def __init__(self, retention_days: int = 7, clock: Callable[[], float] = time.time):
+        self.retention_days = retention_days
+        self.clock = clock
+        self._guilds: Dict[int, _GuildDays] = {}
+
+    def today(self) -> int:
+        return int(self.clock() // DAY)
+
+    def _days(self, guild_id: int, day: int) -> _GuildDays:
+        days = self._guilds.get(guild_id)
+        if days is None:
+            days = self._guilds[guild_id] = _GuildDays()
+        if day not in days.calls and day not in days.deleted:
+            days.prune(day - self.retention_days + 1)
+        return days
+
+    def record_deleted(self, guild_id: int, count: int):
+        if count:
+            day = self.today()
+            days = self._days(guild_id, day)
+            days.deleted[day] = days.deleted.get(day, 0) + count
+
+    def record_api_call(self, guild_id: Optional[int], seconds: float):
+        if guild_id is None:
+            return
+        day = self.today()
+        days = self._days(guild_id, day)
+        days.calls[day] = days.calls.get(day, 0) + 1
+        days.seconds[day] = days.seconds.get(day, 0.0) + seconds
+
+    def on_audit_event(self, entry: dict):
+        """Count deletions of finished audit jobs (progress events have no status)"""
+        if "status" in entry and entry.get("deleted") and entry.get("guild_id"):
+            self.record_deleted(entry["guild_id"], entry["deleted"])
+
+    def forget(self, guild_id: int):
+        self._guilds.pop(guild_id, None)
+
+    # --- Snapshots
+
+    def to_dict(self) -> dict:
+        return {
+            str(guild_id): {
+                "deleted": {str(day): n for day, n in days.deleted.items()},
+                "calls": {str(day): n for day, n in days.calls.items()},
+                "seconds": {str(day): n for day, n in days.seconds.items()},
+            }
+            for guild_id, days in self._guilds.items()
+        }
+
+    def restore(self, data: dict):
+        """Add snapshotted counters to the ones recorded since startup"""
+        oldest_day = self.today() - self.retention_days + 1
+        for guild_id, entry in data.items():
+            days = self._guilds.setdefault(int(guild_id), _GuildDays())
+            for name in _GuildDays.__slots__:
+                series = getattr(days, name)
+                for day, value in entry.get(name, {}).items():
+                    day = int(day)
+                    if day >= oldest_day:
+                        series[day] = series.get(day, 0) + value
+
+    # --- Reporting
+
+    def usage(self, guild_id: int, days: int = 1) -> Tuple[int, int, float]:
+        """``(deleted, api_calls, api_seconds)`` over the last ``days`` days"""
+        entry = self._guilds.get(guild_id)
+        if entry is None:
+            return 0, 0, 0.0
+        first = self.today() - days + 1
+        return (
+            sum(count for day, count in entry.deleted.items() if day >= first),
+            sum(count for day, count in entry.calls.items() if day >= first),
+            sum(seconds for day, seconds in entry.seconds.items() if day >= first),
+        )
+
+    def totals(self, days: int = 1) -> Tuple[int, int, float]:
+        deleted = calls = 0
+        seconds = 0.0
+        for guild_id in self._guilds:
+            d, c, s = self.usage(guild_id, days)
+            deleted += d
+            calls += c
+            seconds += s
+        return deleted, calls, seconds
+
+    def top(self, days: int = 7, n: int = 5, by: str = "seconds") -> List[tuple]:
+        """Guilds with the most API time (``by="seconds"``) or deletions"""
+        index = 2 if by == "seconds" else 0
+        rows = [(guild_id, *self.usage(guild_id, days)) for guild_id in self._guilds]
+        rows = [row for row in rows if row[index + 1]]
+        rows.sort(key=lambda row: row[index + 1], reverse=True)
+        return rows[:n]
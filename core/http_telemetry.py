@@ -0,0 +1,178 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, List, Optional
+
+import aiohttp
+
+from core.metrics import MetricsRegistry
+
+REQUESTS = "discord_http_requests_total"
+RATE_LIMITED = "discord_http_ratelimited_total"
+LATENCY = "discord_http_request_duration_seconds"
+WAIT_SECONDS = "discord_http_ratelimit_wait_seconds_total"
+REST_SECONDS = "discord_http_rest_seconds_total"
+
+# The command or task on whose behalf REST calls are currently made
+current_operation: ContextVar[str] = ContextVar("current_operation", default="other")
+
+# The guild on whose behalf REST calls are currently made, if any
+current_guild: ContextVar[Optional[int]] = ContextVar("current_guild", default=None)
+
+# Per-call state shared between the request wrapper and the aiohttp trace hooks
+_current_call: ContextVar[Optional["_CallState"]] = ContextVar(
+    "current_http_call", default=None
+)
+
+
+@contextmanager
+def operation(name: str):
+    """Attribute all REST calls made inside the block to ``name``"""
+    token = current_operation.set(name)
+    try:
+        yield
+    finally:
+        current_operation.reset(token)
+
+
+class _CallState:
+    __slots__ = ("route", "guild_id", "attempts", "network", "rate_limited")
+
+    def __init__(self, route: str, guild_id: Optional[int]):
+        self.route = route
+        self.guild_id = guild_id
+        self.attempts = 0
+        self.network = 0.0
+        self.rate_limited = 0
+
+
+class HttpTelemetry:
+    """Record REST latency, 429s and rate limit waits per route and operation.
+
+    discord.py retries 429 responses and sleeps on its rate limit buckets
+    inside ``HTTPClient.request``. An aiohttp ``TraceConfig`` measures every
+    real round trip, and a wrapper around ``request`` measures the whole
+    call, so the difference is the time spent waiting for rate limits.
+    """
+
+    def __init__(self, metrics: MetricsRegistry):
+        self.metrics = metrics
+        self.trace_config = aiohttp.TraceConfig()
+        self.trace_config.on_request_start.append(self._on_request_start)
+        self.trace_config.on_request_end.append(self._on_request_end)
+        self.trace_config.on_request_exception.append(self._on_request_exception)
+        # Called with (guild_id, seconds) after every REST call
+        self.listeners: List[Callable[[Optional[int], float], None]] = []
+
+        metrics.describe(REQUESTS, "counter", "Discord REST calls by route and status")
+        metrics.describe(
+            RATE_LIMITED, "counter", "429 responses by route and operation"
+        )
+        metrics.describe(LATENCY, "histogram", "Discord REST round trip time")
+        metrics.describe(
+            WAIT_SECONDS, "counter", "Seconds spent waiting on rate limit buckets"
+        )
+        metrics.describe(
+            REST_SECONDS, "counter", "Seconds spent in REST round trips by operation"
+        )
+
+    def install(self, bot):
+        """Wrap the bot's HTTP client; the bot must be built with ``http_trace``"""
+        original = bot.http.request
+
+        async def request(route, **kwargs):
+            guild_id = current_guild.get()
+            if guild_id is None and getattr(route, "guild_id", None) is not None:
+                guild_id = int(route.guild_id)
+            call = _CallState(f"{route.method} {route.path}", guild_id)
+            token = _current_call.set(call)
+            started = time.perf_counter()
+            status = "error"
+            try:
+                response = await original(route, **kwargs)
+                status = "ok"
+                return response
+            except Exception as e:
+                status = str(getattr(e, "status", type(e).__name__))
+                raise
+            finally:
+                _current_call.reset(token)
+                self._record(call, time.perf_counter() - started, status)
+
+        bot.http.request = request
+
+    def _record(self, call: _CallState, total: float, status: str):
+        op = current_operation.get()
+        self.metrics.inc(REQUESTS, {"route": call.route, "status": status})
+        self.metrics.inc(REST_SECONDS, {"operation": op}, call.network)
+        self.metrics.inc(
+            WAIT_SECONDS,
+            {"route": call.route, "operation": op},
+            max(0.0, total - call.network),
+        )
+        if call.rate_limited:
+            self.metrics.inc(
+                RATE_LIMITED, {"route": call.route, "operation": op}, call.rate_limited
+            )
+        for listener in self.listeners:
+            listener(call.guild_id, total)
+
+    async def _on_request_start(self, session, trace_ctx, params):
+        trace_ctx.started = time.perf_counter()
+
+    async def _on_request_end(self, session, trace_ctx, params):
+        self._finish_attempt(trace_ctx, params.response.status)
+
+    async def _on_request_exception(self, session, trace_ctx, params):
+        self._finish_attempt(trace_ctx, None)
+
+    def _finish_attempt(self, trace_ctx, status: Optional[int]):
+        elapsed = time.perf_counter() - getattr(
+            trace_ctx, "started", time.perf_counter()
+        )
+        call = _current_call.get()
+        if call is None:
+            return
+        call.attempts += 1
+        call.network += elapsed
+        if status == 429:
+            call.rate_limited += 1
+        self.metrics.observe(LATENCY, elapsed, {"route": call.route})
+
+    # --- Reporting
+
+    def by_operation(self) -> List[dict]:
+        """Summarize REST usage per operation, most expensive first"""
+        summary = {}
+
+        def entry(op):
+            return summary.setdefault(
+                op, {"operation": op, "rest": 0.0, "wait": 0.0, "limited": 0}
+            )
+
+        for labels, value in self.metrics.counters(REST_SECONDS).items():
+            entry(dict(labels)["operation"])["rest"] += value
+        for labels, value in self.metrics.counters(WAIT_SECONDS).items():
+            entry(dict(labels)["operation"])["wait"] += value
+        for labels, value in self.metrics.counters(RATE_LIMITED).items():
+            entry(dict(labels)["operation"])["limited"] += int(value)
+
+        return sorted(
+            summary.values(), key=lambda e: e["rest"] + e["wait"], reverse=True
+        )
+
+    def by_route(self) -> List[dict]:
+        """Summarize latency percentiles per route, slowest first"""
+        calls = {}
+        for labels, value in self.metrics.counters(REQUESTS).items():
+            route = dict(labels)["route"]
+            calls[route] = calls.get(route, 0) + int(value)
+
+        routes = []
+        for labels, histogram in self.metrics.histograms(LATENCY).items():
+            route = dict(labels)["route"]
+            p50, p95 = histogram.percentiles(50, 95)
+            routes.append(
+                {"route": route, "calls": calls.get(route, 0), "p50": p50, "p95": p95}
+            )
+        return sorted(routes, key=lambda r: r["p95"] or 0, reverse=True)
@@ -0,0 +1,145 @@
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from typing import Optional
+
+from core.metrics import MetricsRegistry
+
+logger = logging.getLogger(__name__)
+
+LOOP_LAG = "event_loop_lag_seconds"
+LOOP_STALLS = "event_loop_stalls_total"
+LOOP_STALL_SECONDS = "event_loop_stall_seconds"
+
+LAG_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class LoopMonitor:
+    """Measure event loop lag and catch callbacks that block the loop.
+
+    A coroutine on the loop sleeps for ``interval`` and records how late it
+    wakes up. A watchdog thread checks that those wake-ups keep happening;
+    when the loop has been unresponsive for ``stall_threshold`` seconds it
+    samples the loop thread's stack, so the blocking code is logged while it
+    is still running.
+    """
+
+    def __init__(
+        self,
+        metrics: MetricsRegistry,
+        interval: float = 0.25,
+        warn_threshold: float = 0.1,
+        stall_threshold: float = 0.5,
+        stack_depth: int = 12,
+    ):
+        self.metrics = metrics
+        self.interval = interval
+        self.warn_threshold = warn_threshold
+        self.stall_threshold = stall_threshold
+        self.stack_depth = stack_depth
+        self.stalls: deque = deque(maxlen=20)
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread_id: Optional[int] = None
+        self._heartbeat = time.perf_counter()
+        self._task: Optional[asyncio.Task] = None
+        self._stopped = threading.Event()
+        self._current_stall: Optional[dict] = None
+
+        metrics.describe(LOOP_LAG, "histogram", "How late the event loop ran a timer")
+        metrics.describe(
+            LOOP_STALLS, "counter", "Event loop stalls by blocking location"
+        )
+        metrics.describe(
+            LOOP_STALL_SECONDS, "histogram", "Duration of event loop stalls"
+        )
+
+    def start(self):
+        """Start sampling; must be called from the running event loop"""
+        if self._task is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._heartbeat = time.perf_counter()
+        self._task = self._loop.create_task(self._sample())
+        threading.Thread(
+            target=self._watchdog, name="loop-watchdog", daemon=True
+        ).start()
+
+    def stop(self):
+        """Stop sampling and the watchdog thread"""
+        self._stopped.set()
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _sample(self):
+        while True:
+            expected = time.perf_counter() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.perf_counter()
+            lag = max(0.0, now - expected)
+            self._heartbeat = now
+
+            self.metrics.observe(LOOP_LAG, lag, buckets=LAG_BUCKETS)
+            if lag >= self.warn_threshold:
+                logger.warning(f"Event loop lag of {lag * 1000:.0f} ms")
+
+    def _watchdog(self):
+        check_every = min(self.interval, self.stall_threshold / 2)
+        while not self._stopped.wait(check_every):
+            blocked_for = time.perf_counter() - self._heartbeat - self.interval
+            if blocked_for >= self.stall_threshold:
+                if self._current_stall is None:
+                    self._current_stall = self._capture_stall()
+            elif self._current_stall is not None:
+                self._finish_stall()
+
+    def _capture_stall(self) -> dict:
+        frame = sys._current_frames().get(self._loop_thread_id)
+        stack = traceback.extract_stack(frame)[-self.stack_depth :] if frame else []
+
+        # The innermost frame in our own code is the most useful culprit
+        location = "unknown"
+        for entry in reversed(stack):
+            if entry.filename.startswith(PROJECT_ROOT):
+                relative = os.path.relpath(entry.filename, PROJECT_ROOT)
+                location = f"{relative}:{entry.name}"
+                break
+
+        task = asyncio.current_task(self._loop)
+        task_name = task.get_coro().__qualname__ if task is not None else "callback"
+
+        logger.warning(
+            f"Event loop blocked for over {self.stall_threshold * 1000:.0f} ms in "
+            f"{location} (task {task_name}):\n" + "".join(traceback.format_list(stack))
+        )
+        return {
+            "location": location,
+            "task": task_name,
+            "started": self._heartbeat + self.interval,
+            "at": time.time(),
+        }
+
+    def _finish_stall(self):
+        stall = self._current_stall
+        self._current_stall = None
+        stall["duration"] = self._heartbeat - stall.pop("started")
+        # Metrics are not thread safe, record them from the loop thread
+        self._loop.call_soon_threadsafe(self._record_stall, stall)
+
+    def _record_stall(self, stall: dict):
+        self.stalls.append(stall)
+        self.metrics.inc(LOOP_STALLS, {"location": stall["location"]})
+        self.metrics.observe(LOOP_STALL_SECONDS, stall["duration"], buckets=LAG_BUCKETS)
+        logger.warning(
+            f"Event loop stall in {stall['location']} lasted "
+            f"{stall['duration'] * 1000:.0f} ms"
+        )
@@ -0,0 +1,190 @@
+import asyncio
+import logging
+import time
+from collections import Counter
+from typing import Dict, List, Optional, Set
+
+import discord
+
+logger = logging.getLogger(__name__)
+
+# Roles with at most this many members keep a list of display names
+ROLE_SAMPLE_SIZE = 10
+
+
+class GuildMemberStats:
+    """Precomputed member aggregates for a single guild"""
+
+    def __init__(self):
+        self.humans = 0
+        self.bots = 0
+        self.role_counts: Counter = Counter()
+        self.role_samples: Dict[int, List[str]] = {}
+        self.built_at = time.monotonic()
+        self.presence_count: Optional[int] = None
+        self.presence_checked = 0.0
+
+    @property
+    def total(self) -> int:
+        return self.humans + self.bots
+
+    def add(self, member: discord.Member):
+        """Count a member that joined or was seen while building"""
+        if member.bot:
+            self.bots += 1
+        else:
+            self.humans += 1
+        for role in member.roles[1:]:
+            count = self.role_counts[role.id] = self.role_counts[role.id] + 1
+            sample = self.role_samples.get(role.id)
+            if sample is None and count == 1:
+                sample = self.role_samples[role.id] = []
+            if sample is None:
+                continue
+            if count <= ROLE_SAMPLE_SIZE:
+                sample.append(member.display_name)
+            else:
+                del self.role_samples[role.id]
+
+
+class MemberStats:
+    """Member aggregates for guilds whose members are not cached.
+
+    When the bot runs with a lean member cache, ``guild.members`` is mostly
+    empty. The aggregates are built once per guild by streaming
+    ``guild.fetch_members`` (nothing is kept in the cache) and then kept up
+    to date from join/leave events. Role changes of uncached members are not
+    delivered as events, so role counts are only trusted for ``role_ttl``
+    seconds and rebuilt the next time they are needed.
+    """
+
+    def __init__(self, role_ttl: float = 600.0, presence_ttl: float = 300.0):
+        self.role_ttl = role_ttl
+        self.presence_ttl = presence_ttl
+        self._guilds: Dict[int, GuildMemberStats] = {}
+        self._locks: Dict[int, asyncio.Lock] = {}
+        # Guilds restored from a snapshot whose totals were not checked yet
+        self._unverified: Set[int] = set()
+
+    def get(self, guild_id: int) -> Optional[GuildMemberStats]:
+        """Return the aggregates for a guild if they have been built"""
+        return self._guilds.get(guild_id)
+
+    def _needs_build(self, stats: Optional[GuildMemberStats], roles: bool) -> bool:
+        if stats is None:
+            return True
+        return roles and time.monotonic() - stats.built_at > self.role_ttl
+
+    def _verify(self, guild: discord.Guild):
+        # Joins and leaves while the bot was down are missing from restored
+        # aggregates; rebuild those that no longer match the gateway's count
+        self._unverified.discard(guild.id)
+        stats = self._guilds.get(guild.id)
+        if stats is not None and stats.total != guild.member_count:
+            del self._guilds[guild.id]
+
+    async def ensure(
+        self, guild: discord.Guild, roles: bool = False
+    ) -> GuildMemberStats:
+        """Return up to date aggregates, building them on first use"""
+        if guild.id in self._unverified:
+            self._verify(guild)
+        stats = self._guilds.get(guild.id)
+        if not self._needs_build(stats, roles):
+            return stats
+
+        lock = self._locks.setdefault(guild.id, asyncio.Lock())
+        async with lock:
+            stats = self._guilds.get(guild.id)
+            if self._needs_build(stats, roles):
+                stats = await self._build(guild)
+                self._guilds[guild.id] = stats
+        return stats
+
+    async def _build(self, guild: discord.Guild) -> GuildMemberStats:
+        started = time.perf_counter()
+        stats = GuildMemberStats()
+        if guild.chunked:
+            for member in guild.members:
+                stats.add(member)
+        else:
+            async for member in guild.fetch_members(limit=None):
+                stats.add(member)
+        logger.info(
+            f"Built member aggregates for {guild.name} ({stats.total} members) "
+            f"in {time.perf_counter() - started:.2f}s"
+        )
+        return stats
+
+    async def online_count(self, client, guild: discord.Guild) -> Optional[int]:
+        """Return Discord's approximate online count, cached for a while"""
+        stats = await self.ensure(guild)
+        now = time.monotonic()
+        if stats.presence_count is None or now - stats.presence_checked > (
+            self.presence_ttl
+        ):
+            try:
+                fetched = await client.fetch_guild(guild.id, with_counts=True)
+                stats.presence_count = fetched.approximate_presence_count
+            except discord.HTTPException as e:
+                logger.warning(f"Could not fetch presence count for {guild.id}: {e}")
+            stats.presence_checked = now
+        return stats.presence_count
+
+    def member_joined(self, member: discord.Member):
+        """Update aggregates for a member that joined"""
+        stats = self._guilds.get(member.guild.id)
+        if stats is not None:
+            stats.add(member)
+
+    def member_removed(self, guild_id: int, user):
+        """Update aggregates for a member that left, was kicked or banned"""
+        stats = self._guilds.get(guild_id)
+        if stats is None:
+            return
+        if user.bot:
+            stats.bots = max(0, stats.bots - 1)
+        else:
+            stats.humans = max(0, stats.humans - 1)
+
+    def forget(self, guild_id: int):
+        """Drop the aggregates of a guild the bot left"""
+        self._guilds.pop(guild_id, None)
+        self._locks.pop(guild_id, None)
+        self._unverified.discard(guild_id)
+
+    # --- Snapshots
+
+    def to_dict(self) -> dict:
+        now = time.monotonic()
+        return {
+            "saved_at": time.time(),
+            "guilds": {
+                str(guild_id): {
+                    "humans": stats.humans,
+                    "bots": stats.bots,
+                    "roles": {str(k): v for k, v in stats.role_counts.items()},
+                    "samples": {str(k): list(v) for k, v in stats.role_samples.items()},
+                    "age": now - stats.built_at,
+                }
+                for guild_id, stats in self._guilds.items()
+            },
+        }
+
+    def restore(self, data: dict):
+        """Install snapshotted aggregates of guilds not built since startup"""
+        # Role counts keep aging while the bot is down
+        downtime = max(0.0, time.time() - data.get("saved_at", 0))
+        now = time.monotonic()
+        for guild_id, entry in data.get("guilds", {}).items():
+            guild_id = int(guild_id)
+            if guild_id in self._guilds:
+                continue
+            stats = GuildMemberStats()
+            stats.humans = entry["humans"]
+            stats.bots = entry["bots"]
+            stats.role_counts.update({int(k): v for k, v in entry["roles"].items()})
+            stats.role_samples = {int(k): v for k, v in entry["samples"].items()}
+            stats.built_at = now - entry["age"] - downtime
+            self._guilds[guild_id] = stats
+            self._unverified.add(guild_id)
@@ -0,0 +1,406 @@
+import asyncio
+import logging
+import os
+import sqlite3
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Iterable, List, Optional, Set, Tuple
+
+import discord
+
+from core.metrics import MetricsRegistry
+
+logger = logging.getLogger(__name__)
+
+MIRROR_ROWS = "message_mirror_rows_written_total"
+MIRROR_QUERIES = "message_mirror_queries_total"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS messages (
+    channel_id INTEGER NOT NULL,
+    id INTEGER NOT NULL,
+    guild_id INTEGER,
+    author_id INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (channel_id, id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS messages_by_author ON messages (channel_id, author_id, id);
+CREATE TABLE IF NOT EXISTS backfill (
+    channel_id INTEGER PRIMARY KEY,
+    before_id INTEGER,
+    complete INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+Row = Tuple[int, int, Optional[int], int, float]
+
+
+def message_row(message: discord.Message) -> Row:
+    """The mirrored columns of a message"""
+    guild_id = message.guild.id if message.guild is not None else None
+    return (
+        message.channel.id,
+        message.id,
+        guild_id,
+        message.author.id,
+        message.created_at.timestamp(),
+    )
+
+
+def snowflake_before(when: datetime) -> int:
+    """Smallest message id created at ``when``; older messages have smaller ids"""
+    return discord.utils.time_snowflake(when, high=False)
+
+
+class MessageMirror:
+    """Indexed SQLite copy of message metadata (id, channel, author, time).
+
+    Gateway events are buffered in memory and written in one transaction
+    every ``flush_interval`` seconds (or sooner once ``batch_size`` rows are
+    waiting) on a dedicated thread, so the event loop never touches the
+    database file. Queries run on the same thread after pending writes.
+
+    A channel's rows are only trusted once a backfill has walked its whole
+    history (``is_complete``); until then commands keep paging the API.
+    After a restart, complete channels are also untrusted until a sync has
+    read what was sent while the bot was down.
+    """
+
+    def __init__(
+        self,
+        path: str = os.path.join("data", "messages.sqlite3"),
+        metrics: Optional[MetricsRegistry] = None,
+        flush_interval: float = 1.0,
+        batch_size: int = 500,
+    ):
+        self.path = Path(path)
+        self.metrics = metrics
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+
+        self._db: Optional[sqlite3.Connection] = None
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="message-mirror"
+        )
+        # Ordered ("add", rows) / ("remove", ids) / ("forget", channel_id) operations
+        self._pending: List[tuple] = []
+        self._pending_rows = 0
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._flush_lock = asyncio.Lock()
+        self._complete: Set[int] = set()
+        self._syncing: Set[int] = set()
+
+        if metrics is not None:
+            metrics.describe(MIRROR_ROWS, "counter", "Mirror rows written, by operation")
+            metrics.describe(MIRROR_QUERIES, "counter", "Mirror queries, by query")
+
+    # --- Lifecycle
+
+    def _open(self) -> Set[int]:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        db = sqlite3.connect(str(self.path), check_same_thread=False)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        db.executescript(SCHEMA)
+        self._db = db
+        return {
+            channel_id
+            for (channel_id,) in db.execute(
+                "SELECT channel_id FROM backfill WHERE complete = 1"
+            )
+        }
+
+    async def open(self):
+        """Open (and create) the database file"""
+        if self._db is None:
+            self._complete = await self._run(self._open)
+            # Messages sent while the bot was down are missing until a sync
+            self._syncing |= self._complete
+
+    async def close(self):
+        """Write pending events and close the database"""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if self._db is not None:
+            await self.flush()
+            await self._run(self._db.close)
+            self._db = None
+        self._executor.shutdown(wait=True)
+
+    async def _run(self, func, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, func, *args)
+
+    # --- Writes
+
+    def _queue(self, operation: tuple, rows: int):
+        if self._db is None:
+            return
+        self._pending.append(operation)
+        self._pending_rows += rows
+        if self._pending_rows >= self.batch_size:
+            asyncio.ensure_future(self.flush())
+        elif self._flush_handle is None:
+            loop = asyncio.get_running_loop()
+            self._flush_handle = loop.call_later(
+                self.flush_interval, lambda: asyncio.ensure_future(self.flush())
+            )
+
+    def add(self, message: discord.Message):
+        """Record a new message"""
+        self._queue(("add", [message_row(message)]), 1)
+
+    def add_rows(self, rows: List[Row]):
+        """Record many messages, e.g. from a backfill page"""
+        if rows:
+            self._queue(("add", rows), len(rows))
+
+    def remove(self, channel_id: int, message_ids: Iterable[int]):
+        """Forget deleted messages"""
+        ids = [(channel_id, message_id) for message_id in message_ids]
+        if ids:
+            self._queue(("remove", ids), len(ids))
+
+    def forget_channel(self, channel_id: int):
+        """Drop every row and the backfill state of a deleted channel"""
+        self._complete.discard(channel_id)
+        self._queue(("forget", channel_id), 1)
+
+    def _write(self, operations: List[tuple]):
+        counts = {"add": 0, "remove": 0, "forget": 0}
+        with self._db:
+            for kind, payload in operations:
+                if kind == "add":
+                    self._db.executemany(
+                        "INSERT OR REPLACE INTO messages VALUES (?, ?, ?, ?, ?)", payload
+                    )
+                    counts[kind] += len(payload)
+                elif kind == "remove":
+                    self._db.executemany(
+                        "DELETE FROM messages WHERE channel_id = ? AND id = ?", payload
+                    )
+                    counts[kind] += len(payload)
+                else:
+                    self._db.execute(
+                        "DELETE FROM messages WHERE channel_id = ?", (payload,)
+                    )
+                    self._db.execute(
+                        "DELETE FROM backfill WHERE channel_id = ?", (payload,)
+                    )
+                    counts[kind] += 1
+        return counts
+
+    async def flush(self):
+        """Write buffered events; queries call this first so they see them"""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        async with self._flush_lock:
+            if not self._pending or self._db is None:
+                return
+            operations, self._pending, self._pending_rows = self._pending, [], 0
+            try:
+                counts = await self._run(self._write, operations)
+            except sqlite3.Error as e:
+                logger.error(
+                    f"Message mirror write failed, {len(operations)} batches lost: {e}"
+                )
+                return
+            if self.metrics is not None:
+                for kind, count in counts.items():
+                    if count:
+                        self.metrics.inc(MIRROR_ROWS, {"operation": kind}, count)
+
+    async def _query(self, name: str, sql: str, params: tuple) -> list:
+        await self.flush()
+        if self.metrics is not None:
+            self.metrics.inc(MIRROR_QUERIES, {"query": name})
+        return await self._run(lambda: self._db.execute(sql, params).fetchall())
+
+    # --- Coverage
+
+    def is_complete(self, channel_id: int) -> bool:
+        """Whether the mirror holds the channel's whole history"""
+        return (
+            self._db is not None
+            and channel_id in self._complete
+            and channel_id not in self._syncing
+        )
+
+    def complete_channels(self) -> Set[int]:
+        return set(self._complete)
+
+    def begin_sync(self, channel_id: int):
+        """Stop trusting a channel while its history is being fetched"""
+        self._syncing.add(channel_id)
+
+    def end_sync(self, channel_id: int):
+        """Trust a channel again; only call once a sync has caught it up"""
+        self._syncing.discard(channel_id)
+
+    async def backfill_state(self, channel_id: int) -> Tuple[Optional[int], bool]:
+        """Where an interrupted backfill stopped, and whether it finished"""
+        rows = await self._query(
+            "backfill_state",
+            "SELECT before_id, complete FROM backfill WHERE channel_id = ?",
+            (channel_id,),
+        )
+        if not rows:
+            return None, False
+        return rows[0][0], bool(rows[0][1])
+
+    async def save_backfill(
+        self, channel_id: int, before_id: Optional[int], complete: bool = False
+    ):
+        """Persist backfill progress after the rows it covers"""
+        await self.flush()
+        await self._run(self._save_backfill, channel_id, before_id, complete)
+        if complete:
+            self._complete.add(channel_id)
+
+    def _save_backfill(self, channel_id, before_id, complete):
+        with self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO backfill VALUES (?, ?, ?)",
+                (channel_id, before_id, int(complete)),
+            )
+
+    async def tracked_channels(self) -> List[int]:
+        """Channels with a finished or interrupted backfill"""
+        rows = await self._query("tracked", "SELECT channel_id FROM backfill", ())
+        return [channel_id for (channel_id,) in rows]
+
+    # --- Queries
+
+    async def newest_id(self, channel_id: int) -> Optional[int]:
+        rows = await self._query(
+            "newest_id",
+            "SELECT MAX(id) FROM messages WHERE channel_id = ?",
+            (channel_id,),
+        )
+        return rows[0][0]
+
+    async def recent_ids(self, channel_id: int, window: int) -> List[int]:
+        """Ids of the channel's latest ``window`` messages, newest first"""
+        rows = await self._query(
+            "recent_ids",
+            "SELECT id FROM messages WHERE channel_id = ? ORDER BY id DESC LIMIT ?",
+            (channel_id, window),
+        )
+        return [message_id for (message_id,) in rows]
+
+    async def ids_before(self, channel_id: int, before_id: int) -> List[int]:
+        """Ids of a channel's messages older than ``before_id``, newest first"""
+        rows = await self._query(
+            "ids_before",
+            "SELECT id FROM messages WHERE channel_id = ? AND id < ? ORDER BY id DESC",
+            (channel_id, before_id),
+        )
+        return [message_id for (message_id,) in rows]
+
+    async def recent_by_author(
+        self, channel_id: int, author_id: int, window: int
+    ) -> List[int]:
+        """Ids by ``author_id`` among the channel's latest ``window`` messages"""
+        rows = await self._query(
+            "recent_by_author",
+            "SELECT id FROM (SELECT id, author_id FROM messages WHERE channel_id = ? "
+            "ORDER BY id DESC LIMIT ?) WHERE author_id = ?",
+            (channel_id, window, author_id),
+        )
+        return [message_id for (message_id,) in rows]
+
+    async def count_since(self, channel_id: int, *after_ids: int) -> List[int]:
+        """Total message count followed by the count newer than each id"""
+        counts = []
+        for after_id in (0, *after_ids):
+            rows = await self._query(
+                "count",
+                "SELECT COUNT(*) FROM messages WHERE channel_id = ? AND id > ?",
+                (channel_id, after_id),
+            )
+            counts.append(rows[0][0])
+        return counts
+
+    async def timestamps(self, channel_id: int, after_id: int = 0) -> Tuple[array, int]:
+        """Creation times of a channel's messages newer than ``after_id``, oldest
+        first, and the id to pass as ``after_id`` to fetch only newer ones later"""
+        await self.flush()
+        if self.metrics is not None:
+            self.metrics.inc(MIRROR_QUERIES, {"query": "timestamps"})
+
+        def load():
+            cursor = self._db.execute(
+                "SELECT created_at FROM messages WHERE channel_id = ? AND id > ? "
+                "ORDER BY id",
+                (channel_id, after_id),
+            )
+            column = array("d", (created_at for (created_at,) in cursor))
+            (newest,) = self._db.execute(
+                "SELECT MAX(id) FROM messages WHERE channel_id = ?", (channel_id,)
+            ).fetchone()
+            return column, max(after_id, newest or 0)
+
+        return await self._run(load)
+
+    async def summary(self) -> dict:
+        """Row and channel totals for status displays"""
+        rows = await self._query(
+            "summary",
+            "SELECT (SELECT COUNT(*) FROM messages), "
+            "(SELECT COUNT(*) FROM backfill WHERE complete = 1), "
+            "(SELECT COUNT(*) FROM backfill WHERE complete = 0)",
+            (),
+        )
+        messages, complete, partial = rows[0]
+        size = sum(
+            path.stat().st_size
+            for path in self.path.parent.glob(self.path.name + "*")
+            if path.is_file()
+        )
+        return {
+            "messages": messages,
+            "complete": complete,
+            "partial": partial,
+            "syncing": len(self._syncing),
+            "bytes": size,
+        }
+
+
+async def delete_message_ids(
+    channel, message_ids: List[int], deleted: Optional[List[int]] = None
+) -> List[int]:
+    """Delete messages by id using bulk deletes wherever Discord allows them.
+
+    Bulk delete takes up to 100 messages younger than 14 days; older ones
+    must be deleted one at a time. Messages that are already gone are
+    skipped. Returns the ids that were deleted; they are also appended to
+    ``deleted`` as they go, so a caller still has them if a request fails.
+    """
+    # A minute of margin so a message does not age out mid-request
+    bulk_cutoff = snowflake_before(
+        discord.utils.utcnow() - timedelta(days=14) + timedelta(minutes=1)
+    )
+    recent = [message_id for message_id in message_ids if message_id > bulk_cutoff]
+    old = [message_id for message_id in message_ids if message_id <= bulk_cutoff]
+
+    if deleted is None:
+        deleted = []
+    for start in range(0, len(recent), 100):
+        chunk = recent[start : start + 100]
+        if len(chunk) == 1:
+            old.extend(chunk)
+            continue
+        await channel.delete_messages([discord.Object(id=i) for i in chunk])
+        deleted.extend(chunk)
+
+    for message_id in old:
+        try:
+            await channel.get_partial_message(message_id).delete()
+        except discord.NotFound:
+            continue
+        deleted.append(message_id)
+    return deleted
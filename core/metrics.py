@@ -0,0 +1,206 @@
+import bisect
+import logging
+import math
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Latency buckets in seconds, from fast replies up to long purges
+DEFAULT_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+    300.0,
+    900.0,
+)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Optional[dict]) -> LabelKey:
+    if not labels:
+        return ()
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(key: LabelKey, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(key) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def percentile(samples: List[float], q: float) -> Optional[float]:
+    """Return the q-th percentile (0-100) of already sorted samples"""
+    if not samples:
+        return None
+    rank = max(0, math.ceil(q / 100 * len(samples)) - 1)
+    return samples[rank]
+
+
+class Histogram:
+    """Prometheus-style cumulative histogram.
+
+    Besides the fixed buckets it keeps a bounded window of recent samples so
+    exact recent percentiles can be reported without unbounded memory.
+    """
+
+    def __init__(self, buckets: Iterable[float] = DEFAULT_BUCKETS, window: int = 1024):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * len(self.buckets)
+        self.count = 0
+        self.sum = 0.0
+        self.recent: deque = deque(maxlen=window)
+
+    def observe(self, value: float):
+        """Record one observation"""
+        index = bisect.bisect_left(self.buckets, value)
+        if index < len(self.counts):
+            self.counts[index] += 1
+        self.count += 1
+        self.sum += value
+        self.recent.append(value)
+
+    def percentiles(self, *qs: float) -> List[Optional[float]]:
+        """Return percentiles over the recent sample window"""
+        samples = sorted(self.recent)
+        return [percentile(samples, q) for q in qs]
+
+
+class MetricsRegistry:
+    """In-process counters, gauges and histograms with Prometheus text output"""
+
+    def __init__(self):
+        self._help: Dict[str, Tuple[str, str]] = {}
+        self._counters: Dict[str, Dict[LabelKey, float]] = {}
+        self._gauges: Dict[str, Dict[LabelKey, float]] = {}
+        self._histograms: Dict[str, Dict[LabelKey, Histogram]] = {}
+
+    def describe(self, name: str, kind: str, help_text: str):
+        """Register the type and help text of a metric"""
+        self._help[name] = (kind, help_text)
+
+    def inc(self, name: str, labels: Optional[dict] = None, value: float = 1.0):
+        """Increase a counter"""
+        series = self._counters.setdefault(name, {})
+        key = _label_key(labels)
+        series[key] = series.get(key, 0.0) + value
+
+    def set_gauge(self, name: str, value: float, labels: Optional[dict] = None):
+        """Set a gauge to an absolute value"""
+        self._gauges.setdefault(name, {})[_label_key(labels)] = value
+
+    def observe(
+        self,
+        name: str,
+        value: float,
+        labels: Optional[dict] = None,
+        buckets: Iterable[float] = DEFAULT_BUCKETS,
+    ):
+        """Record an observation in a histogram"""
+        series = self._histograms.setdefault(name, {})
+        key = _label_key(labels)
+        histogram = series.get(key)
+        if histogram is None:
+            histogram = series[key] = Histogram(buckets)
+        histogram.observe(value)
+
+    def counter_value(self, name: str, labels: Optional[dict] = None) -> float:
+        """Return the current value of a counter"""
+        return self._counters.get(name, {}).get(_label_key(labels), 0.0)
+
+    def counters(self, name: str) -> Dict[LabelKey, float]:
+        """Return every labelled series of a counter"""
+        return dict(self._counters.get(name, {}))
+
+    def histograms(self, name: str) -> Dict[LabelKey, Histogram]:
+        """Return every labelled series of a histogram"""
+        return dict(self._histograms.get(name, {}))
+
+    def render(self) -> str:
+        """Render all metrics in the Prometheus text exposition format"""
+        lines = []
+
+        def header(name, default_kind):
+            kind, help_text = self._help.get(name, (default_kind, ""))
+            if help_text:
+                lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        for name, series in sorted(self._counters.items()):
+            header(name, "counter")
+            for key, value in series.items():
+                lines.append(f"{name}{_format_labels(key)} {value:g}")
+
+        for name, series in sorted(self._gauges.items()):
+            header(name, "gauge")
+            for key, value in series.items():
+                lines.append(f"{name}{_format_labels(key)} {value:g}")
+
+        for name, series in sorted(self._histograms.items()):
+            header(name, "histogram")
+            for key, histogram in series.items():
+                cumulative = 0
+                for bound, count in zip(histogram.buckets, histogram.counts):
+                    cumulative += count
+                    labels = _format_labels(key, ("le", f"{bound:g}"))
+                    lines.append(f"{name}_bucket{labels} {cumulative}")
+                labels = _format_labels(key, ("le", "+Inf"))
+                lines.append(f"{name}_bucket{labels} {histogram.count}")
+                lines.append(f"{name}_sum{_format_labels(key)} {histogram.sum:g}")
+                lines.append(f"{name}_count{_format_labels(key)} {histogram.count}")
+
+        return "\n".join(lines) + "\n"
+
+
+class MetricsServer:
+    """Optional local HTTP endpoint serving ``/metrics``"""
+
+    def __init__(
+        self, registry: MetricsRegistry, host: str = "127.0.0.1", port: int = 9108
+    ):
+        self.registry = registry
+        self.host = host
+        self.port = port
+        self._runner = None
+
+    async def start(self):
+        """Start serving on the configured host and port"""
+        from aiohttp import web
+
+        async def handle_metrics(request):
+            return web.Response(
+                text=self.registry.render(),
+                content_type="text/plain",
+                headers={"X-Content-Type-Options": "nosniff"},
+            )
+
+        app = web.Application()
+        app.router.add_get("/metrics", handle_metrics)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+        logger.info(
+            f"Metrics exporter listening on http://{self.host}:{self.port}/metrics"
+        )
+
+    async def stop(self):
+        """Stop serving"""
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
@@ -0,0 +1,36 @@
+from discord.ext import commands
+
+OWNER = "Bot Owner"
+
+
+def permission_names(**perms: bool) -> str:
+    """Readable names of permissions, e.g. ``manage_messages`` -> Manage Messages"""
+    return ", ".join(
+        name.replace("_", " ").title() for name, value in perms.items() if value
+    )
+
+
+def requires_permissions(**perms: bool):
+    """``commands.has_permissions`` that also names the permissions in the
+    command's ``extras["permissions"]`` for ``!help``.
+
+    It goes above the command decorator, since it needs the command object.
+    """
+    check = commands.has_permissions(**perms)
+
+    def decorator(command: commands.Command) -> commands.Command:
+        command.extras["permissions"] = permission_names(**perms)
+        return check(command)
+
+    return decorator
+
+
+def requires_owner():
+    """``commands.is_owner`` that also shows in ``!help``; see ``requires_permissions``"""
+    check = commands.is_owner()
+
+    def decorator(command: commands.Command) -> commands.Command:
+        command.extras["permissions"] = OWNER
+        return check(command)
+
+    return decorator
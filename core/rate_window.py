@@ -0,0 +1,155 @@
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Slowmode steps in seconds; level 0 leaves the channel's own delay in place
+SLOWMODE_STEPS = (0, 2, 5, 10, 15, 30, 60, 120, 300)
+
+
+class RateWindow:
+    """Events in the last ``window`` seconds, counted in a ring of buckets.
+
+    Each bucket covers ``resolution`` seconds. Recording an event advances
+    the ring past expired buckets, subtracting them from a running total,
+    so both ``add`` and ``count`` are O(1) amortized and the memory per
+    window is fixed.
+    """
+
+    __slots__ = ("window", "resolution", "_buckets", "_total", "_tick")
+
+    def __init__(self, window: float = 60.0, resolution: float = 1.0):
+        self.window = window
+        self.resolution = resolution
+        self._buckets = [0] * max(1, round(window / resolution))
+        self._total = 0
+        self._tick = 0
+
+    def _advance(self, now: float):
+        tick = int(now // self.resolution)
+        elapsed = tick - self._tick
+        if elapsed <= 0:
+            return
+        buckets = self._buckets
+        if elapsed >= len(buckets):
+            buckets[:] = [0] * len(buckets)
+            self._total = 0
+        else:
+            for step in range(1, elapsed + 1):
+                index = (self._tick + step) % len(buckets)
+                self._total -= buckets[index]
+                buckets[index] = 0
+        self._tick = tick
+
+    def add(self, now: float, amount: int = 1):
+        self._advance(now)
+        self._buckets[self._tick % len(self._buckets)] += amount
+        self._total += amount
+
+    def count(self, now: float) -> int:
+        self._advance(now)
+        return self._total
+
+    def per_minute(self, now: float) -> float:
+        return self.count(now) * 60.0 / self.window
+
+
+class SlowmodeGovernor:
+    """Picks a slowmode step for a channel from its message rate.
+
+    Step ``n`` is reached at ``threshold * 2 ** (n - 1)`` messages per
+    minute and is only left again once the rate falls below ``lower_ratio``
+    of that, after holding the step for at least ``hold`` seconds. Slowmode
+    itself lowers the rate, so without the gap and the hold the delay would
+    flap up and down on every evaluation.
+    """
+
+    __slots__ = ("threshold", "max_delay", "lower_ratio", "hold", "level", "changed_at")
+
+    def __init__(
+        self,
+        threshold: float,
+        max_delay: int,
+        lower_ratio: float = 0.5,
+        hold: float = 120.0,
+    ):
+        self.threshold = threshold
+        self.max_delay = max_delay
+        self.lower_ratio = lower_ratio
+        self.hold = hold
+        self.level = 0
+        self.changed_at = 0.0
+
+    def steps(self) -> List[int]:
+        return [step for step in SLOWMODE_STEPS if step <= self.max_delay]
+
+    def raise_at(self, level: int) -> float:
+        return self.threshold * 2 ** (level - 1)
+
+    def update(self, rate: float, now: float) -> Optional[int]:
+        """Move to the step for ``rate``, returning its delay if it changed"""
+        steps = self.steps()
+        # A lowered max_delay caps the current step right away
+        start = min(self.level, len(steps) - 1)
+        level = start
+        while level + 1 < len(steps) and rate >= self.raise_at(level + 1):
+            level += 1
+        if level == start and level > 0 and now - self.changed_at >= self.hold:
+            while level > 0 and rate < self.raise_at(level) * self.lower_ratio:
+                level -= 1
+
+        if level == self.level:
+            return None
+        self.level = level
+        self.changed_at = now
+        return steps[level]
+
+
+class ChannelRates:
+    """Message rate windows and governors of the watched channels"""
+
+    def __init__(
+        self,
+        window: float = 60.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.window = window
+        self.clock = clock
+        self._windows: Dict[int, RateWindow] = {}
+        self._governors: Dict[int, SlowmodeGovernor] = {}
+
+    def __contains__(self, channel_id: int) -> bool:
+        return channel_id in self._windows
+
+    def watch(self, channel_id: int, threshold: float, max_delay: int):
+        if channel_id not in self._windows:
+            self._windows[channel_id] = RateWindow(self.window)
+            self._governors[channel_id] = SlowmodeGovernor(threshold, max_delay)
+        else:
+            governor = self._governors[channel_id]
+            governor.threshold = threshold
+            governor.max_delay = max_delay
+
+    def unwatch(self, channel_id: int) -> Optional[SlowmodeGovernor]:
+        self._windows.pop(channel_id, None)
+        return self._governors.pop(channel_id, None)
+
+    def record(self, channel_id: int):
+        window = self._windows.get(channel_id)
+        if window is not None:
+            window.add(self.clock())
+
+    def rate(self, channel_id: int) -> float:
+        window = self._windows.get(channel_id)
+        return window.per_minute(self.clock()) if window is not None else 0.0
+
+    def governor(self, channel_id: int) -> Optional[SlowmodeGovernor]:
+        return self._governors.get(channel_id)
+
+    def evaluate(self) -> List[Tuple[int, int]]:
+        """``(channel_id, delay)`` for every channel whose step changed"""
+        now = self.clock()
+        changes = []
+        for channel_id, window in self._windows.items():
+            delay = self._governors[channel_id].update(window.per_minute(now), now)
+            if delay is not None:
+                changes.append((channel_id, delay))
+        return changes
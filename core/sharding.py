@@ -0,0 +1,107 @@
+import json
+import os
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from core.config_store import atomic_write_json
+from core.env import env_flag
+
+CLUSTER_DIR = Path("data") / "cluster"
+
+
+def shard_options_from_env() -> Optional[dict]:
+    """Build AutoShardedBot options from the environment.
+
+    ``AUTO_SHARD=true`` lets Discord pick the shard count, ``SHARD_COUNT``
+    fixes it and ``SHARD_IDS`` (comma separated) restricts this process to a
+    subset of shards. Returns ``None`` when sharding is not enabled.
+    """
+    shard_count = os.getenv("SHARD_COUNT")
+    shard_ids = os.getenv("SHARD_IDS")
+
+    if not (shard_count or shard_ids or env_flag("AUTO_SHARD")):
+        return None
+
+    options = {}
+    if shard_count:
+        options["shard_count"] = int(shard_count)
+    if shard_ids:
+        options["shard_ids"] = [int(i) for i in shard_ids.split(",") if i.strip()]
+    return options
+
+
+def shard_for_guild(guild_id: int, shard_count: int) -> int:
+    """Return the shard that receives events for a guild"""
+    return (guild_id >> 22) % shard_count
+
+
+def guild_filter_from_env():
+    """Return a predicate selecting the guilds owned by this process, if any"""
+    shard_count = os.getenv("SHARD_COUNT")
+    shard_ids = os.getenv("SHARD_IDS")
+    if not (shard_count and shard_ids):
+        return None
+
+    count = int(shard_count)
+    owned = {int(i) for i in shard_ids.split(",") if i.strip()}
+    return lambda guild_id: shard_for_guild(guild_id, count) in owned
+
+
+def split_shards(shard_count: int, clusters: int) -> List[List[int]]:
+    """Spread shard ids as evenly as possible across clusters"""
+    clusters = max(1, min(clusters, shard_count))
+    size, extra = divmod(shard_count, clusters)
+    ranges = []
+    start = 0
+    for index in range(clusters):
+        end = start + size + (1 if index < extra else 0)
+        ranges.append(list(range(start, end)))
+        start = end
+    return ranges
+
+
+def cluster_id() -> str:
+    """Return the id of the cluster this process belongs to"""
+    return os.getenv("CLUSTER_ID", "0")
+
+
+def build_cluster_status(bot) -> dict:
+    """Describe this process for the shared cluster status store"""
+    latencies = getattr(bot, "latencies", [(bot.shard_id or 0, bot.latency)])
+    return {
+        "cluster_id": cluster_id(),
+        "pid": os.getpid(),
+        "updated_at": time.time(),
+        "shard_count": bot.shard_count or 1,
+        "shards": {
+            str(shard_id): round(latency * 1000, 1) for shard_id, latency in latencies
+        },
+        "guilds": len(bot.guilds),
+        "members": sum(guild.member_count or 0 for guild in bot.guilds),
+    }
+
+
+def write_cluster_status(status: dict, directory: Path = CLUSTER_DIR):
+    """Atomically publish this process' status to the shared store"""
+    atomic_write_json(directory / f"{status['cluster_id']}.json", status)
+
+
+def read_cluster_status(
+    directory: Path = CLUSTER_DIR, max_age: float = 120.0
+) -> Dict[str, dict]:
+    """Read the status of every cluster that reported within ``max_age``"""
+    statuses = {}
+    if not directory.exists():
+        return statuses
+
+    now = time.time()
+    for path in directory.glob("*.json"):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                status = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            continue
+        status["stale"] = now - status.get("updated_at", 0) > max_age
+        statuses[status.get("cluster_id", path.stem)] = status
+    return statuses
@@ -0,0 +1,102 @@
+import asyncio
+import json
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, Optional, Tuple
+
+from core.config_store import atomic_write_json
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_VERSION = 1
+
+
+class SnapshotStore:
+    """Derived in-memory state saved to one file for warm restarts.
+
+    Components register a ``dump`` callable returning plain JSON data and a
+    ``restore`` callable that merges such data back in. Dumps run on the
+    event loop and must copy what they return; encoding and writing happen
+    on a background thread. Restores only add what the live state doesn't
+    have yet, so a snapshot read after the first gateway events never
+    overwrites newer information.
+    """
+
+    def __init__(self, path, version: int = SNAPSHOT_VERSION):
+        self.path = Path(path)
+        self.version = version
+        self.restored = False
+        self._sections: Dict[str, Tuple[Callable[[], object], Callable]] = {}
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="snapshot-writer"
+        )
+
+    def register(self, name: str, dump: Callable[[], object], restore: Callable):
+        self._sections[name] = (dump, restore)
+
+    def collect(self) -> dict:
+        sections = {}
+        for name, (dump, _) in self._sections.items():
+            try:
+                sections[name] = dump()
+            except Exception as e:
+                logger.error(f"Could not snapshot {name}: {e}")
+        return {"version": self.version, "saved_at": time.time(), "sections": sections}
+
+    @staticmethod
+    def _write(path: Path, data: dict):
+        atomic_write_json(path, json.dumps(data, separators=(",", ":")))
+
+    async def save(self):
+        """Snapshot every section and write it on the background thread"""
+        data = self.collect()
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self._executor, self._write, self.path, data)
+
+    def save_sync(self):
+        """Snapshot and write on the calling thread, e.g. at shutdown"""
+        if self.restored:
+            self._write(self.path, self.collect())
+
+    def read(self) -> Optional[dict]:
+        """Read and check the snapshot file; run in a thread"""
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable snapshot {self.path}: {e}")
+            return None
+        if data.get("version") != self.version:
+            logger.info(f"Ignoring snapshot {self.path}: version {data.get('version')}")
+            return None
+        return data
+
+    async def restore(self):
+        """Load the snapshot in the background and merge every section"""
+        started = time.perf_counter()
+        try:
+            data = await asyncio.to_thread(self.read)
+            if data is None:
+                return
+            for name, section in data.get("sections", {}).items():
+                entry = self._sections.get(name)
+                if entry is None:
+                    continue
+                try:
+                    entry[1](section)
+                except Exception as e:
+                    logger.error(f"Could not restore {name} from snapshot: {e}")
+            age = time.time() - data.get("saved_at", 0)
+            logger.info(
+                f"Restored snapshot from {age:.0f}s ago in "
+                f"{time.perf_counter() - started:.2f}s"
+            )
+        finally:
+            self.restored = True
+
+    def close(self):
+        self._executor.shutdown(wait=True)
@@ -0,0 +1,45 @@
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+
+class StartupTimer:
+    """Record how long each phase of the bot's startup takes.
+
+    Phases are either timed blocks (``with timer.phase("extensions")``) or
+    milestones (``timer.mark("ready")``) measured from process start.
+    """
+
+    def __init__(self, started: Optional[float] = None):
+        self.started = started if started is not None else time.perf_counter()
+        self.durations: Dict[str, float] = {}
+        self.milestones: Dict[str, float] = {}
+
+    @contextmanager
+    def phase(self, name: str):
+        """Time a block of startup work"""
+        begin = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.durations[name] = time.perf_counter() - begin
+
+    def mark(self, name: str) -> bool:
+        """Record a milestone the first time it is reached"""
+        if name in self.milestones:
+            return False
+        self.milestones[name] = time.perf_counter() - self.started
+        return True
+
+    def as_dict(self) -> dict:
+        """Return all recorded timings in seconds"""
+        return {"phases": dict(self.durations), "milestones": dict(self.milestones)}
+
+    def report(self) -> str:
+        """Format the recorded timings for logging"""
+        lines = ["Startup timings:"]
+        for name, seconds in self.durations.items():
+            lines.append(f"  {name}: {seconds * 1000:.1f} ms")
+        for name, seconds in sorted(self.milestones.items(), key=lambda i: i[1]):
+            lines.append(f"  +{seconds * 1000:.1f} ms {name}")
+        return "\n".join(lines)
@@ -0,0 +1,392 @@
+import asyncio
+import heapq
+import json
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, Hashable, Iterable, List, Optional, Set, Tuple
+
+from core.config_store import atomic_write_json
+
+logger = logging.getLogger(__name__)
+
+FORMAT_VERSION = 1
+DAY = 86_400
+# Guilds without activity or queries for this long are dropped from memory
+# after their next save and read back from disk when used again
+IDLE_SECONDS = 3600
+
+
+class SpaceSaving:
+    """Approximate top-k counter in fixed memory (the Space-Saving algorithm).
+
+    At most ``capacity`` keys are tracked. A new key replaces the one with
+    the smallest count and inherits that count as its possible
+    overestimate (``error``), so every key seen more than
+    ``total / capacity`` times is guaranteed to be tracked. The smallest
+    count is found with a lazily updated min-heap.
+    """
+
+    __slots__ = ("capacity", "counts", "errors", "_heap")
+
+    def __init__(self, capacity: int = 64):
+        self.capacity = capacity
+        self.counts: Dict[Hashable, int] = {}
+        self.errors: Dict[Hashable, int] = {}
+        self._heap: List[Tuple[int, Hashable]] = []
+
+    def __len__(self):
+        return len(self.counts)
+
+    def add(self, key: Hashable, amount: int = 1):
+        counts = self.counts
+        if key in counts:
+            counts[key] += amount
+        elif len(counts) < self.capacity:
+            counts[key] = amount
+            self.errors[key] = 0
+        else:
+            floor, victim = self._pop_min()
+            del counts[victim]
+            del self.errors[victim]
+            counts[key] = floor + amount
+            self.errors[key] = floor
+        heapq.heappush(self._heap, (counts[key], key))
+        if len(self._heap) > 4 * self.capacity:
+            self._rebuild_heap()
+
+    def _pop_min(self) -> Tuple[int, Hashable]:
+        # Heap entries go stale when a key is counted again; skip those
+        while True:
+            count, key = heapq.heappop(self._heap)
+            if self.counts.get(key) == count:
+                return count, key
+
+    def _rebuild_heap(self):
+        self._heap = [(count, key) for key, count in self.counts.items()]
+        heapq.heapify(self._heap)
+
+    def top(self, n: int = 10) -> List[Tuple[Hashable, int, int]]:
+        """The ``n`` largest ``(key, count, error)`` entries"""
+        keys = heapq.nlargest(n, self.counts, key=self.counts.__getitem__)
+        return [(key, self.counts[key], self.errors[key]) for key in keys]
+
+    @classmethod
+    def merge(cls, sketches: Iterable["SpaceSaving"], capacity: int) -> "SpaceSaving":
+        """Combine sketches (e.g. several days) into one of ``capacity`` keys.
+
+        A key missing from a full sketch may still have been counted there up
+        to that sketch's smallest count, so it is added to the key's count
+        and error; counts stay upper bounds and ``count - error`` lower ones.
+        """
+        counts: Dict[Hashable, int] = {}
+        errors: Dict[Hashable, int] = {}
+        # Smallest count of each full sketch, and the part of it a key has
+        # not been given yet because the key was tracked in that sketch
+        floors = 0
+        tracked: Dict[Hashable, int] = {}
+        for sketch in sketches:
+            floor = 0
+            if len(sketch.counts) >= sketch.capacity:
+                floor = min(sketch.counts.values())
+                floors += floor
+            for key, count in sketch.counts.items():
+                counts[key] = counts.get(key, 0) + count
+                errors[key] = errors.get(key, 0) + sketch.errors[key]
+                tracked[key] = tracked.get(key, 0) + floor
+        for key in counts:
+            missed = floors - tracked[key]
+            counts[key] += missed
+            errors[key] += missed
+
+        merged = cls(capacity)
+        for key in heapq.nlargest(capacity, counts, key=counts.__getitem__):
+            merged.counts[key] = counts[key]
+            merged.errors[key] = errors[key]
+        merged._rebuild_heap()
+        return merged
+
+    def to_list(self) -> list:
+        return [[key, count, self.errors[key]] for key, count in self.counts.items()]
+
+    @classmethod
+    def from_list(cls, entries: list, capacity: int) -> "SpaceSaving":
+        sketch = cls(capacity)
+        for key, count, error in entries[:capacity]:
+            sketch.counts[key] = count
+            sketch.errors[key] = error
+        sketch._rebuild_heap()
+        return sketch
+
+
+class GuildLeaderboards:
+    """Per-day and all-time sketches of one guild, for each kind of ranking.
+
+    Multi-day windows are merged from the daily sketches once a day, on
+    their first query, and then kept current by every ``record``.
+    """
+
+    def __init__(self, capacity: int, retention_days: int):
+        self.capacity = capacity
+        self.retention_days = retention_days
+        # kind -> day number -> sketch, and kind -> all-time sketch
+        self.days: Dict[str, Dict[int, SpaceSaving]] = {}
+        self.all_time: Dict[str, SpaceSaving] = {}
+        # (kind, days) -> merged window ending on window_day
+        self.windows: Dict[Tuple[str, int], SpaceSaving] = {}
+        self.window_day: Optional[int] = None
+
+    def _roll_windows(self, today: int):
+        # Space-Saving sketches cannot drop a day, so windows are re-merged
+        if today != self.window_day:
+            self.windows.clear()
+            self.window_day = today
+
+    def record(self, kind: str, key: Hashable, day: int, amount: int = 1):
+        self._roll_windows(day)
+        for (window_kind, _), sketch in self.windows.items():
+            if window_kind == kind:
+                sketch.add(key, amount)
+
+        days = self.days.setdefault(kind, {})
+        sketch = days.get(day)
+        if sketch is None:
+            sketch = days[day] = SpaceSaving(self.capacity)
+            for old in [d for d in days if d <= day - self.retention_days]:
+                del days[old]
+        sketch.add(key, amount)
+
+        total = self.all_time.get(kind)
+        if total is None:
+            total = self.all_time[kind] = SpaceSaving(self.capacity)
+        total.add(key, amount)
+
+    def window(self, kind: str, today: int, days: Optional[int]) -> SpaceSaving:
+        """Sketch for the last ``days`` days including today, or all time"""
+        if days is None:
+            return self.all_time.get(kind) or SpaceSaving(self.capacity)
+        buckets = self.days.get(kind, {})
+        if days == 1:
+            return buckets.get(today) or SpaceSaving(self.capacity)
+        self._roll_windows(today)
+        sketch = self.windows.get((kind, days))
+        if sketch is None:
+            sketch = self.windows[(kind, days)] = SpaceSaving.merge(
+                (sketch for day, sketch in buckets.items() if day > today - days),
+                self.capacity,
+            )
+        return sketch
+
+    def absorb(self, other: "GuildLeaderboards"):
+        """Add counts recorded elsewhere, e.g. while this guild was being read"""
+        for kind, sketch in other.all_time.items():
+            mine = self.all_time.get(kind)
+            if mine is not None:
+                sketch = SpaceSaving.merge([mine, sketch], self.capacity)
+            self.all_time[kind] = sketch
+        for kind, days in other.days.items():
+            mine = self.days.setdefault(kind, {})
+            for day, sketch in days.items():
+                if day in mine:
+                    sketch = SpaceSaving.merge([mine[day], sketch], self.capacity)
+                mine[day] = sketch
+        self.windows.clear()
+
+    def to_dict(self) -> dict:
+        return {
+            "version": FORMAT_VERSION,
+            "kinds": {
+                kind: {
+                    "all": self.all_time[kind].to_list(),
+                    "days": {
+                        str(day): sketch.to_list()
+                        for day, sketch in self.days.get(kind, {}).items()
+                    },
+                }
+                for kind in self.all_time
+            },
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict, capacity: int, retention_days: int, today: int):
+        boards = cls(capacity, retention_days)
+        if data.get("version") != FORMAT_VERSION:
+            return boards
+        for kind, entry in data.get("kinds", {}).items():
+            boards.all_time[kind] = SpaceSaving.from_list(entry.get("all", []), capacity)
+            boards.days[kind] = {
+                int(day): SpaceSaving.from_list(entries, capacity)
+                for day, entries in entry.get("days", {}).items()
+                if int(day) > today - retention_days
+            }
+        return boards
+
+
+class LeaderboardStore:
+    """Top-k leaderboards for every guild, persisted as per-guild partitions.
+
+    Updates are O(log capacity) and only touch memory; dirty guilds are
+    written to ``<root>/<guild_id>.json`` on a background thread when
+    ``flush`` is called, so counts survive restarts. Guilds idle for
+    ``idle_seconds`` are then dropped from memory and read back on the same
+    thread, after any pending write, when they are next used.
+    """
+
+    def __init__(
+        self,
+        root: str = os.path.join("data", "leaderboards"),
+        capacity: int = 64,
+        retention_days: int = 30,
+        clock: Callable[[], float] = time.time,
+        idle_seconds: float = IDLE_SECONDS,
+    ):
+        self.root = Path(root)
+        self.capacity = capacity
+        self.retention_days = retention_days
+        self.clock = clock
+        self.idle_seconds = idle_seconds
+        self._guilds: Dict[int, GuildLeaderboards] = {}
+        self._dirty: Set[int] = set()
+        self._last_used: Dict[int, float] = {}
+        # Guilds dropped from memory whose partition is only on disk
+        self._evicted: Set[int] = set()
+        self._loading: Dict[int, asyncio.Future] = {}
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="leaderboard-writer"
+        )
+
+    def today(self) -> int:
+        return int(self.clock() // DAY)
+
+    def load(self, guild_filter: Optional[Callable[[int], bool]] = None):
+        """Read saved partitions; run in a thread, it touches every file"""
+        if not self.root.exists():
+            return
+        today = self.today()
+        for path in self.root.glob("*.json"):
+            try:
+                guild_id = int(path.stem)
+            except ValueError:
+                continue
+            if guild_filter is not None and not guild_filter(guild_id):
+                continue
+            boards = self._read(path, today)
+            if boards is not None:
+                self._guilds[guild_id] = boards
+                self._last_used[guild_id] = self.clock()
+
+    def _read(self, path: Path, today: int) -> Optional[GuildLeaderboards]:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Skipping unreadable leaderboard {path}: {e}")
+            return None
+        return GuildLeaderboards.from_dict(
+            data, self.capacity, self.retention_days, today
+        )
+
+    def _boards(self, guild_id: int) -> GuildLeaderboards:
+        self._last_used[guild_id] = self.clock()
+        boards = self._guilds.get(guild_id)
+        if boards is None:
+            boards = self._guilds[guild_id] = GuildLeaderboards(
+                self.capacity, self.retention_days
+            )
+            if guild_id in self._evicted:
+                self._evicted.discard(guild_id)
+                reload = asyncio.ensure_future(self._reload(guild_id))
+                self._loading[guild_id] = reload
+        return boards
+
+    async def _reload(self, guild_id: int):
+        """Read an evicted guild back; counts recorded meanwhile are added"""
+        try:
+            loop = asyncio.get_running_loop()
+            boards = await loop.run_in_executor(
+                self._executor,
+                self._read,
+                self.root / f"{guild_id}.json",
+                self.today(),
+            )
+            recorded = self._guilds.get(guild_id)
+            if boards is not None and recorded is not None:
+                boards.absorb(recorded)
+                self._guilds[guild_id] = boards
+        finally:
+            self._loading.pop(guild_id, None)
+
+    def record(self, guild_id: int, kind: str, key: Hashable, amount: int = 1):
+        self._boards(guild_id).record(kind, key, self.today(), amount)
+        self._dirty.add(guild_id)
+
+    async def top(
+        self, guild_id: int, kind: str, days: Optional[int], n: int = 10
+    ) -> List[Tuple[Hashable, int, int]]:
+        """Largest ``(key, count, error)`` entries over a window of days"""
+        if guild_id in self._evicted:
+            self._boards(guild_id)
+        loading = self._loading.get(guild_id)
+        if loading is not None:
+            await loading
+        boards = self._guilds.get(guild_id)
+        if boards is None:
+            return []
+        self._last_used[guild_id] = self.clock()
+        return boards.window(kind, self.today(), days).top(n)
+
+    def forget_guild(self, guild_id: int):
+        self._guilds.pop(guild_id, None)
+        self._last_used.pop(guild_id, None)
+        self._evicted.discard(guild_id)
+        self._dirty.add(guild_id)
+
+    def _collect_payloads(self) -> List[Tuple[Path, Optional[str]]]:
+        payloads = []
+        # A guild still being read back would overwrite its file with partial counts
+        waiting = {guild_id for guild_id in self._dirty if guild_id in self._loading}
+        for guild_id in self._dirty - waiting:
+            boards = self._guilds.get(guild_id)
+            text = None
+            if boards is not None:
+                text = json.dumps(boards.to_dict(), separators=(",", ":"))
+            payloads.append((self.root / f"{guild_id}.json", text))
+        self._dirty = waiting
+        return payloads
+
+    def _evict_idle(self):
+        # Only guilds whose latest counts are saved or queued for saving
+        cutoff = self.clock() - self.idle_seconds
+        busy = self._dirty | self._loading.keys()
+        for guild_id, used in list(self._last_used.items()):
+            if used < cutoff and guild_id not in busy:
+                del self._last_used[guild_id]
+                if self._guilds.pop(guild_id, None) is not None:
+                    self._evicted.add(guild_id)
+
+    @staticmethod
+    def _write_payloads(payloads: List[Tuple[Path, Optional[str]]]):
+        for path, text in payloads:
+            if text is None:
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+            else:
+                atomic_write_json(path, text)
+
+    async def flush(self):
+        """Write dirty guilds on the background writer thread, then drop idle ones"""
+        payloads = self._collect_payloads()
+        self._evict_idle()
+        if payloads:
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(self._executor, self._write_payloads, payloads)
+
+    async def close(self):
+        await self.flush()
+        self._executor.shutdown(wait=True)
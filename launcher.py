@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Discord Utils Bot Cluster Launcher
+Runs the bot as several processes, each owning a range of shards, so a
+large bot can use every CPU core of one machine.
+
+Usage: python launcher.py [--clusters N] [--shards N]
+"""
+
+import argparse
+import asyncio
+import logging
+import multiprocessing
+import os
+import runpy
+import sys
+import time
+
+import discord
+from dotenv import load_dotenv
+
+from core.config_store import ConfigStore
+from core.sharding import split_shards
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("launcher")
+
+IDENTIFY_INTERVAL = 5.0
+RESTART_DELAY = 10.0
+# How long clusters get to flush config, snapshots and logs after Ctrl-C
+SHUTDOWN_TIMEOUT = 30.0
+
+
+def run_cluster(cluster_index, shard_ids, shard_count):
+    """Entry point of a worker process: run main.py for a range of shards"""
+    os.environ["CLUSTER_ID"] = str(cluster_index)
+    os.environ["SHARD_COUNT"] = str(shard_count)
+    os.environ["SHARD_IDS"] = ",".join(str(i) for i in shard_ids)
+    runpy.run_module("main", run_name="__main__")
+
+
+async def fetch_gateway_info(token):
+    """Ask Discord for the recommended shard count and identify concurrency"""
+    http = discord.http.HTTPClient(asyncio.get_running_loop())
+    try:
+        await http.static_login(token)
+        shards, _, session_limit = await http.get_bot_gateway()
+        return shards, session_limit.get("max_concurrency", 1)
+    finally:
+        await http.close()
+
+
+def start_cluster(context, index, shard_ids, shard_count):
+    """Spawn a worker process for one cluster"""
+    process = context.Process(
+        target=run_cluster,
+        args=(index, shard_ids, shard_count),
+        name=f"cluster-{index}",
+    )
+    process.start()
+    logger.info(f"Started cluster {index} (pid {process.pid}) with shards {shard_ids}")
+    return process
+
+
+def main():
+    """Launch and supervise the shard clusters"""
+    parser = argparse.ArgumentParser(description="Run the bot as shard clusters")
+    parser.add_argument(
+        "--clusters",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="number of worker processes (default: CPU count)",
+    )
+    parser.add_argument(
+        "--shards",
+        type=int,
+        default=None,
+        help="total shard count (default: Discord's recommendation)",
+    )
+    args = parser.parse_args()
+
+    load_dotenv()
+    token = os.getenv("DISCORD_TOKEN")
+    if not token:
+        print("❌ No Discord token found. Please set DISCORD_TOKEN in your .env file.")
+        sys.exit(1)
+
+    recommended, max_concurrency = asyncio.run(fetch_gateway_info(token))
+    shard_count = args.shards or recommended
+
+    # Migrate legacy config once, before workers race to do it
+    ConfigStore(os.path.join("data", "config"), legacy_file="bot_config.json").load()
+
+    ranges = split_shards(shard_count, args.clusters)
+    logger.info(f"Running {shard_count} shards across {len(ranges)} clusters")
+
+    context = multiprocessing.get_context("spawn")
+    processes = {}
+    for index, shard_ids in enumerate(ranges):
+        processes[index] = start_cluster(context, index, shard_ids, shard_count)
+        # Only max_concurrency shards may identify per interval across all clusters
+        time.sleep(IDENTIFY_INTERVAL * len(shard_ids) / max_concurrency)
+
+    try:
+        while True:
+            time.sleep(RESTART_DELAY)
+            for index, process in processes.items():
+                if not process.is_alive():
+                    logger.warning(
+                        f"Cluster {index} exited with code {process.exitcode}, "
+                        "restarting"
+                    )
+                    processes[index] = start_cluster(
+                        context, index, ranges[index], shard_count
+                    )
+    except KeyboardInterrupt:
+        print("\n⚠️ Stopping clusters...")
+        # Ctrl-C reached every cluster too; let them finish their own shutdown
+        deadline = time.monotonic() + SHUTDOWN_TIMEOUT
+        for process in processes.values():
+            process.join(max(0.0, deadline - time.monotonic()))
+        for index, process in processes.items():
+            if process.is_alive():
+                logger.warning(f"Cluster {index} did not stop in time, terminating")
+                process.terminate()
+                process.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,38 @@
+from core.startup import StartupTimer
+
+startup = StartupTimer()
+
 import discord
 from discord.ext import commands, tasks
 import asyncio
 import os
+import time
 from datetime import datetime, timedelta, timezone
 import logging
 from dotenv import load_dotenv
 from typing import Optional
-import json
+
+from core.admission import AdmissionController, AdmissionRejected, limits_from_env
+from core.audit import AuditLog, context_fields
+from core.channel_counts import ChannelCounts
+from core.config_store import ConfigStore
+from core.env import env_flag, env_float, env_int
+from core.guild_usage import GuildUsage
+from core.http_telemetry import HttpTelemetry, current_guild, current_operation
+from core.loop_monitor import LoopMonitor
+from core.member_stats import MemberStats
+from core.message_mirror import MessageMirror, delete_message_ids, snowflake_before
+from core.metrics import MetricsRegistry
+from core.permissions import requires_owner, requires_permissions
+from core.sharding import (
+    build_cluster_status,
+    cluster_id,
+    guild_filter_from_env,
+    read_cluster_status,
+    shard_options_from_env,
+    write_cluster_status,
+)
+from core.snapshot import SnapshotStore
 
 load_dotenv()
 
@@ -14,58 +40,295 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 intents = discord.Intents.default()
-intents.message_content = True
+# Without the message content intent, prefix commands only work when they
+# mention the bot; the slash commands are unaffected
+intents.message_content = env_flag("MESSAGE_CONTENT_INTENT", default=True)
 intents.guilds = True
 intents.members = True
 
-bot = commands.Bot(command_prefix="!", intents=intents)
+metrics = MetricsRegistry()
+http_telemetry = HttpTelemetry(metrics)
+
+bot_options = {"http_trace": http_telemetry.trace_config}
+if env_flag("LEAN_CACHE"):
+    # Keep only our own member cached and never chunk member lists
+    bot_options["member_cache_flags"] = discord.MemberCacheFlags.none()
+    bot_options["chunk_guilds_at_startup"] = False
+
+command_prefix = "!" if intents.message_content else commands.when_mentioned_or("!")
+
+shard_options = shard_options_from_env()
+if shard_options is not None:
+    bot = commands.AutoShardedBot(
+        command_prefix=command_prefix, intents=intents, **bot_options, **shard_options
+    )
+else:
+    bot = commands.Bot(command_prefix=command_prefix, intents=intents, **bot_options)
+
+http_telemetry.install(bot)
+bot.metrics = metrics
+bot.http_telemetry = http_telemetry
+
+loop_monitor = LoopMonitor(
+    metrics,
+    warn_threshold=env_float("LOOP_LAG_WARN_MS", 100) / 1000,
+    stall_threshold=env_float("LOOP_STALL_MS", 500) / 1000,
+)
+bot.loop_monitor = loop_monitor
+
+member_stats = MemberStats()
+bot.member_stats = member_stats
+
+admission = AdmissionController(
+    limits_from_env(), metrics, total=env_int("ADMISSION_TOTAL", 6)
+)
+bot.admission = admission
+
+# Rotation is not safe across processes, so each cluster writes its own files
+audit = AuditLog(os.path.join("logs", "audit", cluster_id()), metrics)
+bot.audit = audit
+
+guild_usage = GuildUsage()
+audit.subscribe(guild_usage.on_audit_event)
+http_telemetry.listeners.append(guild_usage.record_api_call)
+bot.guild_usage = guild_usage
+
+channel_counts = ChannelCounts()
+bot.channel_counts = channel_counts
+
+# When auto cleanup last ran in each channel, so a restart doesn't purge again
+CLEANUP_INTERVAL_HOURS = 24
+cleanup_runs = {}
+
+
+def dump_cleanup_runs():
+    return {
+        str(channel_id): ran_at
+        for channel_id, ran_at in cleanup_runs.items()
+        if config.cleanup_for(channel_id) is not None
+    }
+
+
+def restore_cleanup_runs(data):
+    for channel_id, ran_at in data.items():
+        channel_id = int(channel_id)
+        cleanup_runs[channel_id] = max(ran_at, cleanup_runs.get(channel_id, 0))
+
+
+snapshots = SnapshotStore(os.path.join("data", "snapshots", f"{cluster_id()}.json"))
+snapshots.register("member_stats", member_stats.to_dict, member_stats.restore)
+snapshots.register("guild_usage", guild_usage.to_dict, guild_usage.restore)
+snapshots.register("channel_counts", channel_counts.to_dict, channel_counts.restore)
+snapshots.register("cleanup_runs", dump_cleanup_runs, restore_cleanup_runs)
+bot.snapshots = snapshots
+restoring_snapshot = None
 
 CONFIG_FILE = "bot_config.json"
+CONFIG_DIR = os.path.join("data", "config")
+
+EXTENSIONS = (
+    "cogs.advanced_utils",
+    "cogs.analytics",
+    "cogs.auto_slowmode",
+    "cogs.help",
+    "cogs.leaderboard",
+    "cogs.perf",
+    "cogs.restore",
+)
+
+message_mirror = None
+if env_flag("MESSAGE_MIRROR"):
+    message_mirror = MessageMirror(
+        os.getenv("MESSAGE_MIRROR_PATH", os.path.join("data", "messages.sqlite3")),
+        metrics,
+    )
+    EXTENSIONS += ("cogs.mirror",)
+bot.message_mirror = message_mirror
+
+with startup.phase("config"):
+    config = ConfigStore(CONFIG_DIR, legacy_file=CONFIG_FILE)
+    config.load(guild_filter=guild_filter_from_env())
+bot.config = config
 
+startup.mark("imports")
 
-def load_config():
-    """Load bot configuration from JSON file"""
+
+async def load_extension(name):
+    """Load a single extension, timing it and reporting failures"""
     try:
-        with open(CONFIG_FILE, "r") as f:
-            return json.load(f)
-    except FileNotFoundError:
-        return {"auto_cleanup": {}, "cleanup_age_days": 7, "cleanup_enabled": False}
+        with startup.phase(f"load {name}"):
+            await bot.load_extension(name)
+        print(f"Loaded extension {name}")
+        bot.dispatch("extension_load", name)
+    except Exception as e:
+        print(f"Failed to load extension {name}: {e}")
 
 
-def save_config(config):
-    """Save bot configuration to JSON file"""
-    with open(CONFIG_FILE, "w") as f:
-        json.dump(config, f, indent=2)
+@bot.event
+async def setup_hook():
+    """Bootstrap the bot once, before connecting to the gateway"""
+    global restoring_snapshot
+    if env_flag("LOOP_MONITOR", default=True):
+        loop_monitor.start()
+    audit.start()
+    # Read in the background; commands work meanwhile and get warmer once done
+    restoring_snapshot = asyncio.create_task(snapshots.restore())
+    save_snapshot.start()
+
+    with startup.phase("extensions"):
+        await asyncio.gather(*(load_extension(name) for name in EXTENSIONS))
+
+    if env_flag("SYNC_APP_COMMANDS"):
+        with startup.phase("sync app commands"):
+            synced = await bot.tree.sync()
+        print(f"Synced {len(synced)} slash commands")
+
+    # Derived from this cluster's own partitions; global.json is shared by
+    # every cluster, so a flag stored there would be set by whichever wrote last
+    if config.cleanup_count() and not auto_cleanup.is_running():
+        auto_cleanup.start()
+        print("Auto cleanup task started")
 
+    if shard_options is not None:
+        publish_cluster_status.start()
 
-config = load_config()
+    startup.mark("commands ready")
 
 
 @bot.event
 async def on_ready():
-    """Event triggered when bot is ready"""
+    """Event triggered when bot is ready (fires again after every reconnect)"""
     print(f"{bot.user} has connected to Discord!")
     print(f"Bot is in {len(bot.guilds)} guilds")
+    if shard_options is not None:
+        print(f"Running shards {sorted(bot.shards)} of {bot.shard_count}")
+
+    # A new session does not replay what was sent while disconnected
+    channel_counts.reconnected()
+
+    if startup.mark("ready"):
+        logger.info(startup.report())
+
+
+@bot.event
+async def on_member_join(member):
+    """Keep member aggregates current when someone joins"""
+    member_stats.member_joined(member)
+
+
+@bot.event
+async def on_raw_member_remove(payload):
+    """Keep member aggregates current when someone leaves (cached or not)"""
+    member_stats.member_removed(payload.guild_id, payload.user)
+
+
+@bot.event
+async def on_guild_remove(guild):
+    """Drop per-guild state when the bot leaves a guild"""
+    member_stats.forget(guild.id)
+    guild_usage.forget(guild.id)
+    for channel in guild.channels:
+        channel_counts.forget(channel.id)
+
+
+@bot.listen("on_message")
+async def count_message(message):
+    """Keep the counts of scanned channels current"""
+    channel_counts.message_created(message.channel.id, message.id)
+
+
+@bot.listen("on_raw_message_delete")
+async def uncount_message(payload):
+    channel_counts.messages_deleted(payload.channel_id, [payload.message_id])
 
-    try:
-        await bot.load_extension("cogs.advanced_utils")
-        print("Advanced utilities cog loaded successfully")
-    except Exception as e:
-        print(f"Failed to load advanced utilities cog: {e}")
 
+@bot.listen("on_raw_bulk_message_delete")
+async def uncount_messages(payload):
+    channel_counts.messages_deleted(payload.channel_id, payload.message_ids)
+
+
+@bot.listen("on_guild_channel_delete")
+async def forget_channel_counts(channel):
+    channel_counts.forget(channel.id)
+
+
+@bot.before_invoke
+async def before_any_command(ctx):
+    """Attribute REST calls to the command and wait for an admission slot"""
+    name = ctx.command.qualified_name
+    current_operation.set(name)
+    current_guild.set(ctx.guild.id if ctx.guild is not None else None)
+
+    if ctx.interaction is not None and ctx.command.extras.get("defer"):
+        # Acknowledge slash commands before any queueing or slow work, the
+        # interaction would otherwise expire after 3 seconds
+        await ctx.defer(ephemeral=ctx.command.extras.get("ephemeral", False))
+
+    # Commands that ask for confirmation first call admit() once confirmed
+    if not ctx.command.extras.get("confirm"):
+        await admit(ctx)
+
+
+async def admit(ctx):
+    """Wait for an admission slot if the command is limited; freed after invoke"""
+    name = ctx.command.qualified_name
+    if ctx.guild is not None and admission.is_limited(name):
+
+        async def notify(position):
+            await ctx.send(f"⏳ `!{name}` is busy, you are #{position} in the queue.")
+
+        await admission.acquire(name, ctx.guild.id, ctx.author.id, notify)
+        ctx.admitted = True
+
+
+@bot.after_invoke
+async def after_any_command(ctx):
+    """Free the admission slot of an expensive command"""
+    if getattr(ctx, "admitted", False):
+        admission.release(ctx.command.qualified_name, ctx.guild.id)
+
+
+@bot.event
+async def on_command(ctx):
+    """Event triggered before any command is invoked"""
+    if startup.mark("first command"):
+        logger.info(f"First command ({ctx.command}) handled after startup")
+
+
+def mirrored(channel) -> bool:
+    """Whether a channel's purges and stats can be planned from the mirror"""
+    return message_mirror is not None and message_mirror.is_complete(channel.id)
+
+
+async def delete_mirrored(channel, message_ids):
+    """Delete messages selected from the mirror and drop them from it"""
+    deleted = []
     try:
-        await bot.load_extension("cogs.help")
-        print("Help cog loaded successfully")
-    except Exception as e:
-        print(f"Failed to load help cog: {e}")
+        await delete_message_ids(channel, message_ids, deleted)
+    finally:
+        # Messages deleted before a failed request are gone all the same
+        message_mirror.remove(channel.id, deleted)
+    return deleted
 
-    if config.get("cleanup_enabled", False):
-        auto_cleanup.start()
-        print("Auto cleanup task started")
+
+async def purge_older_than(channel, cutoff_date):
+    """Delete a channel's messages created before ``cutoff_date``"""
+    if mirrored(channel):
+        ids = await message_mirror.ids_before(channel.id, snowflake_before(cutoff_date))
+        return await delete_mirrored(channel, ids)
+
+    def check(m):
+        return m.created_at < cutoff_date
+
+    return await channel.purge(limit=None, check=check, before=cutoff_date)
 
 
-@bot.command(name="clear")
-@commands.has_permissions(manage_messages=True)
+@requires_permissions(manage_messages=True)
+@bot.hybrid_command(
+    name="clear",
+    extras={"category": "Message Management", "defer": True, "ephemeral": True},
+)
+@commands.guild_only()
 async def clear_messages(ctx, amount: int = 10):
     """Clear a specified number of messages from the current channel"""
     if amount <= 0:
@@ -76,24 +339,35 @@ async def clear_messages(ctx, amount: int = 10):
         await ctx.send("❌ Cannot delete more than 100 messages at once.")
         return
 
+    # The prefix command also deletes the message that invoked it
+    own = 0 if ctx.interaction is not None else 1
     try:
-        deleted = await ctx.channel.purge(
-            limit=amount + 1
-        )
-        await ctx.send(f"✅ Deleted {len(deleted) - 1} messages.", delete_after=5)
-        logger.info(
-            f"Cleared {len(deleted) - 1} messages in {ctx.channel.name} by {ctx.author}"
-        )
+        with audit.job("clear", ctx, requested=amount) as job:
+            deleted = await ctx.channel.purge(
+                limit=amount + own
+            )
+            job.update(deleted=len(deleted) - own)
+        await ctx.send(f"✅ Deleted {len(deleted) - own} messages.", delete_after=5)
     except discord.Forbidden:
         await ctx.send("❌ I don't have permission to delete messages in this channel.")
     except discord.HTTPException as e:
         await ctx.send(f"❌ An error occurred: {e}")
 
 
-@bot.command(name="clearall")
-@commands.has_permissions(administrator=True)
+@requires_permissions(administrator=True)
+@bot.command(
+    name="clearall", extras={"category": "Message Management", "confirm": True}
+)
 async def clear_all_messages(ctx):
     """Clear all messages in the current channel (Admin only)"""
+    if not bot.intents.message_content:
+        # The typed confirmation would arrive without its text
+        await ctx.send(
+            "❌ `!clearall` needs the message content intent to read the "
+            "confirmation, which is disabled."
+        )
+        return
+
     await ctx.send(
         "⚠️ This will delete ALL messages in this channel. Type `confirm` within 10 seconds to proceed."
     )
@@ -111,26 +385,31 @@ async def clear_all_messages(ctx):
         await ctx.send("❌ Command cancelled - no confirmation received.")
         return
 
+    # An unanswered prompt must not hold a slot of an expensive command
+    await admit(ctx)
     try:
-        deleted = 0
-        async for message in ctx.channel.history(limit=None):
-            await message.delete()
-            deleted += 1
-            if deleted % 10 == 0:  
-                print(f"Deleted {deleted} messages...")
+        with audit.job("clearall", ctx) as job:
+            deleted = 0
+            async for message in ctx.channel.history(limit=None):
+                await message.delete()
+                deleted += 1
+                job.update(deleted=deleted)
+                if deleted % 100 == 0:
+                    audit.record("clearall_progress", job=job.id, deleted=deleted)
 
         await ctx.send(f"✅ Deleted all {deleted} messages from this channel.")
-        logger.info(
-            f"Cleared all {deleted} messages in {ctx.channel.name} by {ctx.author}"
-        )
     except discord.Forbidden:
         await ctx.send("❌ I don't have permission to delete messages in this channel.")
     except discord.HTTPException as e:
         await ctx.send(f"❌ An error occurred: {e}")
 
 
-@bot.command(name="clearuser")
-@commands.has_permissions(manage_messages=True)
+@requires_permissions(manage_messages=True)
+@bot.hybrid_command(
+    name="clearuser",
+    extras={"category": "Message Management", "defer": True, "ephemeral": True},
+)
+@commands.guild_only()
 async def clear_user_messages(ctx, user: discord.Member, amount: int = 10):
     """Clear messages from a specific user"""
     if amount <= 0:
@@ -145,21 +424,32 @@ async def clear_user_messages(ctx, user: discord.Member, amount: int = 10):
         return m.author == user
 
     try:
-        deleted = await ctx.channel.purge(limit=amount * 2, check=check)
+        with audit.job(
+            "clearuser", ctx, requested=amount, target_id=user.id, target=str(user)
+        ) as job:
+            if mirrored(ctx.channel):
+                ids = await message_mirror.recent_by_author(
+                    ctx.channel.id, user.id, amount * 2
+                )
+                deleted = await delete_mirrored(ctx.channel, ids)
+            else:
+                deleted = await ctx.channel.purge(limit=amount * 2, check=check)
+            job.update(deleted=len(deleted))
         await ctx.send(
             f"✅ Deleted {len(deleted)} messages from {user.mention}.", delete_after=5
         )
-        logger.info(
-            f"Cleared {len(deleted)} messages from {user} in {ctx.channel.name} by {ctx.author}"
-        )
     except discord.Forbidden:
         await ctx.send("❌ I don't have permission to delete messages in this channel.")
     except discord.HTTPException as e:
         await ctx.send(f"❌ An error occurred: {e}")
 
 
-@bot.command(name="clearold")
-@commands.has_permissions(manage_messages=True)
+@requires_permissions(manage_messages=True)
+@bot.hybrid_command(
+    name="clearold",
+    extras={"category": "Message Management", "defer": True, "ephemeral": True},
+)
+@commands.guild_only()
 async def clear_old_messages(ctx, days: int = 7):
     """Clear messages older than specified days"""
     if days <= 0:
@@ -168,25 +458,22 @@ async def clear_old_messages(ctx, days: int = 7):
 
     cutoff_date = datetime.now(timezone.utc) - timedelta(days=days)
 
-    def check(m):
-        return m.created_at < cutoff_date
-
     try:
-        deleted = await ctx.channel.purge(limit=None, check=check, before=cutoff_date)
+        with audit.job("clearold", ctx, days=days) as job:
+            deleted = await purge_older_than(ctx.channel, cutoff_date)
+            job.update(deleted=len(deleted))
         await ctx.send(
             f"✅ Deleted {len(deleted)} messages older than {days} days.",
             delete_after=5,
         )
-        logger.info(
-            f"Cleared {len(deleted)} old messages in {ctx.channel.name} by {ctx.author}"
-        )
     except discord.Forbidden:
         await ctx.send("❌ I don't have permission to delete messages in this channel.")
     except discord.HTTPException as e:
         await ctx.send(f"❌ An error occurred: {e}")
 
 
-@bot.command(name="stats")
+@bot.hybrid_command(name="stats", extras={"category": "Statistics", "defer": True})
+@commands.guild_only()
 async def server_stats(ctx):
     """Get comprehensive server statistics"""
     guild = ctx.guild
@@ -202,10 +489,17 @@ async def server_stats(ctx):
 
 
     total_members = guild.member_count
-    online_members = len(
-        [m for m in guild.members if m.status != discord.Status.offline]
-    )
-    bots = len([m for m in guild.members if m.bot])
+    if guild.chunked:
+        online_members = len(
+            [m for m in guild.members if m.status != discord.Status.offline]
+        )
+        bots = len([m for m in guild.members if m.bot])
+    else:
+        # Lean cache mode: members are not cached, use the aggregates instead
+        bots = (await member_stats.ensure(guild)).bots
+        online_members = await member_stats.online_count(bot, guild)
+        if online_members is None:
+            online_members = "Unknown"
     humans = total_members - bots
 
     embed.add_field(
@@ -236,14 +530,31 @@ async def server_stats(ctx):
     
     embed.add_field(
         name="ℹ️ Server Info",
-        value=f"Created: {guild.created_at.strftime('%B %d, %Y')}\nOwner: {guild.owner.mention if guild.owner else 'Unknown'}\nBoost Level: {guild.premium_tier}",
+        value=f"Created: {guild.created_at.strftime('%B %d, %Y')}\nOwner: {guild.owner.mention if guild.owner else f'<@{guild.owner_id}>'}\nBoost Level: {guild.premium_tier}",
         inline=False,
     )
 
     await ctx.send(embed=embed)
 
 
-@bot.command(name="channelstats")
+async def live_counts(channel):
+    """Counts kept from gateway events, reading what was missed while down"""
+    after_id = channel_counts.needs_catch_up(channel.id)
+    if after_id is not None:
+        missed = [
+            message.id
+            async for message in channel.history(
+                limit=None, after=discord.Object(id=after_id)
+            )
+        ]
+        channel_counts.caught_up(channel.id, missed)
+    return channel_counts.counts(channel.id)
+
+
+@bot.hybrid_command(
+    name="channelstats", extras={"category": "Statistics", "defer": True}
+)
+@commands.guild_only()
 async def channel_stats(ctx, channel: Optional[discord.TextChannel] = None):
     """Get statistics for a specific channel"""
     if channel is None:
@@ -264,12 +575,27 @@ async def channel_stats(ctx, channel: Optional[discord.TextChannel] = None):
     total_messages = 0
 
     try:
-        async for message in channel.history(limit=None):
-            total_messages += 1
-            if message.created_at > day_ago:
-                messages_24h += 1
-            if message.created_at > week_ago:
-                messages_7d += 1
+        if mirrored(channel):
+            total_messages, messages_7d, messages_24h = await message_mirror.count_since(
+                channel.id, snowflake_before(week_ago), snowflake_before(day_ago)
+            )
+        elif channel.id in channel_counts:
+            total_messages, messages_7d, messages_24h = await live_counts(channel)
+        else:
+            newest_id = 0
+            recent_ids = []
+            async for message in channel.history(limit=None):
+                newest_id = newest_id or message.id
+                total_messages += 1
+                if message.created_at > day_ago:
+                    messages_24h += 1
+                if message.created_at > week_ago:
+                    messages_7d += 1
+                    recent_ids.append(message.id)
+            # Messages sent during the scan are read by the next call
+            channel_counts.seed(
+                channel.id, total_messages, recent_ids, newest_id, caught_up=False
+            )
     except discord.Forbidden:
         await ctx.send(
             "❌ I don't have permission to read message history in that channel."
@@ -297,17 +623,103 @@ async def channel_stats(ctx, channel: Optional[discord.TextChannel] = None):
     await ctx.send(embed=embed)
 
 
-@bot.command(name="autocleanup")
-@commands.has_permissions(administrator=True)
+@requires_owner()
+@bot.command(name="shards", hidden=True)
+async def shard_status(ctx):
+    """Show the status of every shard cluster"""
+    statuses = read_cluster_status()
+    if not statuses:
+        statuses = {"0": build_cluster_status(bot)}
+
+    embed = discord.Embed(
+        title="🧩 Shard Clusters",
+        color=discord.Color.blue(),
+        timestamp=datetime.now(),
+    )
+
+    for cluster, status in sorted(statuses.items()):
+        latencies = ", ".join(
+            f"#{shard}: {ms:.0f}ms" for shard, ms in status["shards"].items()
+        )
+        embed.add_field(
+            name=f"Cluster {cluster}" + (" ⚠️ stale" if status.get("stale") else ""),
+            value=f"Guilds: {status['guilds']}\nMembers: {status['members']}\n"
+            f"PID: {status['pid']}\nShards: {latencies}",
+            inline=True,
+        )
+
+    embed.set_footer(
+        text=f"Total guilds: {sum(s['guilds'] for s in statuses.values())}"
+    )
+    await ctx.send(embed=embed)
+
+
+@requires_owner()
+@bot.command(name="globalstats", hidden=True)
+async def global_stats(ctx):
+    """Show totals, auto cleanup coverage and API cost across all guilds"""
+    guilds = bot.guilds
+    members = sum(guild.member_count or 0 for guild in guilds)
+    channels = sum(len(guild.channels) for guild in guilds)
+    cleanup = config.cleanup_counts()
+    covered = sum(1 for guild in guilds if guild.id in cleanup)
+
+    embed = discord.Embed(
+        title="🌐 Global Statistics",
+        color=discord.Color.blue(),
+        timestamp=datetime.now(),
+    )
+    embed.add_field(
+        name="🏠 Guilds",
+        value=f"Guilds: {len(guilds):,}\nMembers: {members:,}\nChannels: {channels:,}",
+        inline=True,
+    )
+    embed.add_field(
+        name="🔄 Auto Cleanup",
+        value=f"Channels: {sum(cleanup.values()):,}\n"
+        f"Guilds: {covered:,} ({covered / max(1, len(guilds)):.0%})",
+        inline=True,
+    )
+
+    deleted_today, calls_today, seconds_today = guild_usage.totals(days=1)
+    deleted_week, calls_week, seconds_week = guild_usage.totals(days=7)
+    embed.add_field(
+        name="🗑️ Messages Deleted",
+        value=f"Today: {deleted_today:,}\nLast 7 days: {deleted_week:,}",
+        inline=True,
+    )
+    embed.add_field(
+        name="📡 API Usage",
+        value=f"Today: {calls_today:,} calls, {seconds_today:.1f}s\n"
+        f"Last 7 days: {calls_week:,} calls, {seconds_week:.1f}s",
+        inline=True,
+    )
+
+    top = guild_usage.top(days=7, n=5)
+    if top:
+        lines = []
+        for guild_id, deleted, calls, seconds in top:
+            guild = bot.get_guild(guild_id)
+            name = guild.name if guild else str(guild_id)
+            lines.append(
+                f"**{name}** - {seconds:.1f}s, {calls:,} calls, {deleted:,} deleted"
+            )
+        embed.add_field(
+            name="💸 Most API Time (7 days)", value="\n".join(lines), inline=False
+        )
+
+    if shard_options is not None:
+        embed.set_footer(text="This cluster only, see !shards for every cluster")
+    await ctx.send(embed=embed)
+
+
+@requires_permissions(administrator=True)
+@bot.hybrid_command(name="autocleanup", extras={"category": "Auto Cleanup"})
+@commands.guild_only()
 async def setup_auto_cleanup(ctx, channel: discord.TextChannel, days: int = 7):
     """Setup automatic cleanup for a channel"""
-    config["auto_cleanup"][str(channel.id)] = {
-        "channel_name": channel.name,
-        "days": days,
-        "guild_id": ctx.guild.id,
-    }
-    config["cleanup_enabled"] = True
-    save_config(config)
+    config.set_cleanup(ctx.guild.id, channel.id, channel.name, days)
+    audit.record("autocleanup_enabled", **context_fields(ctx, channel), days=days)
 
     await ctx.send(
         f"✅ Auto cleanup enabled for {channel.mention}. Messages older than {days} days will be automatically deleted."
@@ -317,31 +729,39 @@ async def setup_auto_cleanup(ctx, channel: discord.TextChannel, days: int = 7):
         auto_cleanup.start()
 
 
-@bot.command(name="stopauto")
-@commands.has_permissions(administrator=True)
+@requires_permissions(administrator=True)
+@bot.hybrid_command(name="stopauto", extras={"category": "Auto Cleanup"})
+@commands.guild_only()
 async def stop_auto_cleanup(ctx, channel: Optional[discord.TextChannel] = None):
     """Stop automatic cleanup for a channel or all channels"""
     if channel:
-        if str(channel.id) in config["auto_cleanup"]:
-            del config["auto_cleanup"][str(channel.id)]
+        if config.remove_cleanup(channel.id):
+            audit.record("autocleanup_disabled", **context_fields(ctx, channel))
             await ctx.send(f"✅ Auto cleanup disabled for {channel.mention}.")
         else:
             await ctx.send(f"❌ Auto cleanup was not enabled for {channel.mention}.")
     else:
-        config["auto_cleanup"] = {}
-        config["cleanup_enabled"] = False
+        removed = config.clear_cleanup(ctx.guild.id)
+        audit.record(
+            "autocleanup_disabled",
+            actor_id=ctx.author.id,
+            actor=str(ctx.author),
+            guild_id=ctx.guild.id,
+            channels=removed,
+        )
         await ctx.send("✅ Auto cleanup disabled for all channels.")
-        if auto_cleanup.is_running():
-            auto_cleanup.stop()
 
-    save_config(config)
+    if config.cleanup_count() == 0 and auto_cleanup.is_running():
+        auto_cleanup.stop()
 
 
-@bot.command(name="listauto")
-@commands.has_permissions(manage_messages=True)
+@requires_permissions(manage_messages=True)
+@bot.hybrid_command(name="listauto", extras={"category": "Auto Cleanup"})
+@commands.guild_only()
 async def list_auto_cleanup(ctx):
     """List all channels with auto cleanup enabled"""
-    if not config["auto_cleanup"]:
+    entries = config.guild_cleanup(ctx.guild.id)
+    if not entries:
         await ctx.send("❌ No channels have auto cleanup enabled.")
         return
 
@@ -349,8 +769,8 @@ async def list_auto_cleanup(ctx):
         title="🔄 Auto Cleanup Channels", color=discord.Color.orange()
     )
 
-    for channel_id, settings in config["auto_cleanup"].items():
-        channel = bot.get_channel(int(channel_id))
+    for channel_id, settings in entries.items():
+        channel = bot.get_channel(channel_id)
         if channel:
             embed.add_field(
                 name=f"#{settings['channel_name']}",
@@ -361,28 +781,30 @@ async def list_auto_cleanup(ctx):
     await ctx.send(embed=embed)
 
 
-@tasks.loop(hours=24)  
+@tasks.loop(hours=1)
 async def auto_cleanup():
-    """Automatically cleanup old messages in configured channels"""
-    for channel_id, settings in config["auto_cleanup"].items():
+    """Automatically cleanup old messages in configured channels once a day"""
+    current_operation.set("auto_cleanup")
+    for channel_id, settings in config.cleanup_channels():
         try:
-            channel = bot.get_channel(int(channel_id))
+            channel = bot.get_channel(channel_id)
             if not channel or not isinstance(channel, discord.TextChannel):
                 continue
+            last_run = cleanup_runs.get(channel_id, 0)
+            if time.time() - last_run < CLEANUP_INTERVAL_HOURS * 3600:
+                continue
+            cleanup_runs[channel_id] = time.time()
+            current_guild.set(channel.guild.id)
 
             cutoff_date = datetime.now(timezone.utc) - timedelta(days=settings["days"])
 
-            def check(m):
-                return m.created_at < cutoff_date
-
-            deleted = await channel.purge(limit=None, check=check, before=cutoff_date)
+            with audit.job(
+                "auto_cleanup", channel=channel, actor="auto_cleanup", days=settings["days"]
+            ) as job:
+                deleted = await purge_older_than(channel, cutoff_date)
+                job.update(deleted=len(deleted))
 
             if deleted:
-                logger.info(
-                    f"Auto cleanup: Deleted {len(deleted)} messages from #{channel.name}"
-                )
-
-                
                 log_channel_id = os.getenv("LOG_CHANNEL_ID")
                 if log_channel_id:
                     log_channel = bot.get_channel(int(log_channel_id))
@@ -399,6 +821,41 @@ async def auto_cleanup():
             logger.error(f"Error in auto cleanup for channel {channel_id}: {e}")
 
 
+@tasks.loop(seconds=30)
+async def publish_cluster_status():
+    """Publish this process' shard status to the shared cluster store"""
+    status = build_cluster_status(bot)
+    await asyncio.get_running_loop().run_in_executor(
+        None, write_cluster_status, status
+    )
+
+
+@publish_cluster_status.before_loop
+async def before_publish_cluster_status():
+    """Wait until the shards are connected before publishing status"""
+    await bot.wait_until_ready()
+
+
+@auto_cleanup.before_loop
+async def before_auto_cleanup():
+    """Wait for the gateway cache and the last run times before cleaning"""
+    await bot.wait_until_ready()
+    if restoring_snapshot is not None:
+        await restoring_snapshot
+
+
+@tasks.loop(minutes=5)
+async def save_snapshot():
+    """Save derived state so a restart starts warm"""
+    await snapshots.save()
+
+
+@save_snapshot.before_loop
+async def before_save_snapshot():
+    """Never overwrite the previous snapshot before it has been read"""
+    if restoring_snapshot is not None:
+        await restoring_snapshot
+
 
 @bot.event
 async def on_command_error(ctx, error):
@@ -413,6 +870,8 @@ async def on_command_error(ctx, error):
         await ctx.send("❌ Command not found. Use `!help` to see available commands.")
     elif isinstance(error, commands.BadArgument):
         await ctx.send("❌ Invalid argument provided. Please check the command usage.")
+    elif isinstance(error, AdmissionRejected):
+        await ctx.send(f"⏳ {error}")
     else:
         await ctx.send(f"❌ An error occurred: {error}")
         logger.error(f"Unhandled error: {error}")
@@ -442,4 +901,10 @@ if __name__ == "__main__":
         print("❌ No Discord token found. Please set DISCORD_TOKEN in your .env file.")
         exit(1)
 
-    bot.run(token)
+    try:
+        bot.run(token)
+    finally:
+        config.flush_sync()
+        snapshots.save_sync()
+        snapshots.close()
+        audit.close()
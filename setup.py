@@ -80,7 +80,7 @@ def create_directories():
     """Create necessary directories"""
     print("\n📁 Creating directories...")
 
-    directories = ["logs", "backups"]
+    directories = ["logs", "backups", "data"]
 
     for directory in directories:
         Path(directory).mkdir(exist_ok=True)
@@ -52,7 +52,32 @@ def test_files():
         ".env.example",
         "cogs/__init__.py",
         "cogs/advanced_utils.py",
+        "cogs/analytics.py",
         "cogs/help.py",
+        "cogs/leaderboard.py",
+        "cogs/perf.py",
+        "cogs/mirror.py",
+        "cogs/auto_slowmode.py",
+        "cogs/restore.py",
+        "core/__init__.py",
+        "core/config_store.py",
+        "core/startup.py",
+        "core/sharding.py",
+        "core/env.py",
+        "core/member_stats.py",
+        "core/metrics.py",
+        "core/http_telemetry.py",
+        "core/loop_monitor.py",
+        "core/admission.py",
+        "core/audit.py",
+        "core/message_mirror.py",
+        "core/activity.py",
+        "core/topk.py",
+        "core/guild_usage.py",
+        "core/rate_window.py",
+        "core/channel_counts.py",
+        "core/snapshot.py",
+        "core/backup_replay.py",
     ]
 
     missing_files = []